@@ -0,0 +1,194 @@
+import json
+import os
+import re
+from pathlib import Path
+from typing import Iterable, Optional
+
+# Keyword sets used by the card gates and status checks. They live here (not in
+# scraper.py) so parsing/streaming code can use them without importing the scraper.
+DISTRESSED_KEYWORDS = ["foreclosure","pre-foreclosure","auction","bank owned","reo","short sale","fixer","distressed"]
+HOA_KEYWORDS = ["hoa"]
+
+NEG_STATUS = {"pending","sold","contingent","off market","off-market","closed","withdrawn","canceled","leased","rented","temporarily off market"}
+POS_STATUS_TOKENS = {"for sale","active","active listing","on market","on-market"}
+
+ACTIVE_TOKENS = {
+    "active", "for_sale", "for sale", "active-listing", "on_market", "on market"
+}
+INACTIVE_TOKENS = {
+    "pending", "under contract", "contingent", "off_market", "sold",
+    "coming soon", "withdrawn", "canceled", "expired"
+}
+
+# Optional JSON file overriding any of the sets below, e.g. {"distressed": ["foreclosure", "as-is"]}
+KEYWORDS_FILE = os.getenv("ESTATELY_KEYWORDS_FILE", "").strip()
+
+DEFAULT_KEYWORD_SETS: dict[str, Iterable[str]] = {
+    "distressed": DISTRESSED_KEYWORDS,
+    "hoa": HOA_KEYWORDS,
+    "negative_status": NEG_STATUS,
+    "positive_status": POS_STATUS_TOKENS,
+    "active": ACTIVE_TOKENS,
+    "inactive": INACTIVE_TOKENS,
+}
+
+_phone_re = re.compile(r"(?:\+?1[\s.-]?)?(?:\(?\d{3}\)?[\s.-]?)?\d{3}[\s.-]?\d{4}")
+_email_re = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+
+_SEPARATORS = re.compile(r"[\s_-]+")
+
+
+def _normalize_keyword(s: str) -> str:
+    return _SEPARATORS.sub(" ", s.strip().lower())
+
+
+def _keyword_pattern(kw: str) -> str:
+    # "off market" also matches "off-market" / "off_market"
+    return r"[\s_-]+".join(re.escape(part) for part in kw.split(" "))
+
+
+def _bounded(body: str) -> str:
+    # Letters/digits on either side mean we're inside another word ("Oreo", "soldier");
+    # a plain "s" is allowed so plurals ("auctions", "HOAs") still count.
+    return rf"(?<![a-z0-9])(?:{body})s?(?![a-z0-9])"
+
+
+class KeywordMatcher:
+    """
+    Every keyword of every category compiled into one word-bounded alternation,
+    so a single `finditer` over a text finds all categories' hits at once.
+
+    A regex reports one (the longest) keyword per position, so each keyword also
+    credits the categories of shorter keywords it contains: "active listing"
+    counts for "active" too, just as the old substring scans did.
+    """
+
+    def __init__(self, categories: dict[str, Iterable[str]]):
+        owners: dict[str, set[str]] = {}
+        for name, words in categories.items():
+            for w in words:
+                kw = _normalize_keyword(w or "")
+                if kw:
+                    owners.setdefault(kw, set()).add(name)
+        self.categories = tuple(categories)
+        keywords = sorted(owners, key=len, reverse=True)
+        self._credit: dict[str, frozenset] = {}
+        for kw in keywords:
+            cats = set(owners[kw])
+            for other in keywords:
+                if len(other) < len(kw) and re.search(_bounded(_keyword_pattern(other)), kw):
+                    cats |= owners[other]
+            self._credit[kw] = frozenset(cats)
+        # raw matched text -> (keyword, categories); spellings repeat a lot across cards
+        self._seen: dict[str, tuple[str, frozenset]] = {}
+        # Case-sensitive on purpose: callers pass lowercased text, and re.I makes sre ~3x slower here
+        self._re = re.compile(_bounded("|".join(_keyword_pattern(k) for k in keywords))) if keywords else None
+
+    def _resolve(self, raw: str) -> tuple[str, frozenset]:
+        kw = _normalize_keyword(raw)
+        credit = self._credit.get(kw)
+        if credit is None:
+            # matched with the plural "s"
+            kw = kw[:-1]
+            credit = self._credit.get(kw, frozenset())
+        if len(self._seen) < 4096:
+            self._seen[raw] = (kw, credit)
+        return kw, credit
+
+    def scan(self, text: str) -> dict[str, list[str]]:
+        """{category: [keywords hit, in order]} for every category with at least one hit; `text` must be lowercase."""
+        hits: dict[str, list[str]] = {}
+        if not text or self._re is None:
+            return hits
+        seen = self._seen
+        for m in self._re.finditer(text):
+            raw = m.group(0)
+            kw, credit = seen.get(raw) or self._resolve(raw)
+            for cat in credit:
+                hits.setdefault(cat, []).append(kw)
+        return hits
+
+
+def load_keyword_sets(path: str = KEYWORDS_FILE) -> dict[str, Iterable[str]]:
+    """Default sets, with any category present in the JSON file at `path` replaced."""
+    sets = dict(DEFAULT_KEYWORD_SETS)
+    if path:
+        try:
+            overrides = json.loads(Path(path).expanduser().read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            overrides = {}
+        for name, words in (overrides or {}).items():
+            if isinstance(words, list):
+                sets[name] = words
+    return sets
+
+
+_matcher: Optional[KeywordMatcher] = None
+# Categories replaced through set_keyword_sets, re-applied in parse workers
+_overrides: dict[str, tuple[str, ...]] = {}
+
+
+def get_matcher() -> KeywordMatcher:
+    """Process-wide matcher built from the default sets plus ESTATELY_KEYWORDS_FILE."""
+    global _matcher
+    if _matcher is None:
+        _matcher = KeywordMatcher(load_keyword_sets())
+    return _matcher
+
+
+def set_keyword_sets(**sets: Iterable[str]) -> KeywordMatcher:
+    """Replace some categories (e.g. `set_keyword_sets(distressed=[...])`) and rebuild the matcher."""
+    global _matcher
+    _overrides.update((name, tuple(words)) for name, words in sets.items())
+    merged = load_keyword_sets()
+    merged.update(_overrides)
+    _matcher = KeywordMatcher(merged)
+    return _matcher
+
+
+def keyword_overrides() -> dict[str, tuple[str, ...]]:
+    """Categories replaced with `set_keyword_sets` so far (plain tuples, safe to pickle)."""
+    return dict(_overrides)
+
+
+class CardAnalysis:
+    """
+    One card's text and everything the gates read from it, computed once: the
+    lowercased text, HOA / distressed flags, status hints and (on first use) the
+    contact phone/email. Built once per card and handed through parsing, gating
+    and Mongo normalization instead of re-running get_text/lower/scans at each step.
+    """
+
+    __slots__ = ("text", "lower", "hits", "has_hoa", "distressed", "negative_status", "positive_status", "_contacts")
+
+    def __init__(self, text: Optional[str]):
+        self.text = text or ""
+        self.lower = self.text.lower()
+        # One scan for every keyword category
+        self.hits = get_matcher().scan(self.lower)
+        self.has_hoa = "hoa" in self.hits
+        self.distressed = "distressed" in self.hits
+        self.negative_status = "negative_status" in self.hits
+        self.positive_status = "positive_status" in self.hits
+        self._contacts: Optional[tuple[Optional[str], Optional[str]]] = None
+
+    @property
+    def contacts(self) -> tuple[Optional[str], Optional[str]]:
+        """(phone, email) from the card text; only cards that reach Mongo pay for the regexes."""
+        if self._contacts is None:
+            m_phone = _phone_re.search(self.text)
+            m_email = _email_re.search(self.text)
+            self._contacts = (m_phone.group(0) if m_phone else None, m_email.group(0) if m_email else None)
+        return self._contacts
+
+
+def analyze(text) -> CardAnalysis:
+    """Accept raw text or an existing CardAnalysis (so helpers work with either)."""
+    if isinstance(text, CardAnalysis):
+        return text
+    return CardAnalysis(text)
+
+
+def status_hits(value: str) -> dict[str, list[str]]:
+    """Keyword hits in a short status field (e.g. "Pending", "FOR_SALE")."""
+    return get_matcher().scan(value.lower())
@@ -0,0 +1,311 @@
+"""
+Offline parser benchmarks.
+
+    python -m backend.estately.bench [FILE_OR_DIR ...] [--engine bs4,lxml] [--sizes 10,100,1000]
+                                     [--out estately-bench.json] [--compare OLD.json] [--only OP,...]
+
+Times the parse hot path with no network: `select_cards`, `parse_card`,
+`parse_all_cards`, `_mine_inline_scripts`, `_extract_listings_from_json_blob` and
+`_extract_estately_map_properties`. Each op runs against the saved vendor pages
+(defaults to backend/vendors/*/source) and against generated Estately result
+pages with 10/100/1000 cards (their inline state and /map/properties payload
+hold the same listings).
+
+Each op reports the median and best wall time per call, µs per card and pages/s.
+It also reports the peak Python allocation of one traced call and the process
+peak RSS after the op. Results are written as JSON. With --compare, ops that got
+more than --threshold slower than the baseline file are listed and the exit
+status is 1, so a parser change can be checked against the previous numbers.
+"""
+import argparse
+import json
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from backend.estately.harvest import _extract_listings_from_json_blob, _mine_inline_scripts, walker_stats
+from backend.estately.inline_state import script_blocks
+from backend.estately.parity import DEFAULT_FIXTURES, iter_pages
+from backend.estately.parsing import get_engine, parse_all_cards
+
+OPS = (
+    "select_cards",
+    "parse_card",
+    "parse_all_cards",
+    "_mine_inline_scripts",
+    "_extract_listings_from_json_blob",
+    "_extract_estately_map_properties",
+)
+DEFAULT_SIZES = (10, 100, 1000)
+MAP_URL = "https://www.estately.com/map/properties?page=1"
+
+
+# --- generated pages ------------------------------------------------------------
+
+def _listing(i: int) -> dict:
+    return {
+        "id": 100000 + i,
+        "address": {"street": f"{100 + i} Main St", "city": "Phoenix", "state": "AZ", "zip": "85001"},
+        "list_price_cents": (300000 + 1000 * i) * 100,
+        "beds": 2 + i % 4,
+        "baths": 1 + i % 3,
+        "sqft": 1200 + 7 * i,
+        "status": "Active" if i % 10 else "Pending",
+        "url": f"/listings/info/{100000 + i}",
+    }
+
+
+def _card_html(i: int) -> str:
+    n = _listing(i)
+    street, price = n["address"]["street"], n["list_price_cents"] // 100
+    # Two cards in three carry JSON-LD; the rest exercise the DOM cascades
+    ld = ""
+    if i % 3:
+        ld = (
+            '<script type="application/ld+json">' + json.dumps([
+                {
+                    "@type": "SingleFamilyResidence",
+                    "address": {"streetAddress": street, "addressLocality": "Phoenix",
+                                "addressRegion": "AZ", "postalCode": "85001"},
+                    "numberOfBedrooms": n["beds"], "numberOfBathroomsTotal": n["baths"],
+                    "floorSize": {"value": n["sqft"]}, "url": n["url"],
+                },
+                {"@type": "Product", "offers": {"price": price}},
+            ]) + "</script>"
+        )
+    remark = "Fixer upper, foreclosure auction. No HOA." if i % 7 == 0 else "Updated kitchen, close to schools."
+    return (
+        f'<div class="js-map-listing-result result-item" data-listing-id="{n["id"]}">{ld}'
+        f'<div class="result-photo"><img src="https://img.estately.com/{n["id"]}.jpg" alt=""></div>'
+        f'<div class="result-address"><a href="{n["url"]}">{street}, Phoenix, AZ 85001</a></div>'
+        f'<div class="result-price"><strong>${price:,}</strong></div>'
+        f'<ul class="result-facts"><li>{n["beds"]} beds</li><li>{n["baths"]} baths</li><li>{n["sqft"]:,} sq ft</li></ul>'
+        f'<p class="result-remarks">{remark}</p><span class="result-status">{n["status"]}</span></div>\n'
+    )
+
+
+def synthetic_page(cards: int) -> str:
+    """An Estately-style results page with `cards` listing cards, inline search state and a next link."""
+    state = {
+        "i18n": {"messages": {f"k{k}": f"label {k}" for k in range(200)}},
+        "search": {"total": cards, "results": {"listings": [_listing(i) for i in range(cards)]}},
+    }
+    return (
+        "<!doctype html><html><head><title>Phoenix, AZ homes for sale</title>"
+        f"<script>window.__INITIAL_STATE__ = {json.dumps(state)};</script></head>"
+        '<body><div id="listings">'
+        + "".join(_card_html(i) for i in range(cards))
+        + '</div><nav><a rel="next" href="/AZ/Phoenix?page=2">Next</a></nav></body></html>'
+    )
+
+
+def synthetic_map_payload(cards: int) -> str:
+    """A /map/properties response body with the same listings as `synthetic_page(cards)`."""
+    return json.dumps([_listing(i) for i in range(cards)])
+
+
+# --- measurement ----------------------------------------------------------------
+
+def _peak_rss_kb() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, KiB elsewhere
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def _time(fn: Callable[[], Any], min_time: float, min_runs: int) -> list[float]:
+    fn()  # warm-up: imports, regex compiles, the JSON walker's learned paths
+    runs: list[float] = []
+    started = time.perf_counter()
+    while len(runs) < min_runs or time.perf_counter() - started < min_time:
+        t0 = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t0)
+    return runs
+
+
+def _traced_peak_kb(fn: Callable[[], Any]) -> int:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] // 1024
+    finally:
+        tracemalloc.stop()
+
+
+def measure(page: str, op: str, engine: str, cards: int, fn: Callable[[], Any],
+            min_time: float = 0.5, min_runs: int = 5) -> dict:
+    """Time `fn` (one call = one page's worth of `op`) and return its result row."""
+    runs = _time(fn, min_time, min_runs)
+    median = statistics.median(runs)
+    return {
+        "page": page,
+        "op": op,
+        "engine": engine,
+        "cards": cards,
+        "runs": len(runs),
+        "median_ms": round(median * 1000, 4),
+        "best_ms": round(min(runs) * 1000, 4),
+        "us_per_card": round(median * 1e6 / cards, 2) if cards else None,
+        "pages_per_s": round(1 / median, 1) if median else None,
+        "peak_alloc_kb": _traced_peak_kb(fn),
+        "peak_rss_kb": _peak_rss_kb(),
+    }
+
+
+# --- ops ------------------------------------------------------------------------
+
+def _dom_cases(page: str, html: str, engine, ops: set[str], min_time: float) -> list[dict]:
+    rows = []
+    # select_cards strips extension UI in place: select on a fresh tree every call, and
+    # report the tree build on its own so the selection cost can be read off
+    cards = engine.select_cards(engine.document(html))
+    n = len(cards)
+    if "select_cards" in ops:
+        rows.append(measure(page, "document", engine.name, n, lambda: engine.document(html), min_time))
+        rows.append(measure(page, "select_cards", engine.name, n,
+                            lambda: engine.select_cards(engine.document(html)), min_time))
+    if "parse_card" in ops and n:
+        def parse_each():
+            for c in cards:
+                try:
+                    engine.parse_card(c)
+                except Exception:
+                    pass
+        rows.append(measure(page, "parse_card", engine.name, n, parse_each, min_time))
+    if "parse_all_cards" in ops:
+        rows.append(measure(page, "parse_all_cards", engine.name, n,
+                            lambda: parse_all_cards(html, engine), min_time))
+    return rows
+
+
+def _json_cases(page: str, html: str, ops: set[str], min_time: float, map_payload: Optional[str]) -> list[dict]:
+    rows = []
+    if "_mine_inline_scripts" in ops:
+        n = len(_mine_inline_scripts(html))
+        rows.append(measure(page, "_mine_inline_scripts", "-", n, lambda: _mine_inline_scripts(html), min_time))
+    if "_extract_listings_from_json_blob" in ops:
+        # The page's own JSON islands and state assignments, fed in as response bodies
+        blobs = []
+        for typ, text in script_blocks(html):
+            start = min([i for i in (text.find("{"), text.find("[")) if i != -1] or [-1])
+            if start != -1 and len(text) > 64:
+                blobs.append(text[start:].rstrip().rstrip(";"))
+        if map_payload is not None:
+            blobs.append(map_payload)
+        if blobs:
+            hint = f"bench/{page}"
+            n = sum(len(_extract_listings_from_json_blob(b, hint)) for b in blobs)
+            rows.append(measure(page, "_extract_listings_from_json_blob", "-", n,
+                                lambda: [_extract_listings_from_json_blob(b, hint) for b in blobs], min_time))
+    if "_extract_estately_map_properties" in ops and map_payload is not None:
+        # scraper.py pulls in the client stack; only import it when this op runs
+        from backend.estately.scraper import _extract_estately_map_properties
+        rows.append(measure(page, "_extract_estately_map_properties", "-", len(json.loads(map_payload)),
+                            lambda: _extract_estately_map_properties(MAP_URL, map_payload), min_time))
+    return rows
+
+
+def run(paths: list[str], engines: list[str], sizes: list[int], ops: set[str], min_time: float,
+        log: Callable[[str], None] = print) -> list[dict]:
+    """Every op on every saved and generated page; returns the result rows."""
+    pages: list[tuple[str, str, Optional[str]]] = []
+    for path in iter_pages(paths):
+        try:
+            label = str(path.relative_to(DEFAULT_FIXTURES))
+        except ValueError:
+            label = str(path)
+        pages.append((label, path.read_text(encoding="utf-8", errors="replace"), None))
+    for n in sizes:
+        pages.append((f"synthetic/{n}", synthetic_page(n), synthetic_map_payload(n)))
+
+    rows: list[dict] = []
+    for label, html, map_payload in pages:
+        page_rows = []
+        for name in engines:
+            page_rows += _dom_cases(label, html, get_engine(name), ops, min_time)
+        page_rows += _json_cases(label, html, ops, min_time, map_payload)
+        for r in page_rows:
+            per_card = f"{r['us_per_card']:>9.1f}µs/card" if r["us_per_card"] is not None else " " * 16
+            log(f"[bench] {label:<40} {r['op']:<34} {r['engine']:<4} {r['cards']:>5} cards "
+                f"{r['median_ms']:>9.3f}ms {per_card} {r['pages_per_s']:>9.1f} pages/s  "
+                f"alloc {r['peak_alloc_kb']}KiB")
+        rows += page_rows
+    return rows
+
+
+def compare(rows: list[dict], baseline: list[dict], threshold: float) -> list[str]:
+    """Ops whose median got more than `threshold` (0.1 = 10%) slower than in `baseline`."""
+    before = {(r["page"], r["op"], r["engine"]): r for r in baseline}
+    slower = []
+    for r in rows:
+        old = before.get((r["page"], r["op"], r["engine"]))
+        if not old or not old.get("median_ms"):
+            continue
+        ratio = r["median_ms"] / old["median_ms"]
+        if ratio > 1 + threshold:
+            slower.append(f"{r['page']} {r['op']} {r['engine']}: {old['median_ms']:.3f}ms -> {r['median_ms']:.3f}ms "
+                          f"({ratio:.2f}x)")
+    return slower
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Benchmark the parsers on saved and generated pages.")
+    ap.add_argument("paths", nargs="*", help="HTML files or directories (default: backend/vendors)")
+    ap.add_argument("--engine", default="bs4,lxml", help="comma-separated engines (default: bs4,lxml)")
+    ap.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                    help="cards per generated page, comma-separated; empty for none (default: 10,100,1000)")
+    ap.add_argument("--only", default="", help=f"comma-separated subset of: {', '.join(OPS)}")
+    ap.add_argument("--min-time", type=float, default=0.5, help="seconds to keep re-running each op (default: 0.5)")
+    ap.add_argument("--out", default="estately-bench.json", help="where to write the JSON results")
+    ap.add_argument("--compare", help="earlier results file to check for regressions")
+    ap.add_argument("--threshold", type=float, default=0.10, help="slowdown that counts as a regression (default: 0.10)")
+    args = ap.parse_args(argv)
+
+    ops = {o.strip() for o in args.only.split(",") if o.strip()} or set(OPS)
+    unknown = ops - set(OPS)
+    if unknown:
+        ap.error(f"unknown op(s): {', '.join(sorted(unknown))}")
+    engines = [e.strip() for e in args.engine.split(",") if e.strip()]
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+
+    rows = run(args.paths, engines, sizes, ops, args.min_time)
+    if not rows:
+        print("[bench] nothing to run")
+        return 2
+    result = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "engines": engines,
+            "min_time": args.min_time,
+            "json_walks": walker_stats(),
+        },
+        "results": rows,
+    }
+    Path(args.out).write_text(json.dumps(result, indent=1), encoding="utf-8")
+    print(f"[bench] {len(rows)} results written to {args.out}; peak RSS {_peak_rss_kb()}KiB")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8")).get("results", [])
+        slower = compare(rows, baseline, args.threshold)
+        for line in slower:
+            print(f"[bench] slower: {line}")
+        print(f"[bench] {len(slower)} regression(s) over {args.threshold:.0%} against {args.compare}")
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Optional
+
+# Warm Chromium instances kept for the whole run (each is ~150 MB and 1-3 s to launch)
+BROWSER_POOL_SIZE = int(os.getenv("ESTATELY_BROWSERS", "2"))
+# Leases a browser serves before it is closed and relaunched (bounds leaked memory in long runs)
+BROWSER_MAX_USES = int(os.getenv("ESTATELY_BROWSER_MAX_USES", "25"))
+# Pages open at once across all pooled browsers; further markets wait for a lease
+BROWSER_MAX_PAGES = int(os.getenv("ESTATELY_BROWSER_MAX_PAGES", "8"))
+ESTATELY_DEBUG = os.getenv("ESTATELY_DEBUG", "").lower() in {"1","true","yes"}
+
+
+class _Slot:
+    __slots__ = ("browser", "uses", "active", "retiring", "ready")
+
+    def __init__(self, browser=None):
+        self.browser = browser
+        self.uses = 0
+        self.active = 0
+        self.retiring = False
+        # Resolved once a slot reserved under the lock has its browser (launched outside the lock)
+        self.ready: Optional[asyncio.Future] = None
+
+    def alive(self) -> bool:
+        if self.browser is None:
+            # Still launching
+            return True
+        try:
+            return bool(self.browser.is_connected())
+        except Exception:
+            return False
+
+
+async def _close_browser(browser) -> None:
+    try:
+        await browser.close()
+    except Exception:
+        pass
+    finally:
+        # Stop the Playwright driver the raw-Playwright launcher stashed on the browser
+        driver = getattr(browser, "_playwright", None)
+        if driver is not None:
+            try:
+                await driver.stop()
+            except Exception:
+                pass
+
+
+class BrowserPool:
+    """
+    Process-wide pool of warm browsers shared by every market's browser path.
+
+    `page()` leases a page in a fresh browser context, so cookies and storage never
+    leak between markets, on the least busy pooled browser. Up to `size` browsers
+    are launched on demand and then reused. A browser that has served `max_uses`
+    leases is closed once its last page is released and replaced by the next
+    launch; one that crashed (disconnected) is dropped at the next lease. At most
+    `max_pages` pages are open at once.
+
+    The launcher and page factory come from the scraper (`bind`), which picks the
+    project wrapper or raw Playwright.
+    """
+
+    def __init__(
+        self,
+        size: int = BROWSER_POOL_SIZE,
+        max_uses: int = BROWSER_MAX_USES,
+        max_pages: int = BROWSER_MAX_PAGES,
+    ):
+        self._launch: Optional[Callable[[], Awaitable[Any]]] = None
+        self._new_page: Optional[Callable[[Any], Awaitable[Any]]] = None
+        self._slots: list[_Slot] = []
+        self._lock: Optional[asyncio.Lock] = None
+        self._pages: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.launched = 0
+        self.leases = 0
+        self.recycled = 0
+        self.crashed = 0
+        self.configure(size, max_uses, max_pages)
+
+    def configure(
+        self,
+        size: Optional[int] = None,
+        max_uses: Optional[int] = None,
+        max_pages: Optional[int] = None,
+    ) -> None:
+        """Resize the pool; applies to leases taken afterwards."""
+        if size is not None:
+            self.size = max(1, int(size))
+        if max_uses is not None:
+            self.max_uses = max(1, int(max_uses))
+        if max_pages is not None:
+            self.max_pages = max(1, int(max_pages))
+            self._pages = None
+
+    def bind(self, launch: Callable[[], Awaitable[Any]], new_page: Callable[[Any], Awaitable[Any]]) -> None:
+        self._launch = launch
+        self._new_page = new_page
+
+    def _primitives(self) -> tuple[asyncio.Lock, asyncio.Semaphore]:
+        # asyncio primitives belong to one loop; rebuild them if the pool outlives a loop
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._lock = None
+            self._pages = None
+            # Browsers launched on a closed loop can't be driven from this one
+            self._slots = []
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        if self._pages is None:
+            self._pages = asyncio.Semaphore(self.max_pages)
+        return self._lock, self._pages
+
+    async def _acquire(self, lock: asyncio.Lock) -> _Slot:
+        # Only bookkeeping happens under the lock; a new browser's slot is reserved there and
+        # launched after it, so a cold start launches browsers in parallel and leases on warm
+        # browsers never wait behind a launch
+        async with lock:
+            dead = [s for s in self._slots if not s.alive()]
+            for s in dead:
+                self._slots.remove(s)
+                self.crashed += 1
+                print("[estately] pooled browser disconnected; dropping it")
+            usable = [s for s in self._slots if not s.retiring]
+            idle = [s for s in usable if s.active == 0]
+            launch = False
+            if not idle and len(self._slots) < self.size:
+                slot, launch = _Slot(), True
+            elif usable:
+                slot = min(usable, key=lambda s: s.active)
+            else:
+                # Every browser is retiring with pages still open: one extra launch, reaped on release
+                slot, launch = _Slot(), True
+            if launch:
+                slot.ready = asyncio.get_running_loop().create_future()
+                self._slots.append(slot)
+            slot.active += 1
+            slot.uses += 1
+            if slot.uses >= self.max_uses:
+                slot.retiring = True
+        for s in dead:
+            await _close_browser(s.browser)
+
+        if launch:
+            try:
+                slot.browser = await self._launch()
+            except BaseException as e:
+                # No await here (this may be a cancellation); list edits between awaits are atomic
+                if slot in self._slots:
+                    self._slots.remove(slot)
+                # Leases that picked this slot meanwhile fail with the same error
+                if isinstance(e, asyncio.CancelledError):
+                    slot.ready.cancel()
+                else:
+                    slot.ready.set_exception(e)
+                    slot.ready.exception()
+                raise
+            self.launched += 1
+            slot.ready.set_result(None)
+            if ESTATELY_DEBUG:
+                print(f"[estately] launched pooled browser {len(self._slots)}/{self.size}")
+        elif slot.browser is None:
+            try:
+                await asyncio.shield(slot.ready)
+            except BaseException:
+                slot.active -= 1
+                raise
+        return slot
+
+    async def _release(self, lock: asyncio.Lock, slot: _Slot) -> None:
+        async with lock:
+            slot.active -= 1
+            if slot.active or slot not in self._slots:
+                return
+            if slot.retiring:
+                self.recycled += 1
+            elif not slot.alive():
+                self.crashed += 1
+            elif len(self._slots) <= self.size:
+                return
+            self._slots.remove(slot)
+        await _close_browser(slot.browser)
+
+    @asynccontextmanager
+    async def page(self):
+        """Lease a page in its own context; the context is closed when the block exits."""
+        if self._launch is None or self._new_page is None:
+            raise RuntimeError("browser pool has no launcher; Playwright is not available")
+        lock, pages = self._primitives()
+        async with pages:
+            slot = await self._acquire(lock)
+            self.leases += 1
+            page = None
+            try:
+                page = await self._new_page(slot.browser)
+                yield page
+            finally:
+                if page is not None:
+                    try:
+                        await page.context.close()
+                    except Exception:
+                        pass
+                await self._release(lock, slot)
+
+    async def aclose(self) -> None:
+        slots, self._slots = self._slots, []
+        for s in slots:
+            if s.browser is not None:
+                await _close_browser(s.browser)
+
+    def stats(self) -> dict:
+        return {
+            "browsers": len(self._slots),
+            "launched": self.launched,
+            "leases": self.leases,
+            "recycled": self.recycled,
+            "crashed": self.crashed,
+        }
+
+
+_pool = BrowserPool()
+
+
+def configure_browser_pool(
+    size: Optional[int] = None,
+    max_uses: Optional[int] = None,
+    max_pages: Optional[int] = None,
+) -> None:
+    """Size the shared browser pool (browsers kept warm, leases per browser, open pages)."""
+    _pool.configure(size, max_uses, max_pages)
+
+
+def get_browser_pool() -> BrowserPool:
+    return _pool
+
+
+async def close_browser_pool() -> None:
+    """Close every pooled browser; call once when the run finishes."""
+    await _pool.aclose()
@@ -0,0 +1,492 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+# Opt-in: set ESTATELY_CACHE_DIR to keep fetched pages on disk between runs.
+CACHE_DIR = os.getenv("ESTATELY_CACHE_DIR", "").strip()
+# Entries younger than this are served without touching the network; older ones are revalidated.
+CACHE_TTL = float(os.getenv("ESTATELY_CACHE_TTL", "900"))
+CACHE_MAX_MB = float(os.getenv("ESTATELY_CACHE_MAX_MB", "512"))
+
+# Market path → canonical path map; on by default, set to "off" to disable. Kept in memory,
+# and in <ESTATELY_CACHE_DIR>/canonical.json next to the response cache when that is set.
+CANONICAL_CACHE = os.getenv("ESTATELY_CANONICAL_CACHE", "").strip()
+CANONICAL_TTL = float(os.getenv("ESTATELY_CANONICAL_TTL", str(7 * 24 * 3600)))
+
+# Market bounds for the map-API mode; kept in memory, and in <ESTATELY_CACHE_DIR>/map_bounds.json when set.
+MAP_BOUNDS_TTL = float(os.getenv("ESTATELY_MAP_BOUNDS_TTL", str(30 * 24 * 3600)))
+
+# Parsed-card memo (card HTML hash → parse result); on by default, set to "off" to disable.
+# With ESTATELY_CACHE_DIR set it also spills to <dir>/cards.sqlite so the next run starts warm.
+CARD_MEMO = os.getenv("ESTATELY_CARD_MEMO", "").strip()
+CARD_MEMO_SIZE = int(os.getenv("ESTATELY_CARD_MEMO_SIZE", "20000"))
+CARD_MEMO_DISK_ROWS = int(os.getenv("ESTATELY_CARD_MEMO_DISK_ROWS", "200000"))
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    digest: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    encoding: Optional[str]
+    fetched_at: float
+    size: int
+
+
+class ResponseCache:
+    """
+    Persistent HTTP response cache for search and detail pages.
+
+    Bodies are stored content-addressed under `<root>/bodies/<sha256>` (identical
+    pages share one file); `<root>/index.sqlite` maps URL → (digest, ETag,
+    Last-Modified, fetched_at, last_access). Entries within `ttl` seconds are
+    fresh; stale ones are revalidated with If-None-Match / If-Modified-Since.
+    When the bodies exceed `max_bytes`, the least recently used URLs are evicted.
+
+    The methods are blocking (sqlite, large body files); from async code run them
+    through `call`, which queues them on the cache's own thread.
+    """
+
+    def __init__(self, root: str | Path, ttl: float = CACHE_TTL, max_bytes: int = int(CACHE_MAX_MB * 1024 * 1024)):
+        self.root = Path(root).expanduser()
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.bodies = self.root / "bodies"
+        self.bodies.mkdir(parents=True, exist_ok=True)
+        # Used only from the cache thread once `call` is in play, but opened here
+        self._db = sqlite3.connect(str(self.root / "index.sqlite"), check_same_thread=False)
+        self._io = ThreadPoolExecutor(max_workers=1, thread_name_prefix="estately-cache")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " url TEXT PRIMARY KEY, digest TEXT NOT NULL, etag TEXT, last_modified TEXT,"
+            " encoding TEXT, fetched_at REAL NOT NULL, last_access REAL NOT NULL, size INTEGER NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_lru ON entries(last_access)")
+        self._db.commit()
+        self.hits = self.revalidated = self.misses = 0
+
+    async def call(self, fn, *args):
+        """`fn(*args)` (one of this cache's methods) on the cache thread, off the event loop."""
+        return await asyncio.get_running_loop().run_in_executor(self._io, fn, *args)
+
+    # --- lookups ------------------------------------------------------------
+
+    def lookup(self, url: str) -> Optional[CacheEntry]:
+        row = self._db.execute(
+            "SELECT url, digest, etag, last_modified, encoding, fetched_at, size FROM entries WHERE url = ?",
+            (url,),
+        ).fetchone()
+        if not row:
+            return None
+        entry = CacheEntry(*row)
+        if not self._body_path(entry.digest).exists():
+            self._delete(url)
+            return None
+        return entry
+
+    def is_fresh(self, entry: CacheEntry) -> bool:
+        return (time.time() - entry.fetched_at) < self.ttl
+
+    def validators(self, entry: Optional[CacheEntry]) -> dict:
+        """Conditional request headers for revalidating `entry`."""
+        headers = {}
+        if entry is None:
+            return headers
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def read_text(self, entry: CacheEntry) -> str:
+        self._db.execute("UPDATE entries SET last_access = ? WHERE url = ?", (time.time(), entry.url))
+        self._db.commit()
+        data = self._body_path(entry.digest).read_bytes()
+        return data.decode(entry.encoding or "utf-8", errors="replace")
+
+    # --- writes -------------------------------------------------------------
+
+    def store(self, url: str, body: bytes, etag: Optional[str], last_modified: Optional[str], encoding: Optional[str]) -> None:
+        digest = hashlib.sha256(body).hexdigest()
+        path = self._body_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_suffix(".tmp")
+            tmp.write_bytes(body)
+            os.replace(tmp, path)
+        old = self._db.execute("SELECT digest FROM entries WHERE url = ?", (url,)).fetchone()
+        now = time.time()
+        self._db.execute(
+            "INSERT OR REPLACE INTO entries (url, digest, etag, last_modified, encoding, fetched_at, last_access, size)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, digest, etag, last_modified, encoding, now, now, len(body)),
+        )
+        self._db.commit()
+        if old and old[0] != digest:
+            self._drop_body_if_orphaned(old[0])
+        self._evict()
+
+    def refresh(self, entry: CacheEntry, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Mark `entry` fresh again after a 304 Not Modified."""
+        now = time.time()
+        self._db.execute(
+            "UPDATE entries SET fetched_at = ?, last_access = ?, etag = COALESCE(?, etag),"
+            " last_modified = COALESCE(?, last_modified) WHERE url = ?",
+            (now, now, etag, last_modified, entry.url),
+        )
+        self._db.commit()
+
+    def close(self) -> None:
+        try:
+            # Behind any writes still queued on the cache thread
+            self._io.submit(self._db.close).result()
+        except Exception:
+            pass
+        self._io.shutdown(wait=False)
+
+    # --- internals ----------------------------------------------------------
+
+    def _body_path(self, digest: str) -> Path:
+        return self.bodies / digest[:2] / digest
+
+    def _delete(self, url: str) -> None:
+        row = self._db.execute("SELECT digest FROM entries WHERE url = ?", (url,)).fetchone()
+        self._db.execute("DELETE FROM entries WHERE url = ?", (url,))
+        self._db.commit()
+        if row:
+            self._drop_body_if_orphaned(row[0])
+
+    def _drop_body_if_orphaned(self, digest: str) -> None:
+        still_used = self._db.execute("SELECT 1 FROM entries WHERE digest = ? LIMIT 1", (digest,)).fetchone()
+        if not still_used:
+            self._unlink_body(digest)
+
+    def _unlink_body(self, digest: str) -> None:
+        try:
+            self._body_path(digest).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _total_bytes(self) -> int:
+        # Shared bodies count once
+        row = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM (SELECT digest, MAX(size) AS size FROM entries GROUP BY digest)"
+        ).fetchone()
+        return int(row[0] or 0)
+
+    def _evict(self) -> None:
+        total = self._total_bytes()
+        if total <= self.max_bytes:
+            return
+        rows = self._db.execute("SELECT url, digest, size FROM entries ORDER BY last_access ASC").fetchall()
+        refs: dict[str, int] = {}
+        sizes: dict[str, int] = {}
+        for _url, digest, size in rows:
+            refs[digest] = refs.get(digest, 0) + 1
+            sizes[digest] = max(sizes.get(digest, 0), size)
+        # One LRU pass with a running total: a shared body's bytes come off with its last URL
+        evicted: list[tuple[str]] = []
+        orphaned: list[str] = []
+        for url, digest, _size in rows:
+            if total <= self.max_bytes:
+                break
+            evicted.append((url,))
+            refs[digest] -= 1
+            if refs[digest] == 0:
+                total -= sizes[digest]
+                orphaned.append(digest)
+        self._db.executemany("DELETE FROM entries WHERE url = ?", evicted)
+        self._db.commit()
+        for digest in orphaned:
+            self._unlink_body(digest)
+
+
+class _JsonMap:
+    """A small dict persisted as one JSON file (rewritten atomically on change); `path=None` keeps it in memory."""
+
+    def __init__(self, path: str | Path | None):
+        self.path = Path(path).expanduser() if path else None
+        self._data: dict[str, dict] = {}
+        if self.path is None:
+            return
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                loaded = json.load(f)
+            if isinstance(loaded, dict):
+                self._data = loaded
+        except FileNotFoundError:
+            pass
+        except Exception:
+            # Corrupt file: start over rather than fail the run
+            self._data = {}
+
+    def _save(self) -> None:
+        if self.path is None:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._data, f, indent=1, sort_keys=True)
+            os.replace(tmp, self.path)
+        except Exception:
+            pass
+
+
+class CanonicalCache(_JsonMap):
+    """
+    Durable map from a query-less search URL (e.g. https://www.estately.com/az/phoenix)
+    to the canonical URL Estately redirects it to, stored as a small JSON file.
+    Entries expire after `ttl` seconds and are dropped when the canonical page
+    404s or starts redirecting somewhere else.
+    """
+
+    def __init__(self, path: str | Path | None, ttl: float = CANONICAL_TTL):
+        super().__init__(path)
+        self.ttl = ttl
+        self.hits = self.misses = 0
+
+    def get(self, base_url: str) -> Optional[str]:
+        item = self._data.get(base_url)
+        if not item or (time.time() - float(item.get("resolved_at") or 0)) >= self.ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return item.get("canonical")
+
+    def put(self, base_url: str, canonical: str) -> None:
+        item = self._data.get(base_url)
+        if item and item.get("canonical") == canonical and (time.time() - float(item.get("resolved_at") or 0)) < self.ttl:
+            return
+        self._data[base_url] = {"canonical": canonical, "resolved_at": time.time()}
+        self._save()
+
+    def invalidate(self, base_url: str) -> None:
+        if self._data.pop(base_url, None) is not None:
+            self._save()
+
+
+class MarketBoundsCache(_JsonMap):
+    """
+    Market search URL → (north, south, east, west) for the map-API mode, so the
+    search page is fetched for its bounds once per market rather than every run.
+    """
+
+    def __init__(self, path: str | Path | None, ttl: float = MAP_BOUNDS_TTL):
+        super().__init__(path)
+        self.ttl = ttl
+
+    def get(self, base_url: str) -> Optional[tuple[float, float, float, float]]:
+        item = self._data.get(base_url)
+        if not item or (time.time() - float(item.get("found_at") or 0)) >= self.ttl:
+            return None
+        bounds = item.get("bounds")
+        if not isinstance(bounds, list) or len(bounds) != 4:
+            return None
+        return tuple(float(v) for v in bounds)
+
+    def put(self, base_url: str, bounds: tuple[float, float, float, float]) -> None:
+        self._data[base_url] = {"bounds": [float(v) for v in bounds], "found_at": time.time()}
+        self._save()
+
+
+class CardMemo:
+    """
+    Bounded LRU of parsed listing cards keyed by a hash of the card's outer HTML
+    (plus a salt naming the engine and parser version), so an unchanged listing
+    is parsed once per run, or once across runs with the on-disk spill. Values
+    are JSON-able (dict, text) pairs; `get` hands out copies because callers
+    mutate the dicts they receive.
+
+    The optional SQLite spill is shared by every parse worker process. Writes are
+    committed in batches (and by `flush`, which parse workers call after each
+    task so no worker holds the write lock); rows beyond `max_disk_rows` are
+    evicted least recently used first.
+    """
+
+    _COMMIT_EVERY = 200
+
+    def __init__(self, max_items: int = CARD_MEMO_SIZE, path: str | Path | None = None,
+                 max_disk_rows: int = CARD_MEMO_DISK_ROWS):
+        self.max_items = max(1, max_items)
+        self.max_disk_rows = max_disk_rows
+        self._items: OrderedDict[bytes, tuple[dict, str]] = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        self._pending = 0
+        # Thread parse mode shares one memo between workers
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+        self._taken = (0, 0)
+        if path:
+            try:
+                path = Path(path).expanduser()
+                path.parent.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(str(path), timeout=10, check_same_thread=False)
+                self._db.execute("PRAGMA journal_mode=WAL")
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS cards (key BLOB PRIMARY KEY, value TEXT NOT NULL, used_at REAL NOT NULL)"
+                )
+                self._db.execute("CREATE INDEX IF NOT EXISTS cards_lru ON cards(used_at)")
+                self._db.commit()
+            except Exception:
+                # Unwritable or locked store: keep the in-memory memo only
+                self._db = None
+
+    @staticmethod
+    def key(salt: str, html: str) -> bytes:
+        h = hashlib.blake2b(salt.encode(), digest_size=16)
+        h.update(b"\0")
+        h.update(html.encode("utf-8", "surrogatepass"))
+        return h.digest()
+
+    def get(self, key: bytes) -> Optional[tuple[dict, str]]:
+        with self._lock:
+            hit = self._items.get(key)
+            if hit is not None:
+                self._items.move_to_end(key)
+            elif self._db is not None:
+                hit = self._disk_get(key)
+                if hit is not None:
+                    self._remember(key, hit)
+            if hit is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return dict(hit[0]), hit[1]
+
+    def put(self, key: bytes, value: tuple[dict, str]) -> None:
+        data, text = value
+        stored = (dict(data), text)
+        with self._lock:
+            self._remember(key, stored)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO cards (key, value, used_at) VALUES (?, ?, ?)",
+                        (key, json.dumps(stored), time.time()),
+                    )
+                    self._pending += 1
+                    if self._pending >= self._COMMIT_EVERY:
+                        self._flush()
+                except Exception:
+                    pass
+
+    def flush(self) -> None:
+        """Commit pending disk writes now."""
+        with self._lock:
+            if self._db is not None and self._pending:
+                try:
+                    self._flush()
+                except Exception:
+                    pass
+
+    def take_counts(self) -> tuple[int, int]:
+        """(hits, misses) since the previous call; how parse workers report back to the main process."""
+        hits, misses = self.hits - self._taken[0], self.misses - self._taken[1]
+        self._taken = (self.hits, self.misses)
+        return hits, misses
+
+    def add_counts(self, counts: tuple[int, int]) -> None:
+        self.hits += counts[0]
+        self.misses += counts[1]
+        # Counts reported by workers are not ours to hand out again
+        self._taken = (self._taken[0] + counts[0], self._taken[1] + counts[1])
+
+    def close(self) -> None:
+        self.flush()
+        if self._db is not None:
+            try:
+                self._db.close()
+            except Exception:
+                pass
+            self._db = None
+
+    # --- internals ----------------------------------------------------------
+
+    def _remember(self, key: bytes, value: tuple[dict, str]) -> None:
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_items:
+            self._items.popitem(last=False)
+
+    def _disk_get(self, key: bytes) -> Optional[tuple[dict, str]]:
+        try:
+            row = self._db.execute("SELECT value FROM cards WHERE key = ?", (key,)).fetchone()
+            if not row:
+                return None
+            self._db.execute("UPDATE cards SET used_at = ? WHERE key = ?", (time.time(), key))
+            self._pending += 1
+            data, text = json.loads(row[0])
+            return data, text
+        except Exception:
+            return None
+
+    def _flush(self) -> None:
+        self._db.commit()
+        self._pending = 0
+        (rows,) = self._db.execute("SELECT COUNT(*) FROM cards").fetchone()
+        if rows > self.max_disk_rows:
+            self._db.execute(
+                "DELETE FROM cards WHERE key IN (SELECT key FROM cards ORDER BY used_at ASC LIMIT ?)",
+                (rows - self.max_disk_rows,),
+            )
+            self._db.commit()
+
+
+_cache: Optional[ResponseCache] = None
+_canonical_cache: Optional[CanonicalCache] = None
+_bounds_cache: Optional[MarketBoundsCache] = None
+_card_memo: Optional[CardMemo] = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide response cache, or None when ESTATELY_CACHE_DIR is unset."""
+    global _cache
+    if _cache is None and CACHE_DIR:
+        _cache = ResponseCache(CACHE_DIR)
+    return _cache
+
+
+def get_canonical_cache() -> Optional[CanonicalCache]:
+    """
+    Return the process-wide canonical-URL cache, or None when ESTATELY_CANONICAL_CACHE=off.
+    Persisted to `<ESTATELY_CACHE_DIR>/canonical.json` only when the response cache
+    is on; otherwise it lasts for the run.
+    """
+    global _canonical_cache
+    if _canonical_cache is None:
+        if CANONICAL_CACHE.lower() in {"0", "off", "false", "no"}:
+            return None
+        _canonical_cache = CanonicalCache((Path(CACHE_DIR) / "canonical.json") if CACHE_DIR else None)
+    return _canonical_cache
+
+
+def get_bounds_cache() -> MarketBoundsCache:
+    """Return the process-wide market-bounds cache (persisted only when ESTATELY_CACHE_DIR is set)."""
+    global _bounds_cache
+    if _bounds_cache is None:
+        _bounds_cache = MarketBoundsCache((Path(CACHE_DIR) / "map_bounds.json") if CACHE_DIR else None)
+    return _bounds_cache
+
+
+def get_card_memo() -> Optional[CardMemo]:
+    """
+    Return the process-wide parsed-card memo, or None when ESTATELY_CARD_MEMO=off.
+    In memory only, unless ESTATELY_CACHE_DIR is set (then also `<dir>/cards.sqlite`).
+    """
+    global _card_memo
+    if _card_memo is None:
+        if CARD_MEMO.lower() in {"0", "off", "false", "no"}:
+            return None
+        _card_memo = CardMemo(path=(Path(CACHE_DIR) / "cards.sqlite") if CACHE_DIR else None)
+    return _card_memo
@@ -0,0 +1,300 @@
+"""
+Listing harvest that needs no network or scraper state: JSON payloads and inline
+script state walked for listings, and whole search-result pages parsed into card
+dicts. Everything here takes and returns plain str/dict/list values, so the parse
+executor (parse_pool.py) can run it in worker processes; scraper.py re-exports
+the helpers it used to define.
+"""
+import html as html_lib
+import json
+import os
+import re
+from urllib.parse import urlparse
+
+from backend.estately.analysis import status_hits
+from backend.estately.inline_state import iter_inline_json, script_blocks
+from backend.estately.json_walker import ListingWalker
+from backend.estately.parsing import NEXT_LINK_SELECTOR, get_engine, parse_resolved, resolve_cards
+
+ESTATELY_DEBUG = os.getenv("ESTATELY_DEBUG", "").lower() in {"1","true","yes"}
+
+
+def _coerce_float(x):
+    if x is None:
+        return None
+    if isinstance(x, (int, float)):
+        return float(x)
+    s = str(x)
+    s = re.sub(r"[^0-9.]", "", s)
+    try:
+        return float(s) if s else None
+    except Exception:
+        return None
+
+
+def _looks_active_for_sale(d: dict) -> bool:
+    """
+    Best-effort read of status-ish fields.
+    """
+    status_fields = [
+        "status", "listingStatus", "sale_status", "marketStatus", "availability",
+        "listing_status", "mlsStatus", "property_status", "propStatus"
+    ]
+    val = None
+    for f in status_fields:
+        v = d.get(f)
+        if v:
+            val = str(v).strip().lower()
+            break
+    if not val:
+        # If no status at all, assume active (many feed fragments omit it)
+        return True
+    hits = status_hits(val)
+    if "inactive" in hits:
+        return False
+    if "active" in hits:
+        return True
+    # Unknown token → keep (erring on active)
+    return True
+
+def _addr_from_any(d: dict) -> dict | None:
+    """
+    Normalize address from a variety of common shapes used by real estate feeds.
+    """
+    if not isinstance(d, dict):
+        return None
+    # nested address node?
+    cand = d.get("address") or d.get("location") or d.get("propertyAddress") or d.get("address_obj")
+    if isinstance(cand, dict):
+        d2 = cand
+    else:
+        d2 = d
+
+    address = (
+        d2.get("address") or d2.get("streetAddress") or d2.get("street_address") or
+        d2.get("line1") or d2.get("addressLine1") or d2.get("address1")
+    )
+    city = d2.get("city") or d2.get("addressCity")
+    state = d2.get("state") or d2.get("addressState") or d2.get("stateCode")
+    zipc = d2.get("zip") or d2.get("zipcode") or d2.get("postalCode") or d2.get("zip_code")
+
+    if address or (city and state):
+        return {"address": address, "city": city, "state": state, "zip": zipc}
+    return None
+
+
+def _price_from_any(d: dict):
+    # Handles cents and dollar fields
+    raw = (
+        d.get("listPrice") or d.get("price") or d.get("displayPrice") or
+        d.get("list_price") or d.get("listPriceCents") or d.get("priceCents") or
+        d.get("list_price_cents") or d.get("price_cents")
+    )
+    if raw is None:
+        return None
+    cents_keys = {"listPriceCents", "priceCents", "list_price_cents", "price_cents"}
+    for k in cents_keys:
+        if k in d and d[k] == raw:
+            return float(raw) / 100.0
+    return _coerce_float(raw)
+
+
+def _href_from_any(d: dict):
+    return (
+        d.get("url") or d.get("detailUrl") or d.get("permalink") or
+        d.get("canonicalUrl") or d.get("seoUrl") or d.get("listingUrl")
+    )
+
+
+def _looks_like_listing(d: dict) -> bool:
+    return _addr_from_any(d) is not None and _price_from_any(d) is not None
+
+
+# Learns where listings sit in each payload shape and walks only those paths next time
+_json_walker = ListingWalker(_looks_like_listing)
+
+
+def walker_stats() -> dict:
+    """Guided/full walk counts and learned shapes of the JSON listing walker (parse workers included)."""
+    return _json_walker.stats()
+
+
+def take_walker_counts() -> tuple[int, int, tuple[str, ...]]:
+    """This process's walker counts since the previous call (see `ListingWalker.take_counts`)."""
+    return _json_walker.take_counts()
+
+
+def add_walker_counts(counts: tuple[int, int, tuple[str, ...]]) -> None:
+    """Merge a parse worker's `take_walker_counts()` into this process's walker stats."""
+    _json_walker.add_counts(counts)
+
+
+def _json_hint(url: str) -> str:
+    # Same endpoint -> same payload shape; query strings (page, bounds) don't change it
+    try:
+        p = urlparse(url)
+        return f"{p.netloc}{p.path}"
+    except Exception:
+        return ""
+
+
+def _extract_listings_from_json_blob(text: str, hint: str = "") -> list[dict]:
+    """
+    Decode a JSON response body and walk it for listings (see `_extract_listings_from_json_obj`).
+    HTML answers are rejected and anti-JSON shields stripped first. `hint` (e.g. the
+    response URL) keys the walker's learned paths.
+    """
+    try:
+        # Some endpoints may return HTML or anti-JSON shields; reject obvious HTML and strip shields.
+        low = text.lower()
+        if "<html" in low or "<!doctype" in low:
+            return []
+        t = text.strip()
+        for prefix in ("for(;;);", ")]}'", ")]}',", "while(1);"):
+            if t.startswith(prefix):
+                t = t[len(prefix):].lstrip()
+        first_brace = min([i for i in [t.find("{"), t.find("[")] if i != -1] or [-1])
+        if first_brace > 0:
+            t = t[first_brace:]
+        data = json.loads(t)
+    except Exception:
+        if ESTATELY_DEBUG:
+            print("[estately] Could not parse JSON blob")
+        return []
+    return _extract_listings_from_json_obj(data, hint)
+
+
+def _extract_listings_from_json_obj(data, hint: str = "") -> list[dict]:
+    """
+    Walk an already-decoded JSON tree, pull out objects that look like Estately-style listings.
+    Expanded to handle a wide variety of real-estate JSON structures.
+    Candidates come from the pruned, path-learning walker (json_walker.ListingWalker).
+    Prints debug info if ESTATELY_DEBUG is set.
+    """
+    out = []
+    seen_keys = set()
+    for node in _json_walker.find(data, hint):
+        addr = _addr_from_any(node)
+        price = _price_from_any(node)
+        if not addr or price is None:
+            continue
+        if not _looks_active_for_sale(node):
+            continue
+        beds = (
+            node.get("beds") or node.get("bedrooms") or node.get("num_bedrooms") or
+            node.get("bedCount")
+        )
+        baths = (
+            node.get("baths") or node.get("bathrooms") or node.get("fullBaths") or
+            node.get("bathCount")
+        )
+        sqft = (
+            node.get("sqft") or node.get("livingArea") or node.get("squareFeet") or
+            node.get("square_feet") or node.get("living_area")
+        )
+        href = _href_from_any(node)
+        key = (
+            (addr.get("address") or "").strip().lower(),
+            _coerce_float(price) or 0.0,
+            (addr.get("zip") or addr.get("zipcode") or addr.get("zip_code") or "")
+        )
+        if key in seen_keys:
+            continue
+        seen_keys.add(key)
+        listing = {
+            "address": (addr.get("address") or "").strip(),
+            "city": None if addr.get("city") is None else str(addr.get("city")),
+            "state": None if addr.get("state") is None else str(addr.get("state")),
+            "zip": None if addr.get("zip") is None else str(addr.get("zip")),
+            "price": _coerce_float(price),
+            "beds": _coerce_float(beds),
+            "baths": _coerce_float(baths),
+            "sqft": int(_coerce_float(sqft) or 0) if _coerce_float(sqft) is not None else None,
+            "href": None if href is None else str(href),
+        }
+        if ESTATELY_DEBUG:
+            print(f"[estately] harvested listing: {listing}")
+        out.append(listing)
+    return out
+
+
+def _mine_inline_scripts(html: str) -> list[dict]:
+    """Harvest listings from the inline <script> state of a full HTML page."""
+    return _mine_inline_script_texts(script_blocks(html))
+
+
+def _mine_inline_script_texts(scripts: list[tuple[str, str]]) -> list[dict]:
+    """Harvest listings from (script type, script text) pairs, e.g. collected by the stream parser."""
+    out = []
+    for typ, txt in scripts:
+        # JSON islands and window.__STATE__ = {...} assignments, decoded in place by the C scanner
+        for data in iter_inline_json(typ, txt):
+            try:
+                out.extend(_extract_listings_from_json_obj(data, f"inline:{typ}"))
+            except Exception:
+                pass
+    return out
+
+
+def harvest_cards(html: str, engine_name: str | None = None) -> tuple[list[tuple[dict, str]], str | None]:
+    """Every resolved listing card of a page as (dict, card text), plus the raw next-page href."""
+    engine = get_engine(engine_name)
+    root = engine.document(html)
+    cards = []
+    for candidates in resolve_cards(root, engine):
+        hit = parse_resolved(candidates, engine)
+        if hit is not None:
+            cards.append(hit)
+    next_a = engine.select_one(root, NEXT_LINK_SELECTOR)
+    next_href = (next_a.get("href") or None) if next_a is not None else None
+    return cards, next_href
+
+
+def harvest_fragments(htmls: list[str], engine_name: str | None = None) -> list[tuple[dict, str]]:
+    """Cards cut out of a page by the stream parser (outer HTML each) as (dict, card text); cards that raise are skipped."""
+    engine = get_engine(engine_name)
+    cards = []
+    for html in htmls:
+        try:
+            cards.append(engine.parse_with_text(engine.fragment(html)))
+        except Exception:
+            continue
+    return cards
+
+
+# The attribute that makes an <a> the next-page link (NEXT_LINK_SELECTOR), and an href inside one tag
+_NEXT_MARK = re.compile(r"""\brel\s*=\s*["']?next\b|\baria-label\s*=\s*["']Next["']""")
+_HREF_ATTR = re.compile(r"""\bhref\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))""", re.I)
+
+
+def peek_next_href(html: str) -> str | None:
+    """
+    The next-page href found by scanning the raw markup, without building a tree:
+    cheap enough to run before the page is parsed so the next fetch can start
+    right away. A hint only; `harvest_cards` still reports the parsed link.
+    """
+    for m in _NEXT_MARK.finditer(html):
+        start = html.rfind("<", 0, m.start())
+        end = html.find(">", m.end())
+        if start == -1 or end == -1 or not re.match(r"<a\b", html[start:start + 3], re.I):
+            continue
+        h = _HREF_ATTR.search(html, start, end)
+        if h:
+            return html_lib.unescape(next(g for g in h.groups() if g is not None)) or None
+    return None
+
+
+def harvest_page(html: str, engine_name: str | None = None) -> tuple[list[dict], list[tuple[dict, str]], str | None]:
+    """
+    All the CPU work for one search-results page: listings from inline script
+    state, then the DOM cards and next-page href (see `harvest_cards`). A page
+    whose DOM can't be parsed still returns its inline listings.
+    """
+    inline = _mine_inline_scripts(html)
+    try:
+        cards, next_href = harvest_cards(html, engine_name)
+    except Exception as dom_err:
+        if ESTATELY_DEBUG:
+            print(f"[estately] HTTP DOM parse failed: {dom_err}")
+        cards, next_href = [], None
+    return inline, cards, next_href
@@ -0,0 +1,80 @@
+import json
+import re
+from typing import Any, Iterator, Optional
+
+from backend.estately.parsing import get_engine
+
+# Inline <script> payloads worth decoding: JSON islands (__NEXT_DATA__, JSON-LD) and
+# plain scripts that assign server state to a global.
+JSON_SCRIPT_TYPES = {"application/json", "application/ld+json"}
+JS_SCRIPT_TYPES = {"", "text/javascript", "application/javascript", "module"}
+
+# window.__INITIAL_STATE__ = {...}; self.__APOLLO_STATE__={...}; window["__data"] = [...]; var __PRELOADED__ = {...}
+_ASSIGNMENT = re.compile(
+    r"""(?:
+          \b(?:window|self|globalThis)\s*(?:\.\s*[A-Za-z_$][\w$]*|\[\s*['"][^'"]+['"]\s*\])
+        | \b(?:var|let|const)\s+[A-Za-z_$][\w$]*
+        )\s*=\s*(?=[\[{])""",
+    re.X,
+)
+_NON_WS = re.compile(r"\S")
+
+_decoder = json.JSONDecoder()
+
+
+def decode_at(text: str, idx: int) -> Optional[tuple[Any, int]]:
+    """
+    Decode the JSON value starting at `idx` with the C scanner (`raw_decode`) and
+    return (value, end offset). Whatever follows the value (`;`, more JS, `</script>`
+    leftovers) is ignored, and braces inside strings are handled by the real parser.
+    """
+    try:
+        return _decoder.raw_decode(text, idx)
+    except (ValueError, IndexError):
+        return None
+
+
+def iter_inline_json(script_type: str, text: str) -> Iterator[Any]:
+    """
+    Yield every decoded JSON value in one inline script:
+    - JSON script types: the whole body (falling back to its first `{`/`[`).
+    - JS scripts: the value of each `window.X = ...`-style assignment; untyped scripts
+      without one fall back to their first `{`, as the old brace matcher did.
+    """
+    if not text:
+        return
+    typ = (script_type or "").lower()
+    if typ in JSON_SCRIPT_TYPES:
+        m = _NON_WS.search(text)
+        hit = decode_at(text, m.start()) if m else None
+        if hit is None:
+            starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+            hit = decode_at(text, min(starts)) if starts else None
+        if hit is not None:
+            yield hit[0]
+        return
+    if typ not in JS_SCRIPT_TYPES or ("{" not in text and "[" not in text):
+        return
+    found = False
+    resume = 0
+    for m in _ASSIGNMENT.finditer(text):
+        if m.start() < resume:
+            # An "x = {" inside a value we already decoded
+            continue
+        hit = decode_at(text, m.end())
+        if hit is None:
+            continue
+        found = True
+        resume = hit[1]
+        yield hit[0]
+    if not found and not typ:
+        start = text.find("{")
+        hit = decode_at(text, start) if start != -1 else None
+        if hit is not None:
+            yield hit[0]
+
+
+def script_blocks(html: str) -> list[tuple[str, str]]:
+    """(lowercased type attribute, text) for every <script> in a page, via the lxml tree."""
+    root = get_engine("lxml").document(html)
+    return [((s.get("type") or "").lower(), s.text or "") for s in root.iter("script")]
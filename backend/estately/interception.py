@@ -0,0 +1,158 @@
+import asyncio
+import os
+from typing import Optional
+from urllib.parse import urlsplit
+
+# "on" aborts what the rules below match, "report" lets everything load but counts what
+# would have been blocked (and its bytes), "off" installs nothing.
+BLOCK_MODE = os.getenv("ESTATELY_BLOCK_RESOURCES", "on").strip().lower() or "on"
+BLOCK_MODES = ("on", "report", "off")
+# Playwright resource types never needed to read listings (photos, map tiles, fonts, CSS)
+BLOCK_TYPES = frozenset(
+    t.strip().lower()
+    for t in os.getenv("ESTATELY_BLOCK_TYPES", "image,media,font,stylesheet").split(",")
+    if t.strip()
+)
+# Same assets fetched by script (vector map tiles, lazy-loaded photos) show up as xhr/fetch
+BLOCK_EXTENSIONS = (
+    ".pbf", ".mvt", ".jpg", ".jpeg", ".png", ".webp", ".avif", ".gif", ".svg",
+    ".woff", ".woff2", ".ttf", ".otf", ".css", ".mp4", ".webm",
+)
+# Hosts (and their subdomains) the SPA may load anything from besides the blocked types
+ALLOW_DOMAINS = tuple(
+    d.strip().lower().lstrip(".")
+    for d in os.getenv("ESTATELY_ALLOW_DOMAINS", "estately.com,cloudfront.net,jsdelivr.net,unpkg.com").split(",")
+    if d.strip()
+)
+# Analytics/ads/session-replay hosts; blocked even when a data hint matches their URLs
+TRACKER_DOMAINS = tuple(
+    d.strip().lower().lstrip(".")
+    for d in os.getenv(
+        "ESTATELY_TRACKER_DOMAINS",
+        "google-analytics.com,googletagmanager.com,doubleclick.net,googlesyndication.com,googleadservices.com,"
+        "facebook.net,facebook.com,connect.facebook.net,hotjar.com,segment.io,segment.com,newrelic.com,"
+        "nr-data.net,optimizely.com,bing.com,clarity.ms,quantserve.com,scorecardresearch.com,criteo.com,"
+        "adsrvr.org,taboola.com,outbrain.com,fullstory.com,mixpanel.com,amplitude.com,sentry.io",
+    ).split(",")
+    if d.strip()
+)
+# Opt-in: also abort every other third-party request (scripts, XHR). Off by default because map
+# tiles, geocoders and CDN bundles the SPA needs would fail silently; trackers are blocked either way.
+BLOCK_THIRD_PARTY = os.getenv("ESTATELY_BLOCK_THIRD_PARTY", "").lower() in {"1", "true", "yes"}
+
+# URL fragments of the data endpoints the browser path captures (`_capture_json_responses`);
+# XHR/fetch calls to them always go through, even from another host.
+DATA_URL_HINTS = (
+    "search", "listing", "listings", "results", "graphql", "homes", "api", "inventory", "properties",
+)
+_DATA_TYPES = frozenset({"xhr", "fetch", "document"})
+
+
+def _host_in(host: str, domains: tuple) -> bool:
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+def is_data_url(url: str) -> bool:
+    return any(k in (url or "") for k in DATA_URL_HINTS)
+
+
+class RequestFilter:
+    """
+    Decides which of a Playwright page's requests to abort and keeps run-wide
+    counts. Rules, first match wins: a blocked resource type or asset file
+    extension, a tracker host, an allowlisted host (allowed), an XHR/fetch to a
+    data endpoint (allowed), any other third-party host (allowed unless
+    BLOCK_THIRD_PARTY is turned on).
+
+    Allowed bytes are measured when each request finishes. Blocked requests never
+    download, so their bytes are only known in "report" mode.
+    """
+
+    def __init__(self, mode: str = BLOCK_MODE):
+        if mode not in BLOCK_MODES:
+            raise ValueError(f"unknown block mode: {mode!r} (expected one of {', '.join(BLOCK_MODES)})")
+        self.mode = mode
+        self.allowed = 0
+        self.allowed_bytes = 0
+        self.blocked = 0
+        self.blocked_bytes = 0
+        self.blocked_by: dict[str, int] = {}
+
+    def decide(self, url: str, resource_type: str) -> Optional[str]:
+        """Why the request should be blocked ("image", "asset", "tracker", "third-party"), or None to let it load."""
+        rtype = (resource_type or "").lower()
+        if rtype in BLOCK_TYPES:
+            return rtype
+        parts = urlsplit(url)
+        if parts.path.lower().endswith(BLOCK_EXTENSIONS):
+            return "asset"
+        host = (parts.hostname or "").lower()
+        if not host:
+            # data:, blob: and friends never hit the network
+            return None
+        if _host_in(host, TRACKER_DOMAINS):
+            return "tracker"
+        if _host_in(host, ALLOW_DOMAINS):
+            return None
+        if rtype in _DATA_TYPES and is_data_url(url):
+            return None
+        return "third-party" if BLOCK_THIRD_PARTY else None
+
+    async def install(self, page) -> None:
+        """Route every request of `page` through `decide` and count bytes as requests finish."""
+        if self.mode == "off":
+            return
+        # request -> reason it matched; only kept in report mode, to credit its bytes as blockable
+        would_block: dict = {}
+
+        async def _route(route, request):
+            reason = self.decide(request.url, request.resource_type)
+            if reason is None:
+                await route.continue_()
+                return
+            self.blocked += 1
+            self.blocked_by[reason] = self.blocked_by.get(reason, 0) + 1
+            if self.mode == "report":
+                would_block[request] = reason
+                await route.continue_()
+            else:
+                await route.abort("blockedbyclient")
+
+        async def _finished(request):
+            try:
+                sizes = await request.sizes()
+                size = int(sizes.get("responseBodySize", 0)) + int(sizes.get("responseHeadersSize", 0))
+            except Exception:
+                size = 0
+            if would_block.pop(request, None):
+                self.blocked_bytes += max(0, size)
+            else:
+                self.allowed += 1
+                self.allowed_bytes += max(0, size)
+
+        await page.route("**/*", _route)
+        page.on("requestfinished", lambda r: asyncio.create_task(_finished(r)))
+        page.on("requestfailed", lambda r: would_block.pop(r, None))
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "allowed": self.allowed,
+            "allowed_bytes": self.allowed_bytes,
+            "blocked": self.blocked,
+            "blocked_bytes": self.blocked_bytes,
+            "blocked_by": dict(self.blocked_by),
+        }
+
+
+_filter = RequestFilter()
+
+
+def configure_request_filter(mode: str) -> None:
+    """Switch blocking on/off or to report-only for pages opened afterwards."""
+    global _filter
+    _filter = RequestFilter(mode)
+
+
+def get_request_filter() -> RequestFilter:
+    return _filter
@@ -0,0 +1,157 @@
+import os
+import re
+from typing import Any, Callable, Iterable
+
+# Subtrees that never hold listings (translations, tracking, feature flags...); skipped by the generic walk.
+DEFAULT_PRUNE_KEYS = (
+    "i18n", "intl", "translations", "messages", "locales",
+    "analytics", "tracking", "gtm", "datalayer", "experiments", "featureflags", "feature_flags", "abtests",
+    "seo",
+)
+JSON_PRUNE_KEYS = tuple(
+    k.strip().lower()
+    for k in os.getenv("ESTATELY_JSON_PRUNE_KEYS", ",".join(DEFAULT_PRUNE_KEYS)).split(",")
+    if k.strip()
+)
+# Every Nth blob of a known shape is walked in full anyway, so newly added sections get learned
+JSON_REWALK_EVERY = int(os.getenv("ESTATELY_JSON_REWALK_EVERY", "25"))
+# Learned paths kept per shape, and shapes remembered
+JSON_MAX_PATHS = int(os.getenv("ESTATELY_JSON_MAX_PATHS", "16"))
+JSON_MAX_SHAPES = int(os.getenv("ESTATELY_JSON_MAX_SHAPES", "256"))
+
+LIST_STEP = "*"  # any list item
+ID_STEP = "#"    # any id-like dict key ({"12345": {...}, "67890": {...}})
+
+_ID_KEY = re.compile(r"^(?:\d+|[0-9a-f]{8,}|[0-9a-f-]{32,36})$", re.I)
+
+
+def _step(key: str) -> str:
+    return ID_STEP if _ID_KEY.match(key) else key
+
+
+class ListingWalker:
+    """
+    Finds listing-like dicts in decoded JSON.
+
+    The first blob of a given shape (source hint + top-level keys) gets a full,
+    iterative pre-order walk that skips pruned subtrees; the paths at which
+    `probe` matched are remembered as signatures like
+    ("search", "results", "listings", "*"). Later blobs of that shape follow only
+    those paths. If that finds nothing (or every JSON_REWALK_EVERY-th time) the
+    generic walk runs again and the signatures are extended.
+    """
+
+    def __init__(
+        self,
+        probe: Callable[[dict], bool],
+        prune_keys: Iterable[str] = JSON_PRUNE_KEYS,
+        rewalk_every: int = JSON_REWALK_EVERY,
+    ):
+        self.probe = probe
+        self.prune_keys = frozenset(k.lower() for k in prune_keys)
+        self.rewalk_every = max(1, rewalk_every)
+        self._paths: dict[str, list[tuple]] = {}
+        self._uses: dict[str, int] = {}
+        self.guided = 0
+        self.generic = 0
+        self._taken = (0, 0)
+        self._reported: set[str] = set()
+        # shapes learned by parse workers (process mode), reported through add_counts
+        self._remote_shapes: set[str] = set()
+
+    @staticmethod
+    def shape(data: Any, hint: str = "") -> str:
+        if isinstance(data, list):
+            first = next((x for x in data if isinstance(x, dict)), None)
+            keys = sorted(first)[:32] if first else []
+            return f"{hint}|[{','.join(keys)}]"
+        if isinstance(data, dict):
+            return f"{hint}|{{{','.join(sorted(_step(k) for k in data)[:32])}}}"
+        return f"{hint}|{type(data).__name__}"
+
+    def find(self, data: Any, hint: str = "") -> list[dict]:
+        """Listing-like dicts in `data` (document order for a full walk, per learned path otherwise)."""
+        if not isinstance(data, (dict, list)):
+            return []
+        shape = self.shape(data, hint)
+        uses = self._uses[shape] = self._uses.get(shape, 0) + 1
+        paths = self._paths.get(shape)
+        if paths and uses % self.rewalk_every:
+            found = self._follow(data, paths)
+            if found:
+                self.guided += 1
+                return found
+        found, signatures = self._walk(data)
+        self.generic += 1
+        if signatures and (shape in self._paths or len(self._paths) < JSON_MAX_SHAPES):
+            known = self._paths.setdefault(shape, [])
+            for sig in signatures:
+                if sig not in known and len(known) < JSON_MAX_PATHS:
+                    known.append(sig)
+        return found
+
+    def _walk(self, data: Any) -> tuple[list[dict], list[tuple]]:
+        found: list[dict] = []
+        signatures: dict[tuple, None] = {}
+        prune = self.prune_keys
+        probe = self.probe
+        stack: list[tuple[Any, tuple]] = [(data, ())]
+        while stack:
+            node, path = stack.pop()
+            if isinstance(node, dict):
+                if probe(node):
+                    found.append(node)
+                    signatures[path] = None
+                children = [
+                    (v, path + (_step(k),))
+                    for k, v in node.items()
+                    if isinstance(v, (dict, list)) and k.lower() not in prune
+                ]
+                children.reverse()
+                stack.extend(children)
+            else:
+                path_item = path + (LIST_STEP,)
+                stack.extend((v, path_item) for v in reversed(node) if isinstance(v, (dict, list)))
+        return found, list(signatures)
+
+    def _follow(self, data: Any, paths: list[tuple]) -> list[dict]:
+        found: list[dict] = []
+        seen: set[int] = set()
+        for sig in paths:
+            nodes = [data]
+            for step in sig:
+                nxt = []
+                for n in nodes:
+                    if step == LIST_STEP:
+                        if isinstance(n, list):
+                            nxt.extend(n)
+                    elif isinstance(n, dict):
+                        if step == ID_STEP:
+                            nxt.extend(v for k, v in n.items() if _ID_KEY.match(k))
+                        elif step in n:
+                            nxt.append(n[step])
+                nodes = nxt
+                if not nodes:
+                    break
+            for n in nodes:
+                if isinstance(n, dict) and id(n) not in seen and self.probe(n):
+                    seen.add(id(n))
+                    found.append(n)
+        return found
+
+    def take_counts(self) -> tuple[int, int, tuple[str, ...]]:
+        """(guided, generic, newly learned shapes) since the previous call; how parse workers report back."""
+        guided, generic = self.guided - self._taken[0], self.generic - self._taken[1]
+        self._taken = (self.guided, self.generic)
+        shapes = tuple(s for s in self._paths if s not in self._reported)
+        self._reported.update(shapes)
+        return guided, generic, shapes
+
+    def add_counts(self, counts: tuple[int, int, tuple[str, ...]]) -> None:
+        self.guided += counts[0]
+        self.generic += counts[1]
+        self._remote_shapes.update(counts[2])
+        self._taken = (self._taken[0] + counts[0], self._taken[1] + counts[1])
+
+    def stats(self) -> dict:
+        return {"guided": self.guided, "generic": self.generic, "shapes": len(self._remote_shapes.union(self._paths))}
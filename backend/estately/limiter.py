@@ -0,0 +1,219 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+from urllib.parse import urlsplit
+
+# Starting point / bounds for the per-host concurrency window
+LIMIT_INITIAL_WINDOW = float(os.getenv("ESTATELY_LIMIT_INITIAL_WINDOW", "4"))
+LIMIT_MIN_WINDOW = float(os.getenv("ESTATELY_LIMIT_MIN_WINDOW", "1"))
+LIMIT_MAX_WINDOW = float(os.getenv("ESTATELY_LIMIT_MAX_WINDOW", "32"))
+# Token bucket: requests per second per host (adapted between min and max), plus burst size
+LIMIT_INITIAL_RATE = float(os.getenv("ESTATELY_LIMIT_INITIAL_RATE", "2"))
+LIMIT_MIN_RATE = float(os.getenv("ESTATELY_LIMIT_MIN_RATE", "0.2"))
+LIMIT_MAX_RATE = float(os.getenv("ESTATELY_LIMIT_MAX_RATE", "20"))
+LIMIT_BURST = float(os.getenv("ESTATELY_LIMIT_BURST", "4"))
+# Multiplicative decrease on 429/503/timeouts; a milder one when latency inflates
+LIMIT_BACKOFF = float(os.getenv("ESTATELY_LIMIT_BACKOFF", "0.5"))
+LIMIT_LATENCY_BACKOFF = float(os.getenv("ESTATELY_LIMIT_LATENCY_BACKOFF", "0.85"))
+# Latency EWMA this many times above the best observed latency counts as congestion
+LIMIT_LATENCY_INFLATION = float(os.getenv("ESTATELY_LIMIT_LATENCY_INFLATION", "2.5"))
+# ...and at least this many seconds above it, so jitter on very fast responses is ignored
+LIMIT_LATENCY_SLACK = float(os.getenv("ESTATELY_LIMIT_LATENCY_SLACK", "0.25"))
+
+CONGESTION_STATUSES = {429, 503}
+
+
+class HostLimiter:
+    """
+    Adaptive limiter for a single host.
+
+    Two knobs are adapted with AIMD: `window` (max requests in flight) and
+    `rate` (token-bucket refill, requests/second). Every success grows them
+    additively (the window by ~1 per window's worth of successes); a 429/503/
+    timeout cuts both by LIMIT_BACKOFF, and a latency EWMA well above the best
+    latency seen cuts them by LIMIT_LATENCY_BACKOFF. Decreases happen at most
+    once per observed round trip so one burst of errors doesn't collapse the window.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        window: float = LIMIT_INITIAL_WINDOW,
+        rate: float = LIMIT_INITIAL_RATE,
+        burst: float = LIMIT_BURST,
+    ):
+        self.host = host
+        self.window = window
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.in_flight = 0
+        self.latency_ewma: Optional[float] = None
+        self.best_latency: Optional[float] = None
+        self.successes = 0
+        self.rejections = 0
+        self.timeouts = 0
+        self.decreases = 0
+        self._last_refill = time.monotonic()
+        self._last_decrease = 0.0
+        self._cond: Optional[asyncio.Condition] = None
+
+    def _condition(self) -> asyncio.Condition:
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    async def acquire(self) -> None:
+        cond = self._condition()
+        async with cond:
+            while True:
+                self._refill()
+                if self.in_flight < max(1, int(self.window)) and self.tokens >= 1:
+                    self.tokens -= 1
+                    self.in_flight += 1
+                    return
+                if self.in_flight < max(1, int(self.window)):
+                    # Window has room; wait for the next token
+                    delay = (1 - self.tokens) / max(self.rate, 1e-6)
+                    try:
+                        await asyncio.wait_for(cond.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    await cond.wait()
+
+    async def release(self, status: Optional[int], latency: float, timed_out: bool = False) -> None:
+        cond = self._condition()
+        async with cond:
+            self.in_flight = max(0, self.in_flight - 1)
+            if timed_out or (status in CONGESTION_STATUSES):
+                if timed_out:
+                    self.timeouts += 1
+                else:
+                    self.rejections += 1
+                self._decrease(LIMIT_BACKOFF)
+            elif status is None:
+                # Nothing was recorded (cancelled, or failed before a response): no signal either way
+                pass
+            else:
+                self._observe_latency(latency)
+                self.successes += 1
+                self.window = min(LIMIT_MAX_WINDOW, self.window + 1.0 / max(self.window, 1.0))
+                self.rate = min(LIMIT_MAX_RATE, self.rate + 1.0 / max(self.rate, 1.0) * 0.5)
+            cond.notify_all()
+
+    def _observe_latency(self, latency: float) -> None:
+        if latency <= 0:
+            return
+        self.best_latency = latency if self.best_latency is None else min(self.best_latency, latency)
+        self.latency_ewma = latency if self.latency_ewma is None else (0.8 * self.latency_ewma + 0.2 * latency)
+        if (
+            self.latency_ewma > self.best_latency * LIMIT_LATENCY_INFLATION
+            and self.latency_ewma - self.best_latency > LIMIT_LATENCY_SLACK
+        ):
+            self._decrease(LIMIT_LATENCY_BACKOFF)
+
+    def _decrease(self, factor: float) -> None:
+        now = time.monotonic()
+        # One cut per round trip, like TCP; default to 1s before any latency is known
+        if now - self._last_decrease < (self.latency_ewma or 1.0):
+            return
+        self._last_decrease = now
+        self.decreases += 1
+        self.window = max(LIMIT_MIN_WINDOW, self.window * factor)
+        self.rate = max(LIMIT_MIN_RATE, self.rate * factor)
+
+    def state(self) -> dict:
+        return {
+            "host": self.host,
+            "window": round(self.window, 2),
+            "rate": round(self.rate, 2),
+            "in_flight": self.in_flight,
+            "latency_ms": None if self.latency_ewma is None else round(self.latency_ewma * 1000),
+            "successes": self.successes,
+            "rejections": self.rejections,
+            "timeouts": self.timeouts,
+            "decreases": self.decreases,
+        }
+
+
+class AdaptiveLimiter:
+    """Registry of per-host `HostLimiter`s shared by every fetch in the process."""
+
+    def __init__(self):
+        self._hosts: dict[str, HostLimiter] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def for_host(self, host: str) -> HostLimiter:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Conditions are loop-bound; start fresh for a new event loop
+            self._hosts.clear()
+            self._loop = loop
+        lim = self._hosts.get(host)
+        if lim is None:
+            lim = self._hosts[host] = HostLimiter(host)
+        return lim
+
+    @asynccontextmanager
+    async def slot(self, url: str):
+        """
+        Hold a request slot for `url`'s host. The body should call
+        `slot.record(status)` (or let a timeout propagate) so the limiter can adapt;
+        a slot released with no status recorded neither grows nor cuts the window.
+        The latency sample is the time until release unless `record` was given one
+        (a streamed response, whose body is consumed while the slot is held).
+        """
+        lim = self.for_host(urlsplit(url).hostname or "")
+        await lim.acquire()
+        ticket = _Ticket()
+        started = time.monotonic()
+        try:
+            yield ticket
+        except (asyncio.TimeoutError, TimeoutError):
+            await lim.release(None, time.monotonic() - started, timed_out=True)
+            raise
+        except asyncio.CancelledError:
+            # Free the slot even if cancelled again while waiting for the lock, then re-raise as is
+            await asyncio.shield(lim.release(None, time.monotonic() - started))
+            raise
+        except BaseException as e:
+            # httpx timeouts don't subclass TimeoutError
+            timed_out = "Timeout" in type(e).__name__
+            await lim.release(ticket.status, ticket.elapsed(started), timed_out=timed_out)
+            raise
+        else:
+            await lim.release(ticket.status, ticket.elapsed(started))
+
+    def state(self) -> list[dict]:
+        return [lim.state() for lim in self._hosts.values()]
+
+
+class _Ticket:
+    __slots__ = ("status", "latency")
+
+    def __init__(self):
+        self.status: Optional[int] = None
+        self.latency: Optional[float] = None
+
+    def record(self, status: Optional[int], latency: Optional[float] = None) -> None:
+        self.status = status
+        self.latency = latency
+
+    def elapsed(self, started: float) -> float:
+        return self.latency if self.latency is not None else time.monotonic() - started
+
+
+limiter = AdaptiveLimiter()
+
+
+def limiter_state() -> list[dict]:
+    """Snapshot of every host's limiter (window, rate, rejections, ...) for logging."""
+    return limiter.state()
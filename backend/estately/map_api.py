@@ -0,0 +1,168 @@
+"""
+Browserless crawl of Estately's /map/properties endpoint: the same JSON the map
+view loads, requested directly with the search page's filters and the market's
+bounding box. Everything here is plain data in and out (bounds discovery runs
+in the parse executor); scraper.py does the fetching and gating.
+"""
+import json
+import os
+from typing import Any, Optional
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+from backend.estately.inline_state import iter_inline_json, script_blocks
+
+# Crawl markets through /map/properties before (instead of) the browser
+MAP_API_ENABLED = os.getenv("ESTATELY_MAP_API", "").lower() in {"1", "true", "yes"}
+MAP_API_URL = os.getenv("ESTATELY_MAP_API_URL", "https://www.estately.com/map/properties")
+# A tile answering with at least this many listings is assumed truncated and split in four
+MAP_API_TILE_CAP = int(os.getenv("ESTATELY_MAP_API_TILE_CAP", "500"))
+# Quadtree depth limit and request budget per market
+MAP_API_MAX_DEPTH = int(os.getenv("ESTATELY_MAP_API_MAX_DEPTH", "3"))
+MAP_API_MAX_REQUESTS = int(os.getenv("ESTATELY_MAP_API_MAX_REQUESTS", "32"))
+# Consecutive shape-check failures before the mode turns itself off for the run
+MAP_API_MAX_FAILURES = int(os.getenv("ESTATELY_MAP_API_MAX_FAILURES", "3"))
+
+# Bounding-box padding around the listings found on the search page, in degrees
+_PAD_MIN = 0.02
+
+_LAT_KEYS = ("latitude", "lat")
+_LNG_KEYS = ("longitude", "lng", "lon", "long")
+_BOUNDS_KEYS = (("north", "south", "east", "west"), ("ne_lat", "sw_lat", "ne_lng", "sw_lng"))
+
+Bounds = tuple[float, float, float, float]  # north, south, east, west
+
+
+def _num(v: Any) -> Optional[float]:
+    if isinstance(v, bool):
+        return None
+    if isinstance(v, (int, float)):
+        return float(v)
+    if isinstance(v, str):
+        try:
+            return float(v)
+        except ValueError:
+            return None
+    return None
+
+
+def _valid(b: Bounds) -> bool:
+    n, s, e, w = b
+    return -90 <= s < n <= 90 and -180 <= w < e <= 180
+
+
+def _scan(node: Any, points: list[tuple[float, float]], boxes: list[Bounds]) -> None:
+    stack = [node]
+    while stack:
+        n = stack.pop()
+        if isinstance(n, dict):
+            for names in _BOUNDS_KEYS:
+                if all(k in n for k in names):
+                    box = tuple(_num(n[k]) for k in names)
+                    if None not in box and _valid(box):
+                        boxes.append(box)
+            lat = next((_num(n[k]) for k in _LAT_KEYS if k in n), None)
+            lng = next((_num(n[k]) for k in _LNG_KEYS if k in n), None)
+            if lat is not None and lng is not None and -90 <= lat <= 90 and -180 <= lng <= 180 and (lat or lng):
+                points.append((lat, lng))
+            stack.extend(v for v in n.values() if isinstance(v, (dict, list)))
+        elif isinstance(n, list):
+            stack.extend(v for v in n if isinstance(v, (dict, list)))
+
+
+def market_bounds(html: str) -> Optional[Bounds]:
+    """
+    (north, south, east, west) of a market from its search page: an explicit map
+    viewport in the inline state if there is one, else the padded box around every
+    listing coordinate (card JSON-LD `geo`, inline state). None if neither is there.
+    """
+    points: list[tuple[float, float]] = []
+    boxes: list[Bounds] = []
+    for typ, text in script_blocks(html):
+        for data in iter_inline_json(typ, text):
+            _scan(data, points, boxes)
+    if boxes:
+        # The widest viewport: the map's own bounds rather than a single listing's
+        return max(boxes, key=lambda b: (b[0] - b[1]) * (b[2] - b[3]))
+    if not points:
+        return None
+    lats = [p[0] for p in points]
+    lngs = [p[1] for p in points]
+    pad_lat = max(_PAD_MIN, (max(lats) - min(lats)) * 0.1)
+    pad_lng = max(_PAD_MIN, (max(lngs) - min(lngs)) * 0.1)
+    return (
+        min(90.0, max(lats) + pad_lat), max(-90.0, min(lats) - pad_lat),
+        min(180.0, max(lngs) + pad_lng), max(-180.0, min(lngs) - pad_lng),
+    )
+
+
+def split_bounds(b: Bounds) -> list[Bounds]:
+    """The four quadrants of a box."""
+    n, s, e, w = b
+    mid_lat, mid_lng = (n + s) / 2, (e + w) / 2
+    return [(n, mid_lat, mid_lng, w), (n, mid_lat, e, mid_lng), (mid_lat, s, mid_lng, w), (mid_lat, s, e, mid_lng)]
+
+
+def map_query_url(search_url: str, bounds: Bounds) -> str:
+    """/map/properties URL carrying the search page's filters (price, beds, sqft, HOA, keywords...) and `bounds`."""
+    params = [(k, v) for k, v in parse_qsl(urlparse(search_url).query, keep_blank_values=True) if k != "page"]
+    n, s, e, w = bounds
+    params += [("north", f"{n:.6f}"), ("south", f"{s:.6f}"), ("east", f"{e:.6f}"), ("west", f"{w:.6f}")]
+    return f"{MAP_API_URL}?{urlencode(params)}"
+
+
+def looks_like_map_payload(text: str) -> Optional[int]:
+    """
+    Shape check for a /map/properties body: a JSON array of objects with an address
+    and a price (an empty array is a valid, empty tile). Returns the item count, or
+    None when the endpoint answered with something else (HTML, an error object, a new schema).
+    """
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(data, list):
+        return None
+    items = [it for it in data if isinstance(it, dict)]
+    if len(items) != len(data):
+        return None
+    price_keys = ("list_price", "price", "list_price_cents", "price_cents")
+    sample = items[:20]
+    if sample and not any(
+        ("address" in it or "streetAddress" in it) and any(k in it for k in price_keys) for it in sample
+    ):
+        return None
+    return len(items)
+
+
+class MapApiState:
+    """Run-wide switch: turns the map-API mode off after MAP_API_MAX_FAILURES shape failures in a row."""
+
+    def __init__(self, enabled: bool = MAP_API_ENABLED):
+        self.enabled = enabled
+        self.failures = 0
+        self.markets = 0
+        self.requests = 0
+        self.fallbacks = 0
+
+    def success(self) -> None:
+        self.failures = 0
+        self.markets += 1
+
+    def fallback(self, why: str) -> None:
+        """This market only goes to the page scrapers (HTTP errors, not a changed API); the mode stays on."""
+        self.fallbacks += 1
+        print(f"[estately] map API: {why}; scraping this market's pages instead")
+
+    def failure(self, why: str) -> None:
+        self.fallbacks += 1
+        self.failures += 1
+        if self.enabled and self.failures >= MAP_API_MAX_FAILURES:
+            self.enabled = False
+            print(f"[estately] /map/properties failed its shape check {self.failures}x in a row ({why}); "
+                  "using the page scrapers for the rest of the run")
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "markets": self.markets, "requests": self.requests, "fallbacks": self.fallbacks}
+
+
+map_api_state = MapApiState()
@@ -0,0 +1,107 @@
+"""
+Parity check between parser engines.
+
+    python -m backend.estately.parity [FILE_OR_DIR ...] [--engine lxml] [--verbose]
+
+For every saved page (defaults to the vendor fixtures under backend/vendors/*/source)
+both engines select cards (`select_cards`, the scraper's CARD_SELECTORS union and
+its per-listing resolution), parse each one and compare the resulting dicts and
+card texts with the bs4 reference.
+Exits non-zero on any mismatch, so it can gate a change to either engine.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from backend.estately.parsing import CARD_SELECTORS, NEXT_LINK_SELECTOR, get_engine, parse_resolved, resolve_cards
+
+DEFAULT_FIXTURES = Path(__file__).resolve().parents[1] / "vendors"
+
+
+def iter_pages(paths: Iterable[str] = ()) -> Iterator[Path]:
+    """The saved pages under each file or directory in `paths` (default: the vendor fixtures)."""
+    roots = [Path(p) for p in paths] or [DEFAULT_FIXTURES]
+    for root in roots:
+        if root.is_dir():
+            yield from sorted(p for p in root.rglob("*.htm*") if p.is_file())
+        elif root.is_file():
+            yield root
+
+
+def _parse(engine, card):
+    # The scraper skips cards that raise, so only whether a card raised has to match
+    try:
+        return engine.parse_card(card), engine.text(card)
+    except Exception:
+        return "<error>", None
+
+
+def _run(engine, html: str) -> tuple[dict, float]:
+    t0 = time.perf_counter()
+    root = engine.document(html)
+    union = [_parse(engine, c) for c in engine.select(root, ", ".join(CARD_SELECTORS))]
+    resolved = [parse_resolved(chain, engine) for chain in resolve_cards(root, engine)]
+    nxt = engine.select_one(root, NEXT_LINK_SELECTOR)
+    # select_cards strips extension UI in place, so give it its own tree
+    cards = [_parse(engine, c)[0] for c in engine.select_cards(engine.document(html))]
+    elapsed = time.perf_counter() - t0
+    return {
+        "select_cards": cards,
+        "union": union,
+        "resolved": resolved,
+        "next": nxt.get("href") if nxt is not None else None,
+    }, elapsed
+
+
+def compare_page(html: str, candidate, reference=None) -> tuple[list[str], float, float]:
+    """Return (differences, reference seconds, candidate seconds) for one page."""
+    reference = reference or get_engine("bs4")
+    want, t_ref = _run(reference, html)
+    got, t_cand = _run(candidate, html)
+    diffs: list[str] = []
+    for key in ("select_cards", "union", "resolved"):
+        a, b = want[key], got[key]
+        if len(a) != len(b):
+            diffs.append(f"{key}: {len(a)} cards vs {len(b)}")
+            continue
+        for i, (x, y) in enumerate(zip(a, b)):
+            if x != y:
+                diffs.append(f"{key}[{i}]: {x!r} != {y!r}")
+    if want["next"] != got["next"]:
+        diffs.append(f"next: {want['next']!r} != {got['next']!r}")
+    return diffs, t_ref, t_cand
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Compare a parser engine against the bs4 reference on saved pages.")
+    ap.add_argument("paths", nargs="*", help="HTML files or directories (default: backend/vendors)")
+    ap.add_argument("--engine", default="lxml", help="engine to check against bs4 (default: lxml)")
+    ap.add_argument("--verbose", "-v", action="store_true", help="print every difference, not just the first few")
+    args = ap.parse_args(argv)
+
+    candidate = get_engine(args.engine)
+    pages = list(iter_pages(args.paths))
+    if not pages:
+        print("[parity] no pages found")
+        return 2
+    failed = 0
+    total_ref = total_cand = 0.0
+    for path in pages:
+        html = path.read_text(encoding="utf-8", errors="replace")
+        diffs, t_ref, t_cand = compare_page(html, candidate)
+        total_ref += t_ref
+        total_cand += t_cand
+        status = "ok" if not diffs else f"{len(diffs)} diff(s)"
+        print(f"[parity] {path}: {status}  bs4 {t_ref * 1000:.1f}ms  {candidate.name} {t_cand * 1000:.1f}ms")
+        for d in diffs if args.verbose else diffs[:3]:
+            print(f"    {d}")
+        failed += bool(diffs)
+    speedup = total_ref / total_cand if total_cand else float("inf")
+    print(f"[parity] {len(pages) - failed}/{len(pages)} pages identical; {candidate.name} {speedup:.1f}x faster overall")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,144 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pickle import PicklingError
+from typing import Any, Callable, Optional
+
+from backend.estately.analysis import keyword_overrides, set_keyword_sets
+from backend.estately.cache import get_card_memo
+from backend.estately.harvest import add_walker_counts, take_walker_counts
+from backend.estately.parsing import get_engine, set_default_engine
+
+# Where HTML parsing runs: "process" (a worker pool, one per core; keeps the event
+# loop and every market's I/O moving while pages parse), "thread" (releases the
+# loop but shares the GIL) or "inline" (on the loop, as before).
+PARSE_MODE = os.getenv("ESTATELY_PARSE_MODE", "process").strip().lower() or "process"
+PARSE_WORKERS = int(os.getenv("ESTATELY_PARSE_WORKERS", "0")) or (os.cpu_count() or 1)
+PARSE_MODES = ("inline", "thread", "process")
+
+
+def _init_worker(engine: str, keyword_sets: dict[str, tuple[str, ...]]) -> None:
+    """Pool initializer: apply the parent's engine / keyword choices (spawned workers start from env defaults)."""
+    set_default_engine(engine)
+    if keyword_sets:
+        set_keyword_sets(**keyword_sets)
+
+
+def _in_worker(fn: Callable[..., Any], *args) -> tuple[Any, Optional[tuple[int, int]], tuple]:
+    """
+    Worker-side call: fn's result, this worker's card-memo hits/misses and its
+    JSON walker counts since its last task.
+    """
+    result = fn(*args)
+    walks = take_walker_counts()
+    memo = get_card_memo()
+    if memo is None:
+        return result, None, walks
+    memo.flush()
+    return result, memo.take_counts(), walks
+
+
+class ParseExecutor:
+    """
+    Runs CPU-bound parse functions off the event loop. Work is passed as a
+    module-level function plus plain str/dict arguments and comes back as plain
+    values, so the same call works in every mode. Worker processes are spawned
+    (not forked) so they never inherit the loop, open sockets or the browser.
+
+    If the process pool breaks (a worker killed, an unpicklable value, no
+    multiprocessing support) the call is retried inline and the executor stays
+    inline for the rest of the run.
+    """
+
+    def __init__(self, mode: str = PARSE_MODE, workers: int = PARSE_WORKERS):
+        self._pool: Optional[Executor] = None
+        self._initargs: tuple = ()
+        self.workers = PARSE_WORKERS
+        self.configure(mode, workers)
+        self.tasks = 0
+        self.fallbacks = 0
+
+    def configure(self, mode: str, workers: Optional[int] = None) -> None:
+        mode = (mode or "process").lower()
+        if mode not in PARSE_MODES:
+            raise ValueError(f"unknown parse mode: {mode!r} (expected one of {', '.join(PARSE_MODES)})")
+        self.shutdown()
+        self.mode = mode
+        if workers:
+            self.workers = max(1, int(workers))
+
+    def _executor(self) -> Optional[Executor]:
+        if self.mode == "inline":
+            return None
+        if self.mode == "process" and self._pool is not None:
+            # Engine / keywords changed since the workers started: respawn them with the new ones
+            if self._initargs != (get_engine().name, keyword_overrides()):
+                self.shutdown()
+        if self._pool is None:
+            if self.mode == "thread":
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="estately-parse")
+            else:
+                self._initargs = (get_engine().name, keyword_overrides())
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=self._initargs,
+                )
+        return self._pool
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """`fn(*args)` in the configured mode; awaited by the scraper instead of calling fn directly."""
+        self.tasks += 1
+        pool = self._executor()
+        if pool is None:
+            return fn(*args)
+        try:
+            if self.mode != "process":
+                return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+            result, counts, walks = await asyncio.get_running_loop().run_in_executor(pool, _in_worker, fn, *args)
+            memo = get_card_memo()
+            if counts and memo is not None:
+                memo.add_counts(counts)
+            add_walker_counts(walks)
+            return result
+        except (BrokenProcessPool, PicklingError, NotImplementedError) as e:
+            # Only pool failures; an exception raised by fn itself propagates as usual
+            if self.mode != "process":
+                raise
+            print(f"[estately] parse pool unavailable ({e.__class__.__name__}: {e}); parsing inline from now on")
+            self.fallbacks += 1
+            self.configure("inline")
+            return fn(*args)
+
+    def shutdown(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, "workers": self.workers, "tasks": self.tasks, "fallbacks": self.fallbacks}
+
+
+_executor = ParseExecutor()
+
+
+def configure_parse_executor(mode: str, workers: Optional[int] = None) -> None:
+    """Pick inline/thread/process parsing (and the pool size) for the rest of the run."""
+    _executor.configure(mode, workers)
+
+
+def get_parse_executor() -> ParseExecutor:
+    return _executor
+
+
+async def run_parse(fn: Callable[..., Any], *args) -> Any:
+    """Run a parse function (see harvest.py) through the shared executor."""
+    return await _executor.run(fn, *args)
+
+
+def close_parse_executor() -> None:
+    """Stop the worker pool; call once when the run finishes."""
+    _executor.shutdown()
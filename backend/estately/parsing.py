@@ -1,10 +1,103 @@
 # backend/estately/parsing.py
 from bs4 import BeautifulSoup, Tag
+import hashlib
+import os
 import re
+from functools import lru_cache
+from pathlib import Path
 from urllib.parse import urljoin
 import json
 
-__all__ = ["parse_card", "select_cards", "should_keep"]
+from backend.estately.cache import get_card_memo
+
+__all__ = [
+    "parse_card", "parse_card_with_text", "select_cards", "should_keep",
+    "get_engine", "set_default_engine", "resolve_cards", "parse_resolved", "CARD_SELECTORS",
+]
+
+# Parsing backend: "bs4" (BeautifulSoup, the reference) or "lxml" (native tree, see parsing_lxml.py).
+# Both produce identical dicts; `python -m backend.estately.parity` checks that on saved pages.
+PARSER_ENGINE = os.getenv("ESTATELY_PARSER_ENGINE", "bs4").strip().lower() or "bs4"
+# Read a card's JSON-LD first and only run the DOM selector cascade for fields it lacks.
+# Off: DOM first with JSON-LD as backfill (the original order; structured values then lose ties).
+JSONLD_FIRST = os.getenv("ESTATELY_JSONLD_FIRST", "1").strip().lower() not in {"0", "false", "no"}
+
+# --- selectors (shared by both engines) ---------------------------------------
+
+# Selector union for listing cards across Estately skins (HTTP and browser paths)
+CARD_SELECTORS = [
+    ".js-map-listing-result",
+    "div[data-testid*='MapResultsCard']",
+    "div[class*='PropertyCard__wrapper']",
+    "article[data-testid*='resultCard']",
+    "a[href*='/home/']",
+    "div[data-testid*='MapResults'] .js-map-listing-result",
+    "div[id*='listings'] .js-map-listing-result",
+    "[data-testid='listing-card']",
+    "[data-qa='home-card']",
+    "article.listingCard__wrapper",
+    "article[class*='ListingCard']",
+    "div[class*='PropertyCard']",
+    "section[class*='HomeCard']",
+    "li[class*='result'] article",
+    "a[href*='/listings/']",
+    "article",
+]
+NEXT_LINK_SELECTOR = "a[rel='next'], a[aria-label='Next']"
+
+_EXTENSION_UI = "plasmo-csui, #jobright-helper-plugin, [id^='jobright-helper']"
+_PRIMARY_CARD = ".js-map-listing-result"
+_LEGACY_CARDS = (
+    ".ListingCard, .listing-card, .result, .result-card, .result-list .result, "
+    "li[class*='result'], article[class*='card'], [data-testid*='listing-card'], [data-qa*='listing-card']"
+)
+_JSONLD = "script[type='application/ld+json']"
+_ADDRESS_HINT = "[data-testid*='address'],[data-qa*='address'],.ListingCard-address,.listing-address,.result-address"
+_PRICE_HINT = (
+    "[data-testid*='price'],.ListingCard-price,.listing-price,[itemprop='price'],meta[itemprop='price'],"
+    "[class*='price'],.result-price"
+)
+_LINK_ATTR_NODES = "[to], [data-href], [data-url], [data-listing-url], [role='link'], [aria-label]"
+_LINK_ATTRS = ("href", "to", "data-href", "data-url", "data-listing-url")
+
+_ADDRESS_SELECTORS = [
+    "[data-testid*='address']",
+    "[data-qa*='address']",
+    ".ListingCard-address",
+    ".listing-address",
+    "span[itemprop='streetAddress']",
+    "[class*='street']",
+    ".result-address a",     # Estately results skin
+    ".result-address",       # fallback
+]
+_LOCATION_SELECTORS = [
+    ".ListingCard-location",
+    ".listing-location",
+    "[itemprop='addressLocality']",
+    "[data-testid*='location']",
+    "[class*='cityState']",
+    "[class*='location']",
+    ".result-address a",  # e.g. "19807 Emerald Bend Way, Houston, TX"
+]
+_PRICE_SELECTORS = [
+    "[data-testid*='price']",
+    ".ListingCard-price",
+    ".listing-price",
+    "[itemprop='price']",
+    "meta[itemprop='price']",
+    "[class*='price']",
+    ".result-price strong",  # Estately results skin
+    ".result-price",         # fallback
+]
+
+_LOCATION_RE = re.compile(r"\s*([^,]+)\s*,\s*([A-Za-z]{2})(?:\s+(\d{5}))?")
+_MEDIA_WORDS_RE = re.compile(r"\b(view|photo|photos|image|images)\b", re.I)
+_BEDS_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:beds?|bd|bedroom)", re.I)
+_BATHS_RE = re.compile(r"(\d+(?:\.\d+)?)\s*(?:baths?|ba|bathroom)", re.I)
+_SF_RE = re.compile(r"(\d[\d,\.]+)\s*sf\b", re.I)
+_LISTING_PATHS = ("/listings/", "/home/", "/homes/", "/property/")
+_SCRIPT_URL_RE = re.compile(r'"(?:url|@id)"\s*:\s*"(?P<u>\/[^"]+)"')
+_HTML_HREF_RE = re.compile(r'href=\"(\/[A-Za-z0-9_\-\/]+)\"')
 
 # --- number helpers ---------------------------------------------------------
 # Match numbers like: 1,234  •  1,234.5  •  3–4 (take first)  •  3 to 4 (take first)
@@ -54,12 +147,19 @@ def _jsonld_from_card(card) -> dict | None:
     We return a merged-ish view prioritizing the residence object, then product/offer.
     """
     try:
-        script = card.select_one("script[type='application/ld+json']")
+        script = card.select_one(_JSONLD)
         if not script:
             return None
-        raw = script.string or script.get_text(strip=True)
-        if not raw:
-            return None
+        return _merge_jsonld(script.string or script.get_text(strip=True))
+    except Exception:
+        return None
+
+
+def _merge_jsonld(raw: str | None) -> dict | None:
+    """Engine-independent half of `_jsonld_from_card`: decode the blob and merge residence/product/offer."""
+    if not raw:
+        return None
+    try:
         data = json.loads(raw)
         # Normalize to list
         items = data if isinstance(data, list) else [data]
@@ -98,6 +198,52 @@ def _jsonld_from_card(card) -> dict | None:
     except Exception:
         return None
 
+_CARD_FIELDS = ("address", "city", "state", "zip", "price", "beds", "baths", "sqft", "href")
+
+
+def _jsonld_record(ld: dict | None) -> dict:
+    """
+    Card fields taken straight from merged JSON-LD (see `_merge_jsonld`), None where
+    absent. Same sources as the `_finish_card` backfill, just read first, except
+    beds: only `numberOfBedrooms` counts here, since `numberOfRooms` is total rooms
+    and must not override the card's own beds (it stays a last-resort backfill).
+    """
+    out = dict.fromkeys(_CARD_FIELDS)
+    if not JSONLD_FIRST or not ld:
+        return out
+    addr = ld.get("address") if isinstance(ld.get("address"), dict) else {}
+    out["address"] = addr.get("streetAddress") or None
+    out["city"] = addr.get("addressLocality") or None
+    out["state"] = addr.get("addressRegion") or None
+    out["zip"] = addr.get("postalCode") or None
+    offers = ld.get("offers")
+    price_ld = None
+    if isinstance(offers, dict):
+        price_ld = offers.get("price")
+    elif isinstance(offers, list) and offers and isinstance(offers[0], dict):
+        price_ld = offers[0].get("price")
+    if price_ld is None:
+        price_ld = ld.get("price")
+    out["price"] = _qv_value(price_ld) or None
+    out["beds"] = _qv_value(ld.get("numberOfBedrooms"))
+    out["baths"] = _qv_value(ld.get("numberOfBathroomsTotal"))
+    fs = ld.get("floorSize")
+    out["sqft"] = _qv_value(fs)
+    if out["sqft"] is None and isinstance(fs, dict):
+        out["sqft"] = _qv_value(fs.get("value"))
+    url_ld = ld.get("url")
+    if isinstance(url_ld, str) and url_ld:
+        out["href"] = urljoin("https://www.estately.com/", url_ld)
+    return out
+
+
+def _fill_missing(out: dict, found: dict) -> None:
+    """Copy `found` values into `out` only where `out` has nothing yet."""
+    for k, v in found.items():
+        if out.get(k) is None:
+            out[k] = v
+
+
 def _qv_value(x):
     """Return numeric value from a QuantitativeValue-ish dict or raw."""
     if isinstance(x, dict):
@@ -119,26 +265,26 @@ def _strip_extension_ui(root):
     """Remove nodes injected by browser extensions (e.g., Jobright/Plasmo) that
     can pollute anchors/text. Safe no-op if not present."""
     try:
-        for node in root.select(
-            "plasmo-csui, #jobright-helper-plugin, [id^='jobright-helper']"
-        ):
+        for node in root.select(_EXTENSION_UI):
             node.decompose()
     except Exception:
         pass
     return root
 
 
+def _is_extension_node(name: str, node_id: str | None, cls: str) -> bool:
+    if name in ("plasmo-csui",):
+        return True
+    return (node_id or "").lower().startswith("jobright-helper") or "jobright-helper" in cls.lower()
+
+
 def _in_extension_ui(el: Tag) -> bool:
     """Return True if the element is inside a known extension container."""
     try:
         for p in [el] + list(el.parents):
             if not isinstance(p, Tag):
                 continue
-            if p.name in ("plasmo-csui",):
-                return True
-            pid = (p.get("id") or "").lower()
-            cls = " ".join(p.get("class", [])).lower()
-            if pid.startswith("jobright-helper") or "jobright-helper" in cls:
+            if _is_extension_node(p.name, p.get("id"), " ".join(p.get("class", []))):
                 return True
         return False
     except Exception:
@@ -175,7 +321,7 @@ def _first_valid_anchor(card) -> str | None:
                 continue
             if _in_extension_ui(a):
                 continue
-            if any(p in href for p in ("/listings/", "/home/", "/homes/", "/property/")):
+            if any(p in href for p in _LISTING_PATHS):
                 return urljoin("https://www.estately.com/", href)
         except Exception:
             continue
@@ -194,25 +340,25 @@ def _extract_href(card) -> str | None:
         return href
 
     candidate = None
-    for el in card.select("[to], [data-href], [data-url], [data-listing-url], [role='link'], [aria-label]"):
+    for el in card.select(_LINK_ATTR_NODES):
         if _in_extension_ui(el):
             continue
         candidate = el
         break
 
     if candidate:
-        for attr in ("href", "to", "data-href", "data-url", "data-listing-url"):
+        for attr in _LINK_ATTRS:
             v = candidate.get(attr)
             if v:
                 return urljoin("https://www.estately.com/", v)
 
     # script/JSON blob fallback
-    for s in card.select("script[type='application/ld+json'], script"):
+    for s in card.select(f"{_JSONLD}, script"):
         if _in_extension_ui(s):
             continue
         try:
             txt = (s.string or s.get_text("", strip=True) or "")
-            m = re.search(r'"(?:url|@id)"\s*:\s*"(?P<u>\/[^"]+)"', txt)
+            m = _SCRIPT_URL_RE.search(txt)
             if m:
                 return urljoin("https://www.estately.com/", m.group("u"))
         except Exception:
@@ -220,7 +366,7 @@ def _extract_href(card) -> str | None:
 
     # final regex scrape on the card's html
     html = str(card)
-    m = re.search(r'href=\"(\/[A-Za-z0-9_\-\/]+)\"', html)
+    m = _HTML_HREF_RE.search(html)
     if m:
         return urljoin("https://www.estately.com/", m.group(1))
 
@@ -232,18 +378,12 @@ def _is_probable_card(el: Tag) -> bool:
         if _in_extension_ui(el):
             return False
         # Must contain either a JSON-LD blob or an address-ish node
-        if el.select_one("script[type='application/ld+json']"):
+        if el.select_one(_JSONLD):
             return True
-        if el.select_one(
-            "[data-testid*='address'],[data-qa*='address'],.ListingCard-address,.listing-address,.result-address"
-        ):
+        if el.select_one(_ADDRESS_HINT):
             return True
         # Or have a price + link combo
-        has_price = bool(
-            el.select_one(
-                "[data-testid*='price'],.ListingCard-price,.listing-price,[itemprop='price'],meta[itemprop='price'],[class*='price'],.result-price"
-            )
-        )
+        has_price = bool(el.select_one(_PRICE_HINT))
         has_link = bool(el.select_one("a[href]"))
         return has_price and has_link
     except Exception:
@@ -261,13 +401,10 @@ def select_cards(root: Tag) -> list[Tag]:
     _strip_extension_ui(root)
 
     # Primary Estately skin uses custom elements
-    cards = root.select(".js-map-listing-result")
+    cards = root.select(_PRIMARY_CARD)
     if not cards:
         # Try older card wrappers
-        cards = root.select(
-            ".ListingCard, .listing-card, .result, .result-card, .result-list .result, "
-            "li[class*='result'], article[class*='card'], [data-testid*='listing-card'], [data-qa*='listing-card']"
-        )
+        cards = root.select(_LEGACY_CARDS)
 
     # Deduplicate and keep only probable cards
     seen = set()
@@ -305,125 +442,119 @@ def should_keep(row: dict) -> bool:
 
 # --- main ------------------------------------------------------------------
 
-def parse_card(card) -> dict:
+def parse_card(card, text: str | None = None) -> dict:
     """
     Parse an Estately (or similar) listing card bs4 Tag into a normalized dict:
     {address, city, state, zip, price, beds, baths, sqft, href}
 
     This version is resilient to multiple DOM skins used across markets.
+    `text` is the card's sanitized get_text, when the caller already has it.
     """
-    out: dict = {}
-
     # Strip intrusive extension DOM to avoid bogus anchors/text
     _strip_extension_ui(card)
 
+    # JSON-LD first: on the primary skin it usually has every field, and then none
+    # of the selector cascades below run
+    ld = _jsonld_from_card(card)
+    out = _jsonld_record(ld)
+
     # Address line (street)
-    addr_el = _pick(
-        card,
-        [
-            "[data-testid*='address']",
-            "[data-qa*='address']",
-            ".ListingCard-address",
-            ".listing-address",
-            "span[itemprop='streetAddress']",
-            "[class*='street']",
-            ".result-address a",     # Estately results skin
-            ".result-address",       # fallback
-        ],
-    )
-    out["address"] = _text(addr_el)
+    if not out["address"]:
+        addr_el = _pick(card, _ADDRESS_SELECTORS)
+        out["address"] = _text(addr_el)
 
     # Location line (City, ST 85001)
-    loc_el = _pick(
-        card,
-        [
-            ".ListingCard-location",
-            ".listing-location",
-            "[itemprop='addressLocality']",
-            "[data-testid*='location']",
-            "[class*='cityState']",
-            "[class*='location']",
-            ".result-address a",  # e.g. "19807 Emerald Bend Way, Houston, TX"
-        ],
-    )
-    city = state = zipc = None
-    if loc_el:
-        loc_txt = _text(loc_el) or ""
-        # Typical: "Phoenix, AZ 85001" or "Phoenix, AZ"
-        m = re.match(r"\s*([^,]+)\s*,\s*([A-Za-z]{2})(?:\s+(\d{5}))?", loc_txt)
-        if m:
-            city, state, zipc = m.group(1), m.group(2), m.group(3)
-        else:
-            # Some skins split city/state
-            c_el = card.select_one("[itemprop='addressLocality']")
-            s_el = card.select_one("[itemprop='addressRegion']")
-            z_el = card.select_one("[itemprop='postalCode']")
-            city = _text(c_el) or city
-            state = _text(s_el) or state
-            zipc = _text(z_el) or zipc
-    out["city"], out["state"], out["zip"] = city, state, zipc
+    if not (out["city"] and out["state"]):
+        loc_el = _pick(card, _LOCATION_SELECTORS)
+        city = state = zipc = None
+        if loc_el:
+            loc_txt = _text(loc_el) or ""
+            # Typical: "Phoenix, AZ 85001" or "Phoenix, AZ"
+            m = _LOCATION_RE.match(loc_txt)
+            if m:
+                city, state, zipc = m.group(1), m.group(2), m.group(3)
+            else:
+                # Some skins split city/state
+                c_el = card.select_one("[itemprop='addressLocality']")
+                s_el = card.select_one("[itemprop='addressRegion']")
+                z_el = card.select_one("[itemprop='postalCode']")
+                city = _text(c_el) or city
+                state = _text(s_el) or state
+                zipc = _text(z_el) or zipc
+        _fill_missing(out, {"city": city, "state": state, "zip": zipc})
 
     # Price
-    price_el = _pick(
-        card,
-        [
-            "[data-testid*='price']",
-            ".ListingCard-price",
-            ".listing-price",
-            "[itemprop='price']",
-            "meta[itemprop='price']",
-            "[class*='price']",
-            ".result-price strong",  # Estately results skin
-            ".result-price",         # fallback
-        ],
-    )
-    price_txt = None
-    if price_el:
-        # meta tag?
-        if getattr(price_el, "name", "").lower() == "meta":
-            price_txt = price_el.get("content")
-        else:
-            price_txt = _text(price_el)
-    out["price"] = _first_price(price_txt)
+    if out["price"] is None:
+        price_el = _pick(card, _PRICE_SELECTORS)
+        price_txt = None
+        if price_el:
+            # meta tag?
+            if getattr(price_el, "name", "").lower() == "meta":
+                price_txt = price_el.get("content")
+            else:
+                price_txt = _text(price_el)
+        out["price"] = _first_price(price_txt)
 
     # Facts (beds/baths/sqft). Search broadly and bias on nearby tokens
-    facts_blob = _text(card) or ""
+    if out["beds"] is None or out["baths"] is None or out["sqft"] is None:
+        facts_blob = (_text(card) if text is None else text) or ""
+        sqft_el = card.find(string=_sqft_tokens)
+        if not isinstance(sqft_el, str) and sqft_el is not None:
+            sqft_el = sqft_el.get_text(" ", strip=True)
+        facts: dict = {}
+        _parse_facts(facts, facts_blob, str(sqft_el) if sqft_el else None)
+        _fill_missing(out, facts)
+
+    # Link (robust: skip extension-injected anchors, support SPA/data-* patterns)
+    if not out["href"]:
+        out["href"] = _extract_href(card)
+
+    return _finish_card(out, ld)
+
+
+def parse_card_with_text(card) -> tuple[dict, str]:
+    """
+    `parse_card` plus the card's text (after extension UI is stripped). The text is
+    computed once and reused by the caller's gates instead of another get_text.
+    """
+    _strip_extension_ui(card)
+    text = _text(card) or ""
+    return parse_card(card, text=text), text
+
+
+def _parse_facts(out: dict, facts_blob: str, sqft_ctx: str | None) -> None:
+    """Beds/baths/sqft from the card text (`sqft_ctx` is the first string mentioning square feet, if any)."""
     # Remove photo/image/view tokens to avoid extracting unrelated numbers
-    facts_blob = re.sub(r"\b(view|photo|photos|image|images)\b", "", facts_blob, flags=re.I)
+    facts_blob = _MEDIA_WORDS_RE.sub("", facts_blob)
 
     # Beds
     beds = None
-    bed_match = re.search(r"(\d+(?:\.\d+)?)\s*(?:beds?|bd|bedroom)", facts_blob, re.I)
+    bed_match = _BEDS_RE.search(facts_blob)
     if bed_match:
         beds = float(bed_match.group(1))
 
     # Baths
     baths = None
-    bath_match = re.search(r"(\d+(?:\.\d+)?)\s*(?:baths?|ba|bathroom)", facts_blob, re.I)
+    bath_match = _BATHS_RE.search(facts_blob)
     if bath_match:
         baths = float(bath_match.group(1))
 
     # Sqft
     sqft = None
-    sqft_el = card.find(string=_sqft_tokens)
-    if not isinstance(sqft_el, str) and sqft_el is not None:
-        sqft_el = sqft_el.get_text(" ", strip=True)
-    sqft_ctx = str(sqft_el) if sqft_el else facts_blob
+    sqft_ctx = sqft_ctx or facts_blob
     if _sqft_tokens.search(sqft_ctx or ""):
         sqft = _first_number(sqft_ctx)
     else:
         # fallback: any number followed by 'sf' without dot
-        m = re.search(r"(\d[\d,\.]+)\s*sf\b", facts_blob, re.I)
+        m = _SF_RE.search(facts_blob)
         sqft = float(m.group(1).replace(",", "")) if m else None
 
     out["beds"], out["baths"], out["sqft"] = beds, baths, sqft
 
-    # Link (robust: skip extension-injected anchors, support SPA/data-* patterns)
-    href = _extract_href(card)
-    out["href"] = href
-    
-     # ---------- JSON-LD backfill (strong and less brittle) ----------
-    ld = _jsonld_from_card(card)
+
+def _finish_card(out: dict, ld: dict | None) -> dict:
+    """JSON-LD backfill plus the minimal validity check; shared by every engine."""
+    # ---------- JSON-LD backfill (strong and less brittle) ----------
     if ld:
         # Address fields
         addr = ld.get("address") if isinstance(ld.get("address"), dict) else ld.get("address", {})
@@ -478,13 +609,202 @@ def parse_card(card) -> dict:
         out.setdefault("_weak", True)
 
     return out
-def parse_all_cards(html: str):
+
+
+def parse_all_cards(html: str, engine=None):
     """
     Convenience function for full HTML: parses and filters cards in one shot.
     Returns only strong (should_keep=True) rows.
     """
-    from bs4 import BeautifulSoup
-    soup = BeautifulSoup(html, "lxml")
-    cards = select_cards(soup)
-    parsed = [parse_card(c) for c in cards]
-    return [r for r in parsed if should_keep(r)]
\ No newline at end of file
+    engine = engine or get_engine()
+    root = engine.document(html)
+    cards = engine.select_cards(root)
+    parsed = [engine.parse_card(c) for c in cards]
+    return [r for r in parsed if should_keep(r)]
+
+
+# --- card resolution ---------------------------------------------------------
+
+def _listing_key(href: str) -> str | None:
+    """Canonical listing URL for an anchor href, or None if it isn't a listing link."""
+    if not href or not any(p in href for p in _LISTING_PATHS):
+        return None
+    return urljoin("https://www.estately.com/", href).split("#", 1)[0].split("?", 1)[0]
+
+
+def resolve_cards(root, engine=None, selectors=CARD_SELECTORS) -> list[list]:
+    """
+    Resolve the CARD_SELECTORS union into one candidate list per listing.
+
+    The union matches the same listing several times over (wrapper div, the
+    card, its inner anchors, nested articles). Each match is keyed by the first
+    listing URL inside it, the same link parse_card would pick for its href;
+    matches nested in an earlier match with the same key are the same listing.
+    A listing's candidates are its outermost match (the one the old
+    document-order (address, price) dedupe kept) followed by those nested
+    matches, tried in turn only if it fails to parse. See `parse_resolved`.
+    Keying by URL rather than by "holds one listing" keeps unclosed-tag soup
+    working, where every card ends up nested inside the previous one.
+    """
+    engine = engine or get_engine()
+    matches = engine.select(root, ", ".join(selectors)) or []
+    if len(matches) < 2:
+        return [[m] for m in matches]
+    index = {id(m): i for i, m in enumerate(matches)}
+
+    def _match_ancestors(node, inclusive: bool):
+        if not inclusive:
+            node = engine.parent(node)
+        while node is not None:
+            i = index.get(id(node))
+            if i is not None:
+                yield i
+            node = engine.parent(node)
+
+    keys: list[str | None] = [None] * len(matches)
+    for a in engine.select(root, "a[href]"):
+        key = _listing_key(a.get("href"))
+        if key is None:
+            continue
+        for i in _match_ancestors(a, True):
+            if keys[i] is not None:
+                # an earlier link already keyed this match and everything above it
+                break
+            keys[i] = key
+
+    chains: list[list] = []
+    chain_of: dict[int, list] = {}
+    for i, el in enumerate(matches):
+        # matches come in document order, so an enclosing card was already seen
+        owner = next((chain_of[j] for j in _match_ancestors(el, False) if j in chain_of and keys[j] == keys[i]), None)
+        if owner is not None:
+            owner.append(el)
+            continue
+        chain = [el]
+        chain_of[i] = chain
+        chains.append(chain)
+    return chains
+
+
+def parse_resolved(candidates: list, engine=None) -> tuple[dict, str] | None:
+    """
+    (dict, card text) for one resolved listing: the first candidate that parses
+    with an address (or city + state); else the first that parses at all.
+    """
+    engine = engine or get_engine()
+    first = None
+    for el in candidates:
+        try:
+            data, text = engine.parse_with_text(el)
+        except Exception:
+            continue
+        if data.get("address") or (data.get("city") and data.get("state")):
+            return data, text
+        if first is None:
+            first = (data, text)
+    return first
+
+
+# --- memo ---------------------------------------------------------------------
+
+@lru_cache(maxsize=1)
+def _parser_fingerprint() -> str:
+    """Changes whenever the parsing code or its mode does, so memoized cards from older code are never served."""
+    h = hashlib.blake2b(digest_size=8)
+    here = Path(__file__).resolve().parent
+    for name in ("parsing.py", "parsing_lxml.py"):
+        try:
+            h.update((here / name).read_bytes())
+        except OSError:
+            pass
+    h.update(b"jsonld-first" if JSONLD_FIRST else b"dom-first")
+    return h.hexdigest()
+
+
+def memoized_parse(engine, card, parse) -> tuple[dict, str]:
+    """
+    `parse(card)` → (dict, text), served from the card memo (cache.CardMemo) when
+    the same card HTML was parsed before by this engine and parser version.
+    """
+    memo = get_card_memo()
+    if memo is None:
+        return parse(card)
+    key = memo.key(f"{engine.name}:{_parser_fingerprint()}", engine.outer_html(card))
+    hit = memo.get(key)
+    if hit is not None:
+        return hit
+    result = parse(card)
+    memo.put(key, result)
+    return result
+
+
+# --- engines -----------------------------------------------------------------
+
+class Bs4Engine:
+    """
+    The reference engine: BeautifulSoup trees and soupsieve selectors. Engines
+    expose the same small surface (document/select/select_one/text/parent/fragment
+    plus select_cards/parse_card) so callers can swap them without caring about the tree type.
+    """
+
+    name = "bs4"
+
+    def document(self, html: str):
+        return BeautifulSoup(html, "lxml")
+
+    def fragment(self, html: str):
+        """Standalone element parsed from its outer HTML (e.g. a card cut out by the stream parser)."""
+        soup = BeautifulSoup(html, "lxml")
+        body = soup.body
+        return next(iter(body.find_all(recursive=False)), soup) if body else soup
+
+    def select(self, root, selector: str) -> list:
+        return root.select(selector)
+
+    def select_one(self, root, selector: str):
+        return root.select_one(selector)
+
+    def text(self, el) -> str:
+        return el.get_text(" ", strip=True)
+
+    def parent(self, el):
+        return el.parent
+
+    def outer_html(self, el) -> str:
+        return str(el)
+
+    def select_cards(self, root) -> list:
+        return select_cards(root)
+
+    def parse_card(self, card) -> dict:
+        return parse_card(card)
+
+    def parse_with_text(self, card) -> tuple[dict, str]:
+        return memoized_parse(self, card, parse_card_with_text)
+
+
+_engines: dict = {}
+_default_engine = PARSER_ENGINE
+
+
+def get_engine(name: str | None = None):
+    """Engine by name ("bs4" / "lxml"); defaults to ESTATELY_PARSER_ENGINE or `set_default_engine`."""
+    name = (name or _default_engine).lower()
+    eng = _engines.get(name)
+    if eng is None:
+        if name == "bs4":
+            eng = Bs4Engine()
+        elif name == "lxml":
+            from backend.estately.parsing_lxml import LxmlEngine
+            eng = LxmlEngine()
+        else:
+            raise ValueError(f"unknown parser engine: {name!r} (expected 'bs4' or 'lxml')")
+        _engines[name] = eng
+    return eng
+
+
+def set_default_engine(name: str) -> None:
+    """Switch the process-wide default engine (validated eagerly)."""
+    global _default_engine
+    get_engine(name)
+    _default_engine = name.lower()
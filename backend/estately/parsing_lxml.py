@@ -0,0 +1,419 @@
+# backend/estately/parsing_lxml.py
+"""
+lxml-native parsing engine. Mirrors parsing.py (the bs4 reference) dict for dict,
+but works on lxml's own tree with XPath compiled once per selector, so a card
+costs a handful of C-level queries instead of soupsieve walks in Python.
+
+Only the DOM access differs; selectors, regexes, JSON-LD merging and the final
+backfill/validity rules are imported from parsing.py. Differences between the two
+trees that matter for parity (which strings `get_text` skips, how `find(string=)`
+sees comments, tails surviving `decompose`) are reproduced here on purpose.
+"""
+import re
+from functools import lru_cache
+from urllib.parse import urljoin
+
+from lxml import etree
+
+from backend.estately.parsing import (
+    _ADDRESS_HINT,
+    _ADDRESS_SELECTORS,
+    _EXTENSION_UI,
+    _HTML_HREF_RE,
+    _JSONLD,
+    _LEGACY_CARDS,
+    _LINK_ATTR_NODES,
+    _LINK_ATTRS,
+    _LISTING_PATHS,
+    _LOCATION_RE,
+    _LOCATION_SELECTORS,
+    _PRICE_HINT,
+    _PRICE_SELECTORS,
+    _PRIMARY_CARD,
+    _SCRIPT_URL_RE,
+    _fill_missing,
+    _finish_card,
+    _first_price,
+    _is_extension_node,
+    _jsonld_record,
+    _merge_jsonld,
+    memoized_parse,
+    _parse_facts,
+    _sqft_tokens,
+    should_keep,
+)
+
+__all__ = ["LxmlEngine", "compile_css", "parse_card", "parse_card_with_text", "select_cards", "card_text"]
+
+
+# --- CSS -> XPath ------------------------------------------------------------
+# Covers the selector subset this package uses: type/universal, .class, #id,
+# [attr], [attr=|*=|^=|$=|~=||= 'value'], descendant and child combinators, and
+# comma groups. Anything else raises ValueError rather than silently mismatching.
+
+_COMPOUND_PART = re.compile(
+    r"""
+    (?P<tag>\*|[a-zA-Z][\w-]*)
+    | \.(?P<cls>[\w-]+)
+    | \#(?P<id>[\w-]+)
+    | \[\s*(?P<attr>[\w:-]+)\s*
+        (?:(?P<op>[*^$~|]?=)\s*(?:(?P<q>['"])(?P<val>.*?)(?P=q)|(?P<bare>[\w-]+))\s*)?
+      \]
+    """,
+    re.X,
+)
+_COMBINATOR = re.compile(r"\s*(>)\s*|\s+")
+_UPPER = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+
+def _literal(s: str) -> str:
+    if "'" not in s:
+        return f"'{s}'"
+    if '"' not in s:
+        return f'"{s}"'
+    raise ValueError(f"unsupported quote mix in selector value: {s!r}")
+
+
+def _attr_predicate(name: str, op: str | None, val: str | None) -> str:
+    name = name.lower()
+    ref = f"@{name}"
+    if op is None:
+        return ref
+    if name == "type":
+        # soupsieve matches `type` values case-insensitively in HTML documents
+        ref = f"translate(@type, '{_UPPER}', '{_UPPER.lower()}')"
+        val = val.lower()
+    lit = _literal(val)
+    if op == "=":
+        return f"{ref}={lit}"
+    if not val and op in ("*=", "^=", "$=", "~="):
+        return "false()"
+    if op == "*=":
+        return f"contains({ref}, {lit})"
+    if op == "^=":
+        return f"starts-with({ref}, {lit})"
+    if op == "$=":
+        return f"substring({ref}, string-length({ref}) - {len(val) - 1})={lit}"
+    if op == "~=":
+        return f"contains(concat(' ', normalize-space({ref}), ' '), {_literal(' ' + val + ' ')})"
+    if op == "|=":
+        return f"({ref}={lit} or starts-with({ref}, {_literal(val + '-')}))"
+    raise ValueError(f"unsupported attribute operator: {op}")
+
+
+def _split_groups(css: str) -> list[str]:
+    groups, depth, quote, start = [], 0, None, 0
+    for i, ch in enumerate(css):
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in "'\"":
+            quote = ch
+        elif ch == "[":
+            depth += 1
+        elif ch == "]":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            groups.append(css[start:i])
+            start = i + 1
+    groups.append(css[start:])
+    return [g.strip() for g in groups if g.strip()]
+
+
+def _group_xpath(group: str) -> str:
+    path, axis, pos = "", "descendant::", 0
+    while pos < len(group):
+        tag, preds = "*", []
+        start = pos
+        while pos < len(group):
+            m = _COMPOUND_PART.match(group, pos)
+            if not m or (m.group("tag") and pos != start):
+                break
+            if m.group("tag"):
+                tag = m.group("tag").lower()
+            elif m.group("cls"):
+                preds.append(f"contains(concat(' ', normalize-space(@class), ' '), ' {m.group('cls')} ')")
+            elif m.group("id"):
+                preds.append(f"@id={_literal(m.group('id'))}")
+            else:
+                val = m.group("val") if m.group("q") else m.group("bare")
+                preds.append(_attr_predicate(m.group("attr"), m.group("op"), val))
+            pos = m.end()
+        if pos == start:
+            raise ValueError(f"unsupported selector: {group!r}")
+        path += axis + tag + "".join(f"[{p}]" for p in preds)
+        if pos < len(group):
+            c = _COMBINATOR.match(group, pos)
+            if not c or c.end() == pos:
+                raise ValueError(f"unsupported selector: {group!r}")
+            axis = "/" if c.group(1) else "/descendant::"
+            pos = c.end()
+    return path
+
+
+@lru_cache(maxsize=512)
+def compile_css(css: str, first: bool = False) -> etree.XPath:
+    """
+    Compile a CSS selector to an XPath evaluated relative to (and excluding) the
+    context node, matching soupsieve's `select` order. `first=True` yields at most
+    the first match in document order, like `select_one`.
+    """
+    expr = " | ".join(_group_xpath(g) for g in _split_groups(css))
+    if first:
+        expr = f"({expr})[1]"
+    return etree.XPath(expr, smart_strings=False)
+
+
+# --- text --------------------------------------------------------------------
+
+# bs4 files strings under these tags as Script/Stylesheet/... and `get_text` skips them;
+# comments are skipped too (text() doesn't return them).
+_VISIBLE_TEXT = etree.XPath(
+    "descendant::text()[not(ancestor::script or ancestor::style or ancestor::template"
+    " or ancestor::rt or ancestor::rp)]",
+    smart_strings=False,
+)
+# `find(string=...)` on the other hand sees every string, comments included
+_ALL_STRINGS = etree.XPath("descendant::text() | descendant::comment()", smart_strings=False)
+
+
+def card_text(el) -> str:
+    """Equivalent of bs4's `el.get_text(" ", strip=True)`."""
+    return " ".join(s for s in (t.strip() for t in _VISIBLE_TEXT(el)) if s)
+
+
+def _text(el):
+    if el is None:
+        return None
+    return card_text(el)
+
+
+def _first_string(el, pattern: re.Pattern) -> str | None:
+    for node in _ALL_STRINGS(el):
+        s = node if isinstance(node, str) else (node.text or "")
+        if pattern.search(s):
+            return s
+    return None
+
+
+def _pick(card, selectors: list[str]):
+    for sel in selectors:
+        hit = compile_css(sel, first=True)(card)
+        if hit:
+            return hit[0]
+    return None
+
+
+def _select_one(el, css: str):
+    hit = compile_css(css, first=True)(el)
+    return hit[0] if hit else None
+
+
+# --- sanitation / href helpers ------------------------------------------------
+
+_REMOVED_MARK = "data-estately-removed"
+
+
+def _strip_extension_ui(root):
+    """Like `decompose()`: drop extension nodes but keep the text that followed them as its own string."""
+    for node in compile_css(_EXTENSION_UI)(root):
+        parent = node.getparent()
+        if parent is None:
+            continue
+        node.set(_REMOVED_MARK, "")
+        if node.tail:
+            # A processing instruction keeps the tail a separate text node (as bs4 does)
+            # without contributing text, attributes or a tag name that selectors could match.
+            pi = etree.ProcessingInstruction("removed")
+            pi.tail = node.tail
+            parent.replace(node, pi)
+        else:
+            parent.remove(node)
+    return root
+
+
+def _in_extension_ui(el) -> bool:
+    node = el
+    while node is not None:
+        if isinstance(node.tag, str) and _is_extension_node(node.tag, node.get("id"), node.get("class") or ""):
+            return True
+        node = node.getparent()
+    return False
+
+
+def _first_valid_anchor(card) -> str | None:
+    anchors = compile_css("a[href]")(card)
+    for a in anchors:
+        href = a.get("href")
+        if not href or _in_extension_ui(a):
+            continue
+        if any(p in href for p in _LISTING_PATHS):
+            return urljoin("https://www.estately.com/", href)
+    for a in anchors:
+        href = a.get("href")
+        if href and not _in_extension_ui(a):
+            return urljoin("https://www.estately.com/", href)
+    return None
+
+
+def _extract_href(card) -> str | None:
+    href = _first_valid_anchor(card)
+    if href:
+        return href
+
+    candidate = next((el for el in compile_css(_LINK_ATTR_NODES)(card) if not _in_extension_ui(el)), None)
+    if candidate is not None:
+        for attr in _LINK_ATTRS:
+            v = candidate.get(attr)
+            if v:
+                return urljoin("https://www.estately.com/", v)
+
+    for s in compile_css(f"{_JSONLD}, script")(card):
+        if _in_extension_ui(s):
+            continue
+        m = _SCRIPT_URL_RE.search(s.text or "")
+        if m:
+            return urljoin("https://www.estately.com/", m.group("u"))
+
+    m = _HTML_HREF_RE.search(etree.tostring(card, encoding="unicode", method="html", with_tail=False))
+    if m:
+        return urljoin("https://www.estately.com/", m.group(1))
+    return None
+
+
+def _jsonld_from_card(card) -> dict | None:
+    script = _select_one(card, _JSONLD)
+    if script is None:
+        return None
+    return _merge_jsonld(script.text)
+
+
+def _is_probable_card(el) -> bool:
+    if _in_extension_ui(el):
+        return False
+    if _select_one(el, _JSONLD) is not None or _select_one(el, _ADDRESS_HINT) is not None:
+        return True
+    return _select_one(el, _PRICE_HINT) is not None and _select_one(el, "a[href]") is not None
+
+
+# --- public ------------------------------------------------------------------
+
+def select_cards(root) -> list:
+    """lxml counterpart of `parsing.select_cards`."""
+    if isinstance(root, etree._ElementTree):
+        root = root.getroot()
+    if root is None or not isinstance(root.tag, str):
+        return []
+    _strip_extension_ui(root)
+    cards = compile_css(_PRIMARY_CARD)(root) or compile_css(_LEGACY_CARDS)(root)
+    return [el for el in cards if _is_probable_card(el)]
+
+
+def _ensure_attached(card) -> None:
+    top = card
+    for top in card.iterancestors():
+        pass
+    if top.get(_REMOVED_MARK) is not None:
+        # bs4 raises on a decomposed tag (e.g. an anchor inside extension UI an earlier card stripped)
+        raise ValueError("card was removed with browser-extension UI")
+
+
+def parse_card(card, text: str | None = None) -> dict:
+    """lxml counterpart of `parsing.parse_card`; returns the same dict for the same markup."""
+    _ensure_attached(card)
+    _strip_extension_ui(card)
+    ld = _jsonld_from_card(card)
+    out = _jsonld_record(ld)
+
+    if not out["address"]:
+        out["address"] = _text(_pick(card, _ADDRESS_SELECTORS))
+
+    if not (out["city"] and out["state"]):
+        loc_el = _pick(card, _LOCATION_SELECTORS)
+        city = state = zipc = None
+        if loc_el is not None:
+            m = _LOCATION_RE.match(card_text(loc_el))
+            if m:
+                city, state, zipc = m.group(1), m.group(2), m.group(3)
+            else:
+                city = _text(_select_one(card, "[itemprop='addressLocality']")) or city
+                state = _text(_select_one(card, "[itemprop='addressRegion']")) or state
+                zipc = _text(_select_one(card, "[itemprop='postalCode']")) or zipc
+        _fill_missing(out, {"city": city, "state": state, "zip": zipc})
+
+    if out["price"] is None:
+        price_el = _pick(card, _PRICE_SELECTORS)
+        price_txt = None
+        if price_el is not None:
+            price_txt = price_el.get("content") if price_el.tag.lower() == "meta" else card_text(price_el)
+        out["price"] = _first_price(price_txt)
+
+    if out["beds"] is None or out["baths"] is None or out["sqft"] is None:
+        facts: dict = {}
+        _parse_facts(facts, card_text(card) if text is None else text, _first_string(card, _sqft_tokens))
+        _fill_missing(out, facts)
+
+    if not out["href"]:
+        out["href"] = _extract_href(card)
+    return _finish_card(out, ld)
+
+
+def parse_card_with_text(card) -> tuple[dict, str]:
+    """lxml counterpart of `parsing.parse_card_with_text`."""
+    _strip_extension_ui(card)
+    text = card_text(card)
+    return parse_card(card, text=text), text
+
+
+def parse_all_cards(html: str) -> list[dict]:
+    return [r for r in (parse_card(c) for c in select_cards(LxmlEngine().document(html))) if should_keep(r)]
+
+
+class LxmlEngine:
+    """Engine facade over lxml trees (see `parsing.Bs4Engine` for the shared surface)."""
+
+    name = "lxml"
+
+    def document(self, html):
+        if isinstance(html, str):
+            try:
+                root = etree.fromstring(html, etree.HTMLParser())
+            except ValueError:
+                # str with an encoding declaration; lxml wants bytes for that
+                root = etree.fromstring(html.encode("utf-8"), etree.HTMLParser(encoding="utf-8"))
+        else:
+            root = etree.fromstring(html, etree.HTMLParser())
+        if root is None:
+            root = etree.fromstring("<html></html>", etree.HTMLParser())
+        return root
+
+    def fragment(self, html: str):
+        root = self.document(html)
+        body = root.find("body")
+        return next(iter(body), body) if body is not None else root
+
+    def select(self, root, selector: str) -> list:
+        return compile_css(selector)(root)
+
+    def select_one(self, root, selector: str):
+        return _select_one(root, selector)
+
+    def text(self, el) -> str:
+        return card_text(el)
+
+    def parent(self, el):
+        return el.getparent()
+
+    def outer_html(self, el) -> str:
+        return etree.tostring(el, encoding="unicode", method="html", with_tail=False)
+
+    def select_cards(self, root) -> list:
+        return select_cards(root)
+
+    def parse_card(self, card) -> dict:
+        return parse_card(card)
+
+    def parse_with_text(self, card) -> tuple[dict, str]:
+        # Checked before the memo: a stripped card must raise even if its HTML was seen before
+        _ensure_attached(card)
+        return memoized_parse(self, card, parse_card_with_text)
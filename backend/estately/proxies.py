@@ -0,0 +1,200 @@
+import contextvars
+import os
+import random
+import time
+from pathlib import Path
+from typing import Iterable, Optional
+from urllib.parse import urlsplit
+
+# Comma/newline separated proxy URLs, and/or a file with one URL per line (# comments allowed).
+# When neither is set the pool is empty and every fetch uses DECODO_PROXY (or goes direct).
+PROXIES_ENV = os.getenv("ESTATELY_PROXIES", "")
+PROXY_FILE = os.getenv("ESTATELY_PROXY_FILE", "").strip()
+
+# EWMA smoothing for latency / error rate
+PROXY_EWMA_ALPHA = float(os.getenv("ESTATELY_PROXY_EWMA_ALPHA", "0.3"))
+# Eject an exit once its error EWMA passes this (after a few samples) ...
+PROXY_EJECT_ERROR_RATE = float(os.getenv("ESTATELY_PROXY_EJECT_ERROR_RATE", "0.5"))
+PROXY_MIN_SAMPLES = int(os.getenv("ESTATELY_PROXY_MIN_SAMPLES", "3"))
+# ... or once its latency EWMA is this many times the pool median
+PROXY_EJECT_SLOWDOWN = float(os.getenv("ESTATELY_PROXY_EJECT_SLOWDOWN", "4"))
+# First ejection lasts this long; repeat offenders double up to the max
+PROXY_EJECT_SECONDS = float(os.getenv("ESTATELY_PROXY_EJECT_SECONDS", "60"))
+PROXY_EJECT_MAX_SECONDS = float(os.getenv("ESTATELY_PROXY_EJECT_MAX_SECONDS", "900"))
+# Successes needed on probation before an exit is trusted again
+PROXY_PROBATION_SUCCESSES = int(os.getenv("ESTATELY_PROXY_PROBATION_SUCCESSES", "3"))
+
+# Market being scraped by the current task; lets fetches stick to one exit per market.
+current_market: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("estately_market", default=None)
+
+ACTIVE, PROBATION, EJECTED = "active", "probation", "ejected"
+
+
+def redact_proxy(proxy: str) -> str:
+    """Hide credentials in a proxy URL for logging."""
+    parts = urlsplit(proxy or "")
+    if not parts.hostname:
+        return proxy or ""
+    port = f":{parts.port}" if parts.port else ""
+    return f"{parts.scheme}://{parts.hostname}{port}"
+
+
+class ProxyEndpoint:
+    """One exit node plus its health: latency/error EWMAs and ejection state."""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.latency_ewma: Optional[float] = None
+        self.error_ewma = 0.0
+        self.samples = 0
+        self.successes = 0
+        self.failures = 0
+        self.state = ACTIVE
+        self.ejected_until = 0.0
+        self.ejections = 0
+        self.probation_successes = 0
+
+    def score(self) -> float:
+        """Selection weight: fast and reliable exits score high; probation gets a trickle."""
+        latency = self.latency_ewma if self.latency_ewma is not None else 1.0
+        weight = 1.0 / (max(latency, 0.05) * (1.0 + 4.0 * self.error_ewma))
+        if self.state == PROBATION:
+            weight *= 0.1
+        return weight
+
+    def stats(self) -> dict:
+        return {
+            "proxy": redact_proxy(self.url),
+            "state": self.state,
+            "latency_ms": None if self.latency_ewma is None else round(self.latency_ewma * 1000),
+            "error_rate": round(self.error_ewma, 3),
+            "ok": self.successes,
+            "failed": self.failures,
+            "ejections": self.ejections,
+        }
+
+
+class ProxyPool:
+    """
+    Health-scored pool of proxy exits.
+
+    `choose(market)` returns the market's sticky exit while it stays healthy,
+    otherwise a weighted-random pick among active/probation exits. `report()`
+    feeds back each request's outcome: exits whose error EWMA climbs past
+    PROXY_EJECT_ERROR_RATE, or whose latency drifts far above the pool median,
+    are ejected for a backoff period and then return on probation.
+    """
+
+    def __init__(self, urls: Iterable[str], rng: Optional[random.Random] = None):
+        self.endpoints: list[ProxyEndpoint] = []
+        seen = set()
+        for u in urls:
+            u = (u or "").strip()
+            if u and u not in seen:
+                seen.add(u)
+                self.endpoints.append(ProxyEndpoint(u))
+        self._sticky: dict[str, ProxyEndpoint] = {}
+        self._rng = rng or random.Random()
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    def _refresh_states(self) -> None:
+        now = time.monotonic()
+        for ep in self.endpoints:
+            if ep.state == EJECTED and now >= ep.ejected_until:
+                ep.state = PROBATION
+                ep.probation_successes = 0
+
+    def choose(self, market: Optional[str] = None) -> Optional[ProxyEndpoint]:
+        if not self.endpoints:
+            return None
+        self._refresh_states()
+        if market:
+            ep = self._sticky.get(market)
+            if ep is not None and ep.state == ACTIVE:
+                return ep
+        candidates = [ep for ep in self.endpoints if ep.state != EJECTED]
+        if not candidates:
+            # Everything is ejected: use whichever exit comes back soonest rather than stall
+            candidates = [min(self.endpoints, key=lambda e: e.ejected_until)]
+        weights = [ep.score() for ep in candidates]
+        ep = self._rng.choices(candidates, weights=weights, k=1)[0]
+        if market and ep.state == ACTIVE:
+            self._sticky[market] = ep
+        return ep
+
+    def report(self, ep: ProxyEndpoint, ok: bool, latency: Optional[float] = None) -> None:
+        ep.samples += 1
+        a = PROXY_EWMA_ALPHA
+        ep.error_ewma = (1 - a) * ep.error_ewma + a * (0.0 if ok else 1.0)
+        if ok:
+            ep.successes += 1
+            if latency is not None:
+                ep.latency_ewma = latency if ep.latency_ewma is None else (1 - a) * ep.latency_ewma + a * latency
+            if ep.state == PROBATION:
+                ep.probation_successes += 1
+                if ep.probation_successes >= PROXY_PROBATION_SUCCESSES:
+                    ep.state = ACTIVE
+                    ep.error_ewma = 0.0
+        else:
+            ep.failures += 1
+            if ep.state == PROBATION:
+                self._eject(ep)
+                return
+        if ep.state == ACTIVE and ep.samples >= PROXY_MIN_SAMPLES:
+            if ep.error_ewma > PROXY_EJECT_ERROR_RATE or self._too_slow(ep):
+                self._eject(ep)
+
+    def _too_slow(self, ep: ProxyEndpoint) -> bool:
+        latencies = sorted(e.latency_ewma for e in self.endpoints if e.latency_ewma is not None and e.state != EJECTED)
+        if len(latencies) < 3 or ep.latency_ewma is None:
+            return False
+        median = latencies[len(latencies) // 2]
+        return ep.latency_ewma > median * PROXY_EJECT_SLOWDOWN
+
+    def _eject(self, ep: ProxyEndpoint) -> None:
+        # Never eject the last usable exit
+        if sum(1 for e in self.endpoints if e.state != EJECTED) <= 1:
+            return
+        ep.ejections += 1
+        ep.state = EJECTED
+        ep.ejected_until = time.monotonic() + min(
+            PROXY_EJECT_MAX_SECONDS, PROXY_EJECT_SECONDS * (2 ** (ep.ejections - 1))
+        )
+        for market, sticky in list(self._sticky.items()):
+            if sticky is ep:
+                del self._sticky[market]
+
+    def stats(self) -> list[dict]:
+        return [ep.stats() for ep in self.endpoints]
+
+
+def load_proxy_urls(env_value: str = PROXIES_ENV, file_path: str = PROXY_FILE) -> list[str]:
+    urls = [u.strip() for chunk in env_value.splitlines() for u in chunk.split(",") if u.strip()]
+    if file_path:
+        try:
+            for line in Path(file_path).expanduser().read_text(encoding="utf-8").splitlines():
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    urls.append(line)
+        except FileNotFoundError:
+            pass
+    return urls
+
+
+_pool: Optional[ProxyPool] = None
+
+
+def get_proxy_pool() -> ProxyPool:
+    """Process-wide pool built from ESTATELY_PROXIES / ESTATELY_PROXY_FILE (empty → default proxy only)."""
+    global _pool
+    if _pool is None:
+        _pool = ProxyPool(load_proxy_urls())
+    return _pool
+
+
+def set_proxy_pool(pool: ProxyPool) -> None:
+    """Install a custom pool (e.g. local stand-in proxies)."""
+    global _pool
+    _pool = pool
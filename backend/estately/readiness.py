@@ -0,0 +1,134 @@
+import asyncio
+import os
+import time
+
+from backend.estately.interception import is_data_url
+from backend.estately.parsing import CARD_SELECTORS
+
+# "event" waits for the data response and a settled card count; "fixed" keeps the old
+# sleeps, selector polling and scroll loops (for comparison, or if a skin change fools the detector)
+READY_MODE = os.getenv("ESTATELY_READY_MODE", "event").strip().lower() or "event"
+# Card count unchanged for this long counts as settled
+READY_QUIET_MS = int(os.getenv("ESTATELY_READY_QUIET_MS", "400"))
+# Give up waiting (and snapshot whatever rendered) after this long
+READY_TIMEOUT_MS = int(os.getenv("ESTATELY_READY_TIMEOUT_MS", "15000"))
+# How often the page's counter is read
+READY_POLL_MS = int(os.getenv("ESTATELY_READY_POLL_MS", "100"))
+# One scroll to the bottom once settled, so lazily rendered cards get a chance to appear
+READY_SCROLL = os.getenv("ESTATELY_READY_SCROLL", "1").lower() in {"1", "true", "yes"}
+
+# Keeps window.__estatelyCards = {count, changedAt}. The observer only marks the DOM
+# dirty; the count is recomputed at most once per frame and changedAt moves only
+# when the count does, so tickers and ads re-rendering don't keep the page "busy".
+_COUNTER_JS = """
+(selector) => {
+  if (window.__estatelyCards) return window.__estatelyCards.count;
+  const state = window.__estatelyCards = {count: 0, changedAt: performance.now()};
+  const recount = () => {
+    state.pending = false;
+    const n = document.querySelectorAll(selector).length;
+    if (n !== state.count) { state.count = n; state.changedAt = performance.now(); }
+  };
+  recount();
+  new MutationObserver(() => {
+    if (!state.pending) { state.pending = true; requestAnimationFrame(recount); setTimeout(recount, 50); }
+  }).observe(document.documentElement, {childList: true, subtree: true});
+  return state.count;
+}
+"""
+_READ_JS = """
+() => {
+  const s = window.__estatelyCards;
+  return s ? [s.count, performance.now() - s.changedAt] : [0, 0];
+}
+"""
+
+
+class PageReadiness:
+    """
+    Decides when a navigated results page is ready to snapshot.
+
+    Create it before `page.goto` so a data response that lands before
+    domcontentloaded is not missed. `wait()` returns once a listing-data response
+    (see interception.DATA_URL_HINTS) has arrived or cards are on the page, no
+    data request is still in flight, and neither the card count nor the data
+    responses have changed for READY_QUIET_MS. With READY_SCROLL, one scroll to the bottom follows and the
+    page must settle again, which covers a lazy batch it triggers. It gives up
+    after READY_TIMEOUT_MS.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.data_seen = False
+        self._in_flight: set = set()
+        self._data_at = 0.0
+        self.cards = 0
+        self.waited_ms = 0.0
+        self.reason = ""
+        page.on("request", self._on_request)
+        page.on("requestfinished", self._on_done)
+        page.on("requestfailed", self._on_failed)
+
+    @staticmethod
+    def _is_data(request) -> bool:
+        try:
+            return request.resource_type in {"xhr", "fetch"} and is_data_url(request.url)
+        except Exception:
+            return False
+
+    def _on_request(self, request) -> None:
+        if self._is_data(request):
+            self._in_flight.add(request)
+
+    def _on_done(self, request) -> None:
+        if request in self._in_flight:
+            self._in_flight.discard(request)
+            self.data_seen = True
+            self._data_at = time.monotonic()
+
+    def _on_failed(self, request) -> None:
+        self._in_flight.discard(request)
+
+    def close(self) -> None:
+        for event, handler in (("request", self._on_request), ("requestfinished", self._on_done),
+                               ("requestfailed", self._on_failed)):
+            try:
+                self.page.remove_listener(event, handler)
+            except Exception:
+                pass
+
+    async def _settled(self, deadline: float) -> bool:
+        """Poll until data/cards are present and the count is quiet; False on deadline."""
+        while time.monotonic() < deadline:
+            count, quiet_ms = await self.page.evaluate(_READ_JS)
+            self.cards = int(count)
+            # A fresh response gets the same quiet window to turn into cards
+            if self._data_at:
+                quiet_ms = min(quiet_ms, (time.monotonic() - self._data_at) * 1000)
+            if (self.data_seen or self.cards) and not self._in_flight and quiet_ms >= READY_QUIET_MS:
+                return True
+            await asyncio.sleep(READY_POLL_MS / 1000)
+        return False
+
+    async def wait(self) -> bool:
+        """True when the page settled, False when the deadline passed first (the caller snapshots anyway)."""
+        started = time.monotonic()
+        deadline = started + READY_TIMEOUT_MS / 1000
+        try:
+            await self.page.evaluate(_COUNTER_JS, ", ".join(CARD_SELECTORS))
+            ok = await self._settled(deadline)
+            if ok and READY_SCROLL:
+                before = self.cards
+                await self.page.evaluate("window.scrollBy(0, document.body.scrollHeight)")
+                # Long enough for a lazy batch's request to start (then it is in flight) or its cards to render
+                await asyncio.sleep(READY_POLL_MS / 1000)
+                ok = await self._settled(deadline)
+                self.reason = f"settled at {self.cards} cards" + (f" (+{self.cards - before} after scroll)" if self.cards > before else "")
+            else:
+                self.reason = f"settled at {self.cards} cards" if ok else f"deadline with {self.cards} cards"
+        except Exception as e:
+            # Page navigated or closed under us; snapshot whatever is there
+            ok = False
+            self.reason = f"gave up: {e.__class__.__name__}"
+        self.waited_ms = (time.monotonic() - started) * 1000
+        return ok
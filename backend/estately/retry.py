@@ -0,0 +1,211 @@
+import os
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import httpx
+from tenacity import AsyncRetrying, RetryCallState, stop_after_attempt, wait_random_exponential
+
+# Attempts per request (first try included) and jittered exponential backoff bounds (seconds)
+RETRY_ATTEMPTS = int(os.getenv("ESTATELY_RETRY_ATTEMPTS", "3"))
+RETRY_BASE = float(os.getenv("ESTATELY_RETRY_BASE", "0.5"))
+RETRY_MAX_WAIT = float(os.getenv("ESTATELY_RETRY_MAX_WAIT", "20"))
+# Retries may add at most this fraction of successful requests as extra load (+ a small floor)
+RETRY_BUDGET_RATIO = float(os.getenv("ESTATELY_RETRY_BUDGET_RATIO", "0.2"))
+RETRY_BUDGET_FLOOR = float(os.getenv("ESTATELY_RETRY_BUDGET_FLOOR", "10"))
+# Circuit breaker: consecutive failures that open it, and how long it stays open before a probe
+BREAKER_FAILURES = int(os.getenv("ESTATELY_BREAKER_FAILURES", "8"))
+BREAKER_COOLDOWN = float(os.getenv("ESTATELY_BREAKER_COOLDOWN", "60"))
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request while the host's circuit is open."""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"circuit open for {host}; retry in {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+class RetryBudget:
+    """
+    Caps retries to a fraction of successful traffic so an outage can't multiply
+    load: every success earns `ratio` tokens, every retry spends one, and `floor`
+    tokens are available up front.
+    """
+
+    def __init__(self, ratio: float = RETRY_BUDGET_RATIO, floor: float = RETRY_BUDGET_FLOOR):
+        self.ratio = ratio
+        self.floor = floor
+        self.tokens = floor
+        self.spent = 0
+        self.denied = 0
+
+    def record_success(self) -> None:
+        # Earned tokens are capped so a long quiet spell can't bank an unlimited retry storm
+        self.tokens = min(self.floor + 100 * self.ratio, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.tokens >= 1:
+            self.tokens -= 1
+            self.spent += 1
+            return True
+        self.denied += 1
+        return False
+
+
+class CircuitBreaker:
+    """
+    Per-host breaker. After BREAKER_FAILURES consecutive failed attempts it opens
+    and requests fail fast with CircuitOpenError; after `cooldown` one probe is
+    let through (half-open) and its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+
+    def __init__(self, host: str, threshold: int = BREAKER_FAILURES, cooldown: float = BREAKER_COOLDOWN):
+        self.host = host
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trips = 0
+        self._probe_out = False
+
+    def before_request(self) -> None:
+        if self.state == self.OPEN:
+            waited = time.monotonic() - self.opened_at
+            if waited < self.cooldown:
+                raise CircuitOpenError(self.host, self.cooldown - waited)
+            self.state = self.HALF_OPEN
+            self._probe_out = False
+        if self.state == self.HALF_OPEN:
+            if self._probe_out:
+                raise CircuitOpenError(self.host, 0)
+            self._probe_out = True
+
+    def record(self, ok: bool) -> None:
+        if ok:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probe_out = False
+            return
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+            if self.state != self.OPEN:
+                self.trips += 1
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._probe_out = False
+
+    def release_probe(self) -> None:
+        """The half-open probe ended without a verdict (e.g. cancelled); let another one through."""
+        self._probe_out = False
+
+    def is_open(self) -> bool:
+        return self.state == self.OPEN and (time.monotonic() - self.opened_at) < self.cooldown
+
+
+def _is_failure_exception(e: BaseException) -> bool:
+    return isinstance(e, httpx.TransportError)
+
+
+def _is_failure_status(status: int) -> bool:
+    # 429 is throttling (the limiter's business), not an outage
+    return status >= 500
+
+
+def _retry_after_seconds(r: httpx.Response) -> Optional[float]:
+    raw = r.headers.get("retry-after")
+    if not raw:
+        return None
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(raw).timestamp() - time.time())
+    except Exception:
+        return None
+
+
+class RetryPolicy:
+    """
+    Jittered exponential retry (via tenacity) for transport errors and
+    429/5xx answers, honoring Retry-After, gated by a shared RetryBudget and
+    per-host CircuitBreakers.
+    """
+
+    def __init__(self, attempts: int = RETRY_ATTEMPTS, budget: Optional[RetryBudget] = None):
+        self.attempts = max(1, attempts)
+        self.budget = budget or RetryBudget()
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self._backoff = wait_random_exponential(multiplier=RETRY_BASE, max=RETRY_MAX_WAIT)
+
+    def breaker(self, host: str) -> CircuitBreaker:
+        br = self.breakers.get(host)
+        if br is None:
+            br = self.breakers[host] = CircuitBreaker(host)
+        return br
+
+    def _wait(self, state: RetryCallState) -> float:
+        outcome = state.outcome
+        if outcome is not None and not outcome.failed:
+            after = _retry_after_seconds(outcome.result())
+            if after is not None:
+                return min(after, RETRY_MAX_WAIT * 3)
+        return self._backoff(state)
+
+    def _should_retry(self, state: RetryCallState) -> bool:
+        outcome = state.outcome
+        # The last attempt's outcome is final: asking the budget would spend a token on no retry
+        if outcome is None or state.attempt_number >= self.attempts:
+            return False
+        if outcome.failed:
+            e = outcome.exception()
+            if isinstance(e, CircuitOpenError) or not _is_failure_exception(e):
+                return False
+        elif outcome.result().status_code not in RETRYABLE_STATUSES:
+            return False
+        return self.budget.try_spend()
+
+    async def call(self, host: str, attempt):
+        """Run `attempt()` (returning an httpx.Response) under the breaker and retry policy for `host`."""
+        breaker = self.breaker(host)
+
+        async def _one():
+            breaker.before_request()
+            try:
+                r = await attempt()
+            except BaseException as e:
+                if _is_failure_exception(e):
+                    breaker.record(False)
+                else:
+                    breaker.release_probe()
+                raise
+            breaker.record(not _is_failure_status(r.status_code))
+            if r.status_code < 400:
+                self.budget.record_success()
+            return r
+
+        retrying = AsyncRetrying(
+            stop=stop_after_attempt(self.attempts),
+            wait=self._wait,
+            retry=self._should_retry,
+            # Out of attempts: hand back the last response (e.g. a 503) or re-raise the last error
+            retry_error_callback=lambda state: state.outcome.result(),
+        )
+        return await retrying(_one)
+
+    def stats(self) -> dict:
+        return {
+            "retries": self.budget.spent,
+            "retries_denied": self.budget.denied,
+            "breakers": {h: {"state": b.state, "trips": b.trips} for h, b in self.breakers.items()},
+        }
+
+
+policy = RetryPolicy()
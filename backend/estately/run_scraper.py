@@ -4,7 +4,11 @@ import json
 import csv
 import logging
 from dataclasses import asdict, is_dataclass
-from .scraper import collect_estately
+# Only light modules at import time: with spawned parse workers this file is
+# re-run as __mp_main__ in every worker, so the scraper (Mongo client, Playwright)
+# is imported inside main() instead.
+from .interception import BLOCK_MODES
+from .parse_pool import PARSE_MODES
 import csv
 from pathlib import Path
 
@@ -26,6 +30,18 @@ def parse_args():
     p.add_argument("--output", help="Optional path to save results as .json or .csv")
     p.add_argument("--print-details", action="store_true", help="Print each property row to stdout")
     p.add_argument("--verbose", action="store_true", help="Enable verbose logging for the estately scraper")
+    p.add_argument("--market-concurrency", type=int, default=8, help="Markets scraped at once; request pacing per host is adaptive")
+    p.add_argument("--http2", action="store_true", default=None, help="Multiplex requests over HTTP/2 (falls back to HTTP/1.1 if the proxy can't)")
+    p.add_argument("--h2-max-streams", type=int, default=None, help="Max in-flight requests per host in HTTP/2 mode")
+    p.add_argument("--parser-engine", choices=["bs4", "lxml"], default=None, help="Card parser (default: ESTATELY_PARSER_ENGINE or bs4)")
+    p.add_argument("--parse-mode", choices=list(PARSE_MODES), default=None, help="Where pages are parsed (default: ESTATELY_PARSE_MODE or process)")
+    p.add_argument("--parse-workers", type=int, default=None, help="Parse pool size (default: ESTATELY_PARSE_WORKERS or CPU count)")
+    p.add_argument("--map-api", action="store_true", default=None, help="Crawl markets via /map/properties JSON over HTTP; the browser/page scrapers only run when its shape check fails")
+    p.add_argument("--page-lookahead", type=int, default=None, help="Result pages fetched ahead of the one being parsed in HTTP-only mode, 0 = off (default: ESTATELY_PAGE_LOOKAHEAD or 1)")
+    p.add_argument("--browsers", type=int, default=None, help="Warm browsers shared by all markets (default: ESTATELY_BROWSERS or 2)")
+    p.add_argument("--browser-max-uses", type=int, default=None, help="Markets a browser serves before it is relaunched (default: ESTATELY_BROWSER_MAX_USES or 25)")
+    p.add_argument("--block-resources", choices=list(BLOCK_MODES), default=None, help="Abort images/fonts/CSS/trackers in browser pages, or only report them (default: ESTATELY_BLOCK_RESOURCES or on)")
+    p.add_argument("--browser-max-pages", type=int, default=None, help="Pages open at once across the pool (default: ESTATELY_BROWSER_MAX_PAGES or 8)")
 
     # NEW: CSV-driven market loading
     from pathlib import Path
@@ -95,6 +111,18 @@ def load_markets_from_csv(csv_path: str | Path, per_state: int | None = None, ma
 
 
 async def main():
+    from .scraper import collect_estately, configure_page_lookahead, prefetch_stats, singleflight_stats, walker_stats
+    from .browser_pool import close_browser_pool, configure_browser_pool, get_browser_pool
+    from .interception import configure_request_filter, get_request_filter
+    from .map_api import map_api_state
+    from .parse_pool import close_parse_executor, configure_parse_executor, get_parse_executor
+    from .client import configure_clients, close_clients
+    from .cache import get_card_memo, get_response_cache
+    from .limiter import limiter_state
+    from .proxies import get_proxy_pool
+    from .retry import policy as retry_policy
+    from .parsing import set_default_engine
+
     args = parse_args()
 
     if args.verbose:
@@ -107,15 +135,33 @@ async def main():
         markets = load_markets_from_csv(args.markets_file, per_state=args.per_state, max_markets=args.max_markets)
         print(f"📍 Auto-loaded {len(markets)} markets from {args.markets_file}")
 
-    import random
+    # Markets in flight only bounds memory/browsers; the per-host AIMD limiter paces the actual requests
+    concurrency = max(1, args.market_concurrency)
+    # Shared HTTP pools are sized for this many markets in flight and reused for the whole run
+    configure_clients(concurrency, http2=args.http2, max_streams=args.h2_max_streams)
+    if args.parser_engine:
+        set_default_engine(args.parser_engine)
+    if args.parse_mode or args.parse_workers:
+        configure_parse_executor(args.parse_mode or get_parse_executor().mode, args.parse_workers)
+    if args.map_api:
+        map_api_state.enabled = True
+    if args.page_lookahead is not None:
+        configure_page_lookahead(args.page_lookahead)
+    configure_browser_pool(args.browsers, args.browser_max_uses, args.browser_max_pages)
+    if args.block_resources:
+        configure_request_filter(args.block_resources)
 
-    CONCURRENCY = 5  # tweak 3–8 depending on how aggressive you want to be
+    def log_limiter():
+        for st in limiter_state():
+            logging.getLogger("estately").info(
+                "LIMITER %s | window=%s rate=%s/s in_flight=%s latency=%sms ok=%s rejected=%s timeouts=%s cuts=%s",
+                st["host"], st["window"], st["rate"], st["in_flight"], st["latency_ms"],
+                st["successes"], st["rejections"], st["timeouts"], st["decreases"],
+            )
 
     async def scrape_one(m):
         print(f"\n🔍 Scraping Estately for {m} ...")
         try:
-            # Random stagger to be polite / avoid bursty traffic
-            await asyncio.sleep(random.uniform(0.3, 1.3))
             props = await collect_estately(
                 market=m,
                 max_pages=args.pages,
@@ -130,14 +176,54 @@ async def main():
         except Exception as e:
             print(f"❌ Error scraping {m}: {e}")
             return []
+        finally:
+            log_limiter()
 
-    sem = asyncio.Semaphore(CONCURRENCY)
+    sem = asyncio.Semaphore(concurrency)
 
     async def bound_scrape(m):
         async with sem:
             return await scrape_one(m)
 
-    results = await asyncio.gather(*(bound_scrape(m) for m in markets))
+    try:
+        results = await asyncio.gather(*(bound_scrape(m) for m in markets))
+    finally:
+        await close_clients()
+        await close_browser_pool()
+        close_parse_executor()
+        st = singleflight_stats()
+        print(f"🔁 Page fetches: {st['fetched']} downloaded, {st['joined_in_flight']} joined in flight, {st['reused_recent']} reused")
+        if prefetch_stats["started"]:
+            print(f"⏩ Page prefetch: {prefetch_stats['started']} started, {prefetch_stats['used']} used, {prefetch_stats['cancelled']} cancelled")
+        st = retry_policy.stats()
+        print(f"♻️  Retries: {st['retries']} used, {st['retries_denied']} denied by budget; breakers: {st['breakers']}")
+        st = map_api_state.stats()
+        if st["requests"]:
+            print(f"🗺️  Map API: {st['markets']} markets from {st['requests']} requests, {st['fallbacks']} fell back to page scraping")
+        st = get_browser_pool().stats()
+        if st["leases"]:
+            print(f"🌐 Browsers: {st['launched']} launched for {st['leases']} markets, {st['recycled']} recycled, {st['crashed']} crashed")
+            st = get_request_filter().stats()
+            if st["mode"] != "off":
+                by = ", ".join(f"{k}={v}" for k, v in sorted(st["blocked_by"].items())) or "none"
+                verb = "would block" if st["mode"] == "report" else "blocked"
+                print(f"🚫 Browser requests: {st['allowed']} allowed ({st['allowed_bytes'] / 1e6:.1f} MB), "
+                      f"{st['blocked']} {verb} ({by}; {st['blocked_bytes'] / 1e6:.1f} MB)")
+        st = get_parse_executor().stats()
+        print(f"🧮 Parsing: {st['tasks']} pages/blobs in {st['mode']} mode ({st['workers']} workers), {st['fallbacks']} pool fallbacks")
+        st = walker_stats()
+        if st["guided"] or st["generic"]:
+            print(f"🧭 JSON walks: {st['guided']} guided by learned paths, {st['generic']} full, {st['shapes']} shapes")
+        memo = get_card_memo()
+        if memo is not None:
+            print(f"🧩 Card memo: {memo.hits} hits, {memo.misses} parsed")
+            memo.close()
+        for st in get_proxy_pool().stats():
+            print(f"🛰️  Proxy {st['proxy']}: {st['state']} latency={st['latency_ms']}ms errors={st['error_rate']} ok={st['ok']} failed={st['failed']} ejections={st['ejections']}")
+        cache = get_response_cache()
+        if cache is not None:
+            print(f"🗄️  Response cache: {cache.hits} fresh hits, {cache.revalidated} revalidated (304), {cache.misses} downloads")
+            cache.close()
     all_props = [p for batch in results for p in batch]
 
     props = all_props  # keep the rest of your print/save logic below exactly as-is
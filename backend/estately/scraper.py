@@ -1,15 +1,61 @@
 from typing import List, Optional
-from bs4 import BeautifulSoup
 import logging
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s | %(levelname)s | %(message)s"
 )
 log = logging.getLogger("estately")
-from backend.estately.client import new_client
+from backend.estately.client import fetch
+from backend.estately.cache import get_bounds_cache, get_response_cache, get_canonical_cache
+from backend.estately.limiter import limiter
+from backend.estately.retry import policy as retry_policy
+from backend.estately.proxies import current_market
+from backend.estately.streaming import STREAM_PARSE, stream_page
+from backend.estately.singleflight import SingleFlight, normalize_url
+from backend.estately.harvest import (
+    _addr_from_any,
+    _coerce_float,
+    _extract_listings_from_json_blob,
+    _extract_listings_from_json_obj,
+    _href_from_any,
+    _json_hint,
+    _looks_active_for_sale,
+    _mine_inline_script_texts,
+    _mine_inline_scripts,
+    _price_from_any,
+    harvest_cards,
+    harvest_page,
+    peek_next_href,
+    walker_stats,
+)
+from backend.estately.parse_pool import run_parse
+from backend.estately.browser_pool import get_browser_pool
+from backend.estately.interception import get_request_filter, is_data_url
+from backend.estately.readiness import READY_MODE, PageReadiness
+from backend.estately.map_api import (
+    MAP_API_MAX_DEPTH,
+    MAP_API_MAX_REQUESTS,
+    MAP_API_TILE_CAP,
+    looks_like_map_payload,
+    map_api_state,
+    map_query_url,
+    market_bounds,
+    split_bounds,
+)
 from backend.estately.filters import build_search_url
+from backend.estately.parsing import CARD_SELECTORS, NEXT_LINK_SELECTOR, get_engine
+from backend.estately.analysis import (
+    ACTIVE_TOKENS,
+    DISTRESSED_KEYWORDS,
+    INACTIVE_TOKENS,
+    NEG_STATUS,
+    POS_STATUS_TOKENS,
+    CardAnalysis,
+    analyze,
+    status_hits,
+)
 try:
-    from backend.estately.parsing import parse_card  # type: ignore
+    from backend.estately.parsing import parse_card, parse_card_with_text  # type: ignore
 except Exception as _imp_err:
     log.warning("Falling back to basic parse_card due to import error: %s", _imp_err)
     import re
@@ -36,13 +82,16 @@ except Exception as _imp_err:
         )
         d["href"] = link_el["href"] if link_el and link_el.has_attr("href") else None
         return d
+
+    def parse_card_with_text(card) -> tuple[dict, str]:
+        return parse_card(card), card.get_text(" ", strip=True)
 from backend.py_models.property import PropertyCard
 
 import os
 import asyncio
 import json
 import re
-from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
+from urllib.parse import urljoin, urlparse, urlunparse, parse_qsl, urlencode
 
 # --- Helper: make_absolute ---
 def make_absolute(base: str, href: str) -> str:
@@ -65,7 +114,7 @@ async def _harvest_from_detail(url: str, min_price: int = 0, min_beds: int = 0,
 
     # Mine embedded JSON on the detail page; Estately is mostly client-rendered
     try:
-        cand = _mine_inline_scripts(html) or []
+        cand = await run_parse(_mine_inline_scripts, html) or []
     except Exception:
         cand = []
 
@@ -141,35 +190,164 @@ except Exception:
         PWError = Exception  # type: ignore
         _PLAYWRIGHT_AVAILABLE = False
 
+if _PLAYWRIGHT_AVAILABLE:
+    get_browser_pool().bind(launch_browser, new_page)
+
         
+async def _request_url(url: str) -> tuple[str, str | None, str]:
+    """(path without query, canonical path or None, URL to request): the canonical path with the original query re-attached."""
+    # Canonicalize the path then re-attach the original query so 301s don't drop filters
+    base_only = _strip_query(url)
+    canonical = None
+    try:
+        canonical = await resolve_canonical(base_only)
+        url = reattach_query(canonical, url)
+    except Exception as _canon_err:
+        if ESTATELY_DEBUG:
+            print(f"[estately] canonicalize failed; continuing with original: {_canon_err}")
+    return base_only, canonical, url
+
+
 async def _collect_http_only(url: str,
                              min_price: int,
                              min_beds: int,
                              min_sqft: int,
                              require_distressed: bool,
-                             require_no_hoa: bool) -> tuple[list[PropertyCard], list[dict], str | None]:
+                             require_no_hoa: bool,
+                             on_next=None,
+                             prefetched: Optional[asyncio.Task] = None) -> tuple[list[PropertyCard], list[dict], str | None]:
+    """
+    One search-results page over plain HTTP: (cards, Mongo docs, absolute next URL).
+    `on_next(next_url)` is called as soon as the next link is known, before this
+    page is parsed and gated, so a `PagePrefetcher` can start downloading it.
+    `prefetched` is that prefetcher's task for this page (see `PagePrefetcher.take`).
+    """
     results_out: list[PropertyCard] = []
     mongo_docs_out: list[dict] = []
-    # Canonicalize the path then re-attach the original query so 301s don't drop filters
+    base_only, canonical, url = await _request_url(url)
+    if prefetched is not None:
+        # Let the prefetch land in `_page_flights` first, or a stream would download the page a second time
+        await prefetched
+    if STREAM_PARSE and get_response_cache() is None and not _page_flights.has(normalize_url(url)):
+        # Parse cards while the page downloads (the response cache needs the full body, so only without
+        # it; a page already prefetched is read from the shared fetch instead)
+        return await _collect_http_streaming(
+            url, base_only, canonical, min_price, min_beds, min_sqft, require_distressed, require_no_hoa, on_next
+        )
     try:
-        parsed = urlparse(url)
-        base_only = urlunparse((parsed.scheme, parsed.netloc, parsed.path, "", "", ""))
-        canonical = await resolve_canonical(base_only)
-        url = reattach_query(canonical, url)
-    except Exception as _canon_err:
-        if ESTATELY_DEBUG:
-            print(f"[estately] canonicalize failed; continuing with original: {_canon_err}")
+        dom_html, final_url = await _fetch_page(url)
+    except Exception as http_err:
+        _invalidate_canonical_on_404(base_only, http_err)
+        print(f"[estately] HTTP fetch failed: {http_err}")
+        return results_out, mongo_docs_out, None
+    _remember_canonical_move(base_only, canonical, final_url)
+    hinted = peek_next_href(dom_html) if on_next is not None else None
+    if hinted:
+        on_next(_absolute_next(hinted))
+
+    # Inline SSR state, DOM cards (one parse per listing, bs4 or lxml per ESTATELY_PARSER_ENGINE)
+    # and the next link, parsed in the parse executor so other markets' I/O keeps moving
+    engine = get_engine()
+    inline_harvest, cards_http, next_href = await run_parse(harvest_page, dom_html, engine.name)
+    if inline_harvest and ESTATELY_DEBUG:
+        print(f"[estately] harvested from INLINE (HTTP): {len(inline_harvest)}")
+    _accept_inline_rows(inline_harvest, url, min_price, min_beds, min_sqft, results_out, mongo_docs_out)
+
+    if ESTATELY_DEBUG:
+        print(f"[estately] HTTP DOM cards ({engine.name}): {len(cards_http)}")
+    seen_dom = set()
+    for data, card_text in cards_http:
+        await _accept_http_card(
+            data, CardAnalysis(card_text), url, min_price, min_beds, min_sqft,
+            require_distressed, require_no_hoa, seen_dom, results_out, mongo_docs_out,
+        )
+
+    next_url = _absolute_next(next_href) if next_href else None
+    if on_next is not None and next_url and next_href != hinted:
+        # The raw-markup scan missed or misread the link; gating below still overlaps the download
+        on_next(next_url)
+
+    return results_out, mongo_docs_out, next_url
+
+
+async def _collect_http_streaming(url: str,
+                                  base_only: str,
+                                  canonical: str | None,
+                                  min_price: int,
+                                  min_beds: int,
+                                  min_sqft: int,
+                                  require_distressed: bool,
+                                  require_no_hoa: bool,
+                                  on_next=None) -> tuple[list[PropertyCard], list[dict], str | None]:
+    """
+    Streaming variant of the HTTP-only page collector: cards are cut out as their
+    closing tags arrive and parsed in the parse executor while the rest downloads
+    (see `stream_page`, which also applies the retry policy and breaker).
+    Concurrent markets asking for the same page share one stream. Gating (which
+    may fetch detail pages) runs after the stream closes so it never competes
+    with the still-open search response for a limiter slot; the next page is
+    handed to `on_next` before it.
+    """
+    results_out: list[PropertyCard] = []
+    mongo_docs_out: list[dict] = []
+    engine = get_engine()
     try:
-        dom_html = await fetch_html(url)
+        page, shared = await _stream_flights.do(normalize_url(url), lambda: stream_page(url, engine.name))
     except Exception as http_err:
+        _invalidate_canonical_on_404(base_only, http_err)
         print(f"[estately] HTTP fetch failed: {http_err}")
         return results_out, mongo_docs_out, None
+    # Gating mutates the dicts; another market may hold the same shared result
+    parsed = [(dict(data), text) for data, text in shared]
+
+    next_href = page.next_href
+    fallback_html = page.fallback_html()
+    if fallback_html:
+        # Not the primary skin: run the regular selector union over the retained tree
+        more, fallback_next = await run_parse(harvest_cards, fallback_html, engine.name)
+        parsed.extend(more)
+        if fallback_next:
+            next_href = fallback_next
+    if ESTATELY_DEBUG:
+        print(f"[estately] HTTP DOM cards (streamed): {len(parsed)}")
+    if on_next is not None and next_href:
+        on_next(_absolute_next(next_href))
 
-    # Mine inline JSON from SSR and attempt to harvest listings
-    inline_harvest = _mine_inline_scripts(dom_html)
+    inline_harvest = await run_parse(_mine_inline_script_texts, page.scripts)
     if inline_harvest and ESTATELY_DEBUG:
         print(f"[estately] harvested from INLINE (HTTP): {len(inline_harvest)}")
+    _accept_inline_rows(inline_harvest, url, min_price, min_beds, min_sqft, results_out, mongo_docs_out)
+
+    seen_dom = set()
+    for data, card_text in parsed:
+        await _accept_http_card(
+            data, CardAnalysis(card_text), url, min_price, min_beds, min_sqft,
+            require_distressed, require_no_hoa, seen_dom, results_out, mongo_docs_out,
+        )
+    return results_out, mongo_docs_out, (_absolute_next(next_href) if next_href else None)
+
+
+def _invalidate_canonical_on_404(base_only: str, http_err: Exception) -> None:
+    canon_cache = get_canonical_cache()
+    if canon_cache is not None and getattr(getattr(http_err, "response", None), "status_code", None) == 404:
+        # A cached canonical path that now 404s is stale; re-resolve next time
+        canon_cache.invalidate(base_only)
+
+
+def _remember_canonical_move(base_only: str, canonical: str | None, final_url: str) -> None:
+    canon_cache = get_canonical_cache()
+    if canon_cache is not None and canonical and _strip_query(final_url) != _strip_query(canonical):
+        # Estately moved the market page; remember where it redirects now
+        canon_cache.put(base_only, _strip_query(final_url))
+
 
+def _absolute_next(href: str) -> str:
+    return 'https://www.estately.com' + href if href.startswith('/') else href
+
+
+def _accept_inline_rows(inline_harvest, url: str, min_price: int, min_beds: int, min_sqft: int,
+                        results_out: list[PropertyCard], mongo_docs_out: list[dict]) -> None:
+    """Gate listings mined from inline JSON and append the keepers to the output lists."""
     seen_local = set()
     for d in inline_harvest or []:
         if not _passes_min(d.get("price"), min_price):
@@ -205,112 +383,67 @@ async def _collect_http_only(url: str,
         doc.setdefault("agentName", doc.get("agent")); doc.setdefault("agentPhone", doc.get("agent_phone"))
         mongo_docs_out.append(doc)
 
-    # DOM-based parse on the HTTP-fetched HTML
-    try:
-        soup_http = BeautifulSoup(dom_html, "lxml")
-        sel_list = [
-            ".js-map-listing-result",
-            "div[data-testid*='MapResultsCard']",
-            "div[class*='PropertyCard__wrapper']",
-            "article[data-testid*='resultCard']",
-            "a[href*='/home/']",
-            "div[data-testid*='MapResults'] .js-map-listing-result",
-            "div[id*='listings'] .js-map-listing-result",
-            "[data-testid='listing-card']",
-            "[data-qa='home-card']",
-            "article.listingCard__wrapper",
-            "article[class*='ListingCard']",
-            "div[class*='PropertyCard']",
-            "section[class*='HomeCard']",
-            "li[class*='result'] article",
-            "a[href*='/listings/']",
-            "article",
-        ]
-        cards_http = soup_http.select(", ".join(sel_list)) or []
-        if ESTATELY_DEBUG:
-            print(f"[estately] HTTP DOM cards: {len(cards_http)}")
-        seen_dom = set()
-        for c in cards_http:
-            try:
-                data = parse_card(c)
-            except Exception:
-                continue
-
-            # --- Normalize/enrich before gating by address ---
-            if data.get("href"):
-                data["href"] = make_absolute(url, data["href"])
-            if not _has_min_address(data) and data.get("href"):
-                try:
-                    detail_data = await _harvest_from_detail(data["href"], min_price, min_beds, min_sqft)
-                    if detail_data:
-                        data.update(detail_data)
-                except Exception:
-                    if ESTATELY_DEBUG:
-                        print("[estately] detail harvest failed")
-
-            if not _passes_min(data.get("price"), min_price):
-                continue
-            if not _passes_min(data.get("beds"), min_beds):
-                continue
-            if not _passes_min(data.get("sqft"), min_sqft):
-                continue
-            # Require at least an address or (city+state)
-            if not _has_min_address(data):
-                if ESTATELY_DEBUG:
-                    print("[estately] skip DOM: missing address/city/state")
-                continue
-
-            card_text = c.get_text(" ", strip=True)
-            if require_no_hoa and not has_no_hoa(card_text):
-                continue
-            if require_distressed and not looks_distressed(card_text):
-                continue
-
-            _st_txt, _is_active = _extract_status(data, card_text)
-            if not _is_active:
-                continue
 
-            key = (data.get("address") or "", data.get("price") or 0)
-            if key in seen_dom:
-                continue
-            seen_dom.add(key)
-
-            data["_card_text"] = card_text
-
-            results_out.append(PropertyCard(
-                address=data.get("address") or "",
-                city=data.get("city"),
-                state=data.get("state"),
-                zip=data.get("zip"),
-                listing_price=data.get("price"),
-                beds=data.get("beds"),
-                baths=data.get("baths"),
-                sqft=data.get("sqft"),
-                source_url=(data.get("href") or url),
-            ))
-
-            doc = _normalize_property_from_dict(data, data.get("href") or url)
-            doc.setdefault("agentName", doc.get("agent")); doc.setdefault("agentPhone", doc.get("agent_phone"))
-            mongo_docs_out.append(doc)
-    except Exception as dom_fb_err:
+async def _accept_http_card(data: dict, card: CardAnalysis, url: str, min_price: int, min_beds: int, min_sqft: int,
+                            require_distressed: bool, require_no_hoa: bool, seen_dom: set,
+                            results_out: list[PropertyCard], mongo_docs_out: list[dict]) -> None:
+    """Enrich a parsed DOM card (detail page if needed), gate it, and append it to the output lists."""
+    # --- Normalize/enrich before gating by address ---
+    if data.get("href"):
+        data["href"] = make_absolute(url, data["href"])
+    if not _has_min_address(data) and data.get("href"):
+        try:
+            detail_data = await _harvest_from_detail(data["href"], min_price, min_beds, min_sqft)
+            if detail_data:
+                data.update(detail_data)
+        except Exception:
+            if ESTATELY_DEBUG:
+                print("[estately] detail harvest failed")
+
+    if not _passes_min(data.get("price"), min_price):
+        return
+    if not _passes_min(data.get("beds"), min_beds):
+        return
+    if not _passes_min(data.get("sqft"), min_sqft):
+        return
+    # Require at least an address or (city+state)
+    if not _has_min_address(data):
         if ESTATELY_DEBUG:
-            print(f"[estately] HTTP DOM parse failed: {dom_fb_err}")
-
-    # Try to find next-page link
-    next_a = None
-    try:
-        next_a = soup_http.select_one("a[rel='next'], a[aria-label='Next']")  # type: ignore[name-defined]
-    except Exception:
-        next_a = None
-    next_url = None
-    if next_a and next_a.get('href'):
-        next_url = next_a['href']
-        if next_url.startswith('/'):
-            next_url = 'https://www.estately.com' + next_url
-
-    return results_out, mongo_docs_out, next_url
+            print("[estately] skip DOM: missing address/city/state")
+        return
+
+    if require_no_hoa and card.has_hoa:
+        return
+    if require_distressed and not card.distressed:
+        return
+
+    _st_txt, _is_active = _extract_status(data, card)
+    if not _is_active:
+        return
+
+    key = (data.get("address") or "", data.get("price") or 0)
+    if key in seen_dom:
+        return
+    seen_dom.add(key)
+
+    data["_card_text"] = card.text
+
+    results_out.append(PropertyCard(
+        address=data.get("address") or "",
+        city=data.get("city"),
+        state=data.get("state"),
+        zip=data.get("zip"),
+        listing_price=data.get("price"),
+        beds=data.get("beds"),
+        baths=data.get("baths"),
+        sqft=data.get("sqft"),
+        source_url=(data.get("href") or url),
+    ))
+
+    doc = _normalize_property_from_dict(data, data.get("href") or url, card)
+    doc.setdefault("agentName", doc.get("agent")); doc.setdefault("agentPhone", doc.get("agent_phone"))
+    mongo_docs_out.append(doc)
 
-DISTRESSED_KEYWORDS = ["foreclosure","pre-foreclosure","auction","bank owned","reo","short sale","fixer","distressed"]
 
 ESTATELY_DEBUG = os.getenv("ESTATELY_DEBUG", "").lower() in {"1","true","yes"}
 
@@ -321,10 +454,7 @@ async def _capture_json_responses(page, bucket: list):
         except Exception:
             url = ""
         # Heuristic: capture likely data endpoints regardless of content-type
-        interesting = any(k in (url or "") for k in [
-            "search", "listing", "listings", "results", "graphql", "homes", "api", "inventory", "properties"
-        ])
-        if not interesting:
+        if not is_data_url(url):
             return
         try:
             text = await resp.text()
@@ -343,15 +473,9 @@ async def _capture_json_responses(page, bucket: list):
             pass
     page.on("response", lambda r: asyncio.create_task(_grab(r)))
 
-_phone_re = re.compile(r"(?:\+?1[\s.-]?)?(?:\(?\d{3}\)?[\s.-]?)?\d{3}[\s.-]?\d{4}")
-_email_re = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
-
 # --- Status helpers ---
-NEG_STATUS = {"pending","sold","contingent","off market","off-market","closed","withdrawn","canceled","leased","rented","temporarily off market"}
-POS_STATUS_TOKENS = {"for sale","active","active listing","on market","on-market"}
-
-def _extract_status(d: dict, text: str = "") -> tuple[Optional[str], bool]:
-    """Return (normalized_status_text, is_active_for_sale). Uses dict hints + card text."""
+def _extract_status(d: dict, text: "str | CardAnalysis" = "") -> tuple[Optional[str], bool]:
+    """Return (normalized_status_text, is_active_for_sale). Uses dict hints + card text (or its CardAnalysis)."""
     status_fields = [
         "status","listingStatus","propertyStatus","marketStatus","statusText","saleType","listing_type","onMarket","isActive","forSale"
     ]
@@ -361,32 +485,25 @@ def _extract_status(d: dict, text: str = "") -> tuple[Optional[str], bool]:
             raw = d[k]
             break
     s = str(raw).strip().lower() if raw is not None else ""
-    blob = " ".join([s, (text or "").lower()]).strip()
+    card = analyze(text)
     # boolean style fields
     if isinstance(raw, bool):
         is_active = bool(raw)
     else:
-        if any(tok in blob for tok in NEG_STATUS):
+        # The card's hits were found once when it was analyzed; only the short status field is scanned here
+        field = status_hits(s)
+        if card.negative_status or "negative_status" in field:
             is_active = False
-        elif any(tok in blob for tok in POS_STATUS_TOKENS):
+        elif card.positive_status or "positive_status" in field:
             is_active = True
         else:
             # default to true when unknown (we'll still gate with text later where available)
             is_active = True
     return (s or None), is_active
 
-def _extract_contacts(text: str) -> tuple[Optional[str], Optional[str]]:
-    t = text or ""
-    phone = None
-    email = None
-    m = _phone_re.search(t)
-    if m:
-        phone = m.group(0)
-    m = _email_re.search(t)
-    if m:
-        email = m.group(0)
-    return phone, email
-def _normalize_property_from_dict(d: dict, source_url: str = "") -> dict:
+def _extract_contacts(text: "str | CardAnalysis") -> tuple[Optional[str], Optional[str]]:
+    return analyze(text).contacts
+def _normalize_property_from_dict(d: dict, source_url: str = "", card: Optional[CardAnalysis] = None) -> dict:
     address = (d.get("address") or "").strip()
     city = (d.get("city") or "").strip()
     state = (d.get("state") or "").strip().upper()
@@ -413,14 +530,14 @@ def _normalize_property_from_dict(d: dict, source_url: str = "") -> dict:
     broker_email = d.get("broker_email")
 
     # If we were passed a blob of card text, attempt to mine phone/email
+    card = card or analyze(d.get("_card_text") or "")
     if not agent_phone or not agent_email:
-        text_blob = d.get("_card_text") or ""
-        ph, em = _extract_contacts(text_blob)
+        ph, em = card.contacts
         agent_phone = agent_phone or ph
         agent_email = agent_email or em
 
     # --- Status extraction ---
-    status_text, is_active = _extract_status(d, d.get("_card_text") or "")
+    status_text, is_active = _extract_status(d, card)
 
     price_val = d.get("price")
     try:
@@ -474,27 +591,6 @@ def _normalize_property_from_dict(d: dict, source_url: str = "") -> dict:
         pass
     return doc
 
-def _flatten_dicts(obj):
-    if isinstance(obj, dict):
-        yield obj
-        for v in obj.values():
-            yield from _flatten_dicts(v)
-    elif isinstance(obj, list):
-        for it in obj:
-            yield from _flatten_dicts(it)
-
-def _coerce_float(x):
-    if x is None:
-        return None
-    if isinstance(x, (int, float)):
-        return float(x)
-    s = str(x)
-    s = re.sub(r"[^0-9.]", "", s)
-    try:
-        return float(s) if s else None
-    except Exception:
-        return None
-
 def _has_min_address(d: dict) -> bool:
     """Return True if we have enough location info to keep the card."""
     if not isinstance(d, dict):
@@ -513,165 +609,6 @@ def _passes_min(val, minimum):
     if v is None:
         return True
     return v >= minimum
-    
-    
-ACTIVE_TOKENS = {
-    "active", "for_sale", "for sale", "active-listing", "on_market", "on market"
-}
-INACTIVE_TOKENS = {
-    "pending", "under contract", "contingent", "off_market", "sold",
-    "coming soon", "withdrawn", "canceled", "expired"
-}
-
-def _looks_active_for_sale(d: dict) -> bool:
-    """
-    Best-effort read of status-ish fields.
-    """
-    status_fields = [
-        "status", "listingStatus", "sale_status", "marketStatus", "availability",
-        "listing_status", "mlsStatus", "property_status", "propStatus"
-    ]
-    val = None
-    for f in status_fields:
-        v = d.get(f)
-        if v:
-            val = str(v).strip().lower()
-            break
-    if not val:
-        # If no status at all, assume active (many feed fragments omit it)
-        return True
-    if any(tok in val for tok in INACTIVE_TOKENS):
-        return False
-    if any(tok in val for tok in ACTIVE_TOKENS):
-        return True
-    # Unknown token → keep (erring on active)
-    return True
-
-def _addr_from_any(d: dict) -> dict | None:
-    """
-    Normalize address from a variety of common shapes used by real estate feeds.
-    """
-    if not isinstance(d, dict):
-        return None
-    # nested address node?
-    cand = d.get("address") or d.get("location") or d.get("propertyAddress") or d.get("address_obj")
-    if isinstance(cand, dict):
-        d2 = cand
-    else:
-        d2 = d
-
-    address = (
-        d2.get("address") or d2.get("streetAddress") or d2.get("street_address") or
-        d2.get("line1") or d2.get("addressLine1") or d2.get("address1")
-    )
-    city = d2.get("city") or d2.get("addressCity")
-    state = d2.get("state") or d2.get("addressState") or d2.get("stateCode")
-    zipc = d2.get("zip") or d2.get("zipcode") or d2.get("postalCode") or d2.get("zip_code")
-
-    if address or (city and state):
-        return {"address": address, "city": city, "state": state, "zip": zipc}
-    return None
-
-
-def _extract_listings_from_json_blob(text: str) -> list[dict]:
-    """
-    Walk any JSON tree, pull out objects that look like Estately-style listings.
-    Expanded to handle a wide variety of real-estate JSON structures.
-    Prints debug info if ESTATELY_DEBUG is set.
-    """
-    try:
-        # Some endpoints may return HTML or anti-JSON shields; reject obvious HTML and strip shields.
-        low = text.lower()
-        if "<html" in low or "<!doctype" in low:
-            return []
-        t = text.strip()
-        for prefix in ("for(;;);", ")]}'", ")]}',", "while(1);"):
-            if t.startswith(prefix):
-                t = t[len(prefix):].lstrip()
-        first_brace = min([i for i in [t.find("{"), t.find("[")] if i != -1] or [-1])
-        if first_brace > 0:
-            t = t[first_brace:]
-        data = json.loads(t)
-    except Exception:
-        if ESTATELY_DEBUG:
-            print("[estately] Could not parse JSON blob")
-        return []
-
-    def _price_from_any(d: dict):
-        # Handles cents and dollar fields
-        raw = (
-            d.get("listPrice") or d.get("price") or d.get("displayPrice") or
-            d.get("list_price") or d.get("listPriceCents") or d.get("priceCents") or
-            d.get("list_price_cents") or d.get("price_cents")
-        )
-        if raw is None:
-            return None
-        # cents?
-        try:
-            if isinstance(raw, (int, float)) and raw > 0 and raw < 100000:
-                # check presence of *_cents keys
-                pass
-        except Exception:
-            pass
-        cents_keys = {"listPriceCents", "priceCents", "list_price_cents", "price_cents"}
-        for k in cents_keys:
-            if k in d and d[k] == raw:
-                return float(raw) / 100.0
-        return _coerce_float(raw)
-
-    def _href_from_any(d: dict):
-        return (
-            d.get("url") or d.get("detailUrl") or d.get("permalink") or
-            d.get("canonicalUrl") or d.get("seoUrl") or d.get("listingUrl")
-        )
-
-    out = []
-    seen_keys = set()
-    for node in _flatten_dicts(data):
-        if not isinstance(node, dict):
-            continue
-        addr = _addr_from_any(node)
-        price = _price_from_any(node)
-        if not addr or price is None:
-            continue
-        if not _looks_active_for_sale(node):
-            continue
-        beds = (
-            node.get("beds") or node.get("bedrooms") or node.get("num_bedrooms") or
-            node.get("bedCount")
-        )
-        baths = (
-            node.get("baths") or node.get("bathrooms") or node.get("fullBaths") or
-            node.get("bathCount")
-        )
-        sqft = (
-            node.get("sqft") or node.get("livingArea") or node.get("squareFeet") or
-            node.get("square_feet") or node.get("living_area")
-        )
-        href = _href_from_any(node)
-        key = (
-            (addr.get("address") or "").strip().lower(),
-            _coerce_float(price) or 0.0,
-            (addr.get("zip") or addr.get("zipcode") or addr.get("zip_code") or "")
-        )
-        if key in seen_keys:
-            continue
-        seen_keys.add(key)
-        listing = {
-            "address": (addr.get("address") or "").strip(),
-            "city": None if addr.get("city") is None else str(addr.get("city")),
-            "state": None if addr.get("state") is None else str(addr.get("state")),
-            "zip": None if addr.get("zip") is None else str(addr.get("zip")),
-            "price": _coerce_float(price),
-            "beds": _coerce_float(beds),
-            "baths": _coerce_float(baths),
-            "sqft": int(_coerce_float(sqft) or 0) if _coerce_float(sqft) is not None else None,
-            "href": None if href is None else str(href),
-        }
-        if ESTATELY_DEBUG:
-            print(f"[estately] harvested listing: {listing}")
-        out.append(listing)
-    return out
 
 
 # --- Targeted parser for Estately /map/properties endpoint ---
@@ -746,17 +683,23 @@ async def _progressive_scroll(page, steps: int = 6, wait_ms: int = 600):
         await page.evaluate("window.scrollBy(0, document.body.scrollHeight)")
         await page.wait_for_timeout(wait_ms)
 
-async def _dismiss_banners(page):
+async def _dismiss_banners(page, only_present: bool = False):
+    # only_present: click what is already rendered instead of waiting out each click timeout
     for text in ["OK","Accept","I agree","Got it"]:
         try:
-            await page.locator(f"text={text}").first.click(timeout=1500)
+            loc = page.locator(f"text={text}").first
+            if only_present and not await loc.count():
+                continue
+            await loc.click(timeout=1500)
             break
         except Exception:
             pass
 
-async def _prime_results(page):
+async def _prime_results(page, only_present: bool = False):
     try:
-        await page.locator("text=Click to see homes here").first.click(timeout=2000)
+        loc = page.locator("text=Click to see homes here").first
+        if not only_present or await loc.count():
+            await loc.click(timeout=2000)
     except Exception:
         pass
     try:
@@ -769,24 +712,7 @@ async def _prime_results(page):
 
 async def _wait_for_listings(page) -> None:
     # wait for any common card selector to appear; try scroll-assisted waits
-    selectors = [
-        ".js-map-listing-result",
-        "div[data-testid*='MapResultsCard']",
-        "div[class*='PropertyCard__wrapper']",
-        "article[data-testid*='resultCard']",
-        "a[href*='/home/']",
-        "div[data-testid*='MapResults'] .js-map-listing-result",
-        "div[id*='listings'] .js-map-listing-result",
-        "[data-testid='listing-card']",
-        "[data-qa='home-card']",
-        "article.listingCard__wrapper",
-        "article[class*='ListingCard']",
-        "div[class*='PropertyCard']",
-        "section[class*='HomeCard']",
-        "li[class*='result'] article",
-        "a[href*='/listings/']",
-        "article",
-    ]
+    selectors = CARD_SELECTORS
     for _ in range(4):
         for sel in selectors:
             try:
@@ -799,50 +725,6 @@ async def _wait_for_listings(page) -> None:
     await page.wait_for_selector(selectors[-1], timeout=5000)
     await _progressive_scroll(page, steps=2, wait_ms=400)
 
-def _mine_inline_scripts(html: str) -> list[dict]:
-    # Try to find embedded JSON blobs in <script> tags
-    soup = BeautifulSoup(html, "lxml")
-    blobs = []
-    for s in soup.find_all("script"):
-        typ = (s.get("type") or "").lower()
-        if typ in ("application/json", "application/ld+json") or (not typ and s.string and "{" in s.string):
-            try:
-                txt = s.string or s.get_text() or ""
-                # Some apps wrap JSON in window.__STATE__=...
-                # Strip assignment-like prefixes
-                if "{" not in txt:
-                    continue
-                start = txt.find("{")
-                candidate = txt[start:]
-                # Properly trim trailing JS or HTML after JSON by matching braces/brackets
-                end_brace = None
-                stack = []
-                for i, ch in enumerate(candidate):
-                    if ch == "{" or ch == "[":
-                        stack.append(ch)
-                    elif ch == "}" or ch == "]":
-                        if stack:
-                            stack.pop()
-                        if not stack:
-                            end_brace = i
-                            break
-                if end_brace is not None:
-                    candidate = candidate[:end_brace + 1]
-                data = json.loads(candidate)
-                blobs.append(data)
-            except Exception:
-                continue
-    # Flatten into listing-ish dicts
-    out = []
-    for data in blobs:
-        try:
-            text = json.dumps(data)
-            out.extend(_extract_listings_from_json_blob(text))
-        except Exception:
-            pass
-    return out
-
-
 def reattach_query(canonical_url: str, original_url: str) -> str:
     """
     Take the canonical path and re-attach original query params (merged).
@@ -859,44 +741,346 @@ async def resolve_canonical(base_url: str) -> str:
     """
     Follow redirects for a URL without query parameters, returning the final canonical URL.
     We intentionally omit the query so we can re-attach the original filters after normalization.
+    Answers come from the durable canonical cache when possible; only misses hit the network.
     """
+    canon_cache = get_canonical_cache()
+    if canon_cache is not None:
+        cached = canon_cache.get(base_url)
+        if cached:
+            return cached
     try:
-        async with new_client() as client:
-            r = await client.get(base_url)
-            return str(r.url)
+        r = await fetch(base_url)
     except Exception:
         return base_url
+    canonical = str(r.url)
+    if canon_cache is not None:
+        if r.status_code == 404:
+            canon_cache.invalidate(base_url)
+        elif r.status_code < 400:
+            canon_cache.put(base_url, _strip_query(canonical))
+    return canonical
+
+def _strip_query(url: str) -> str:
+    p = urlparse(url)
+    return urlunparse((p.scheme, p.netloc, p.path, "", "", ""))
 
 async def fetch_html(url: str) -> str:
     """
     Fetch a URL. When ESTATELY_DEBUG is set, save the body under /tmp so we can
     inspect selectors offline (works for both HTTP-only and PW fallbacks).
+    With ESTATELY_CACHE_DIR set, fresh cached bodies are served from disk and
+    stale ones are revalidated with a conditional GET.
     """
-    async with new_client() as client:
-        r = await client.get(url)
-        r.raise_for_status()
-        text = r.text
+    text, _final_url = await _fetch_page(url)
+    return text
+
+# Coalesces duplicate page fetches across concurrent markets (overlapping suburbs share detail/search URLs)
+_page_flights = SingleFlight()
 
+async def _fetch_page(url: str) -> tuple[str, str]:
+    """
+    Like `fetch_html`, but also return the URL the request finally landed on after redirects.
+    Concurrent callers asking for the same (normalized) URL share one download, and
+    the result is reused for a short while afterwards.
+    """
+    return await _page_flights.do(normalize_url(url), lambda: _download_page(url))
+
+# Streamed search pages (see `_collect_http_streaming`), shared only while in flight
+_stream_flights = SingleFlight(ttl=0)
+
+def singleflight_stats() -> dict:
+    """Run-wide page fetch counts (buffered and streamed): downloaded, joined while in flight, reused after finishing."""
+    a, b = _page_flights.stats(), _stream_flights.stats()
+    return {k: a[k] + b[k] for k in a}
+
+async def _download_page(url: str) -> tuple[str, str]:
+    cache = get_response_cache()
+    entry = await cache.call(cache.lookup, url) if cache is not None else None
+    if entry is not None and cache.is_fresh(entry):
+        cache.hits += 1
+        return await cache.call(cache.read_text, entry), url
+
+    r = await fetch(url, headers=cache.validators(entry) if cache is not None else None)
+    if r.status_code == 304 and entry is not None:
+        cache.revalidated += 1
+        await cache.call(cache.refresh, entry, r.headers.get("etag"), r.headers.get("last-modified"))
+        return await cache.call(cache.read_text, entry), str(r.url)
+    r.raise_for_status()
+    text = r.text
+    if cache is not None:
+        cache.misses += 1
+        try:
+            await cache.call(cache.store, url, r.content, r.headers.get("etag"), r.headers.get("last-modified"), r.encoding)
+        except Exception as _cache_err:
+            log.warning("response cache write failed for %s: %s", url, _cache_err)
+
+    if ESTATELY_DEBUG:
+        try:
+            # Include url + length to avoid collisions across redirects/content changes
+            h = abs(hash(f"{url}|{len(text)}"))
+            fname = f"/tmp/estately_http_{h}.html"
+            with open(fname, "w", encoding="utf-8", errors="ignore") as f:
+                f.write(text)
+            print(f"[estately] saved HTTP → {fname} :: {url}")
+        except Exception as _save_err:
+            print(f"[estately] debug save failed: {_save_err}")
+
+    return text, str(r.url)
+
+# Result pages fetched ahead of the one being parsed in the HTTP-only page walk; 0 = strictly sequential.
+# The first comes from the page's next link, further ones are guessed by bumping its ?page=N.
+PAGE_LOOKAHEAD = int(os.getenv("ESTATELY_PAGE_LOOKAHEAD", "1"))
+# Run-wide prefetch counts for the stats line
+prefetch_stats = {"started": 0, "used": 0, "cancelled": 0}
+
+def configure_page_lookahead(depth: int) -> None:
+    """Set the lookahead depth for page walks started afterwards."""
+    global PAGE_LOOKAHEAD
+    PAGE_LOOKAHEAD = max(0, int(depth))
+
+def _guess_following_pages(url: str, n: int) -> list[str]:
+    """Up to `n` URLs after `url` by incrementing its `page` query parameter ([] if it has none)."""
+    p = urlparse(url)
+    params = parse_qsl(p.query, keep_blank_values=True)
+    current = next((v for k, v in params if k == "page"), None)
+    if current is None or not current.isdigit():
+        return []
+    out = []
+    for k in range(int(current) + 1, int(current) + 1 + n):
+        query = urlencode([(name, str(k) if name == "page" else v) for name, v in params])
+        out.append(urlunparse(p._replace(query=query)))
+    return out
+
+class PagePrefetcher:
+    """
+    Lookahead for one market's HTTP-only page walk: while page N is parsed and
+    gated, page N+1 (and with a deeper lookahead, guessed pages after it) is
+    already downloading through `_fetch_page`, so the walk finds it in
+    `_page_flights` instead of waiting on the network.
+
+    Prefetches go through the shared limiter like any fetch. `aclose()` cancels
+    whatever the walk never asked for (filters ran out, the page cap was hit, the
+    breaker opened), unless another market is waiting on the same download.
+    """
+
+    def __init__(self, depth: Optional[int] = None):
+        self.depth = PAGE_LOOKAHEAD if depth is None else max(0, depth)
+        if _page_flights.ttl <= 0:
+            # Finished fetches aren't kept for later callers, so a completed prefetch would be thrown away
+            self.depth = 0
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._keys: dict[str, str] = {}
+
+    def hint(self, next_url: str, remaining: int) -> None:
+        """`next_url` is the page after the current one; at most `remaining` more pages will be read."""
+        n = min(self.depth, remaining)
+        if n <= 0 or not next_url:
+            return
+        for u in [next_url] + _guess_following_pages(next_url, n - 1):
+            if u not in self._tasks:
+                self._tasks[u] = asyncio.create_task(self._warm(u))
+                prefetch_stats["started"] += 1
+
+    async def _warm(self, url: str) -> None:
+        try:
+            _base_only, _canonical, request_url = await _request_url(url)
+            self._keys[url] = normalize_url(request_url)
+            await _fetch_page(request_url)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # The walk fetches it again (failures aren't shared) and reports the error itself
+            if ESTATELY_DEBUG:
+                print(f"[estately] prefetch failed for {url}: {e}")
+
+    def take(self, url: str) -> Optional[asyncio.Task]:
+        """The walk is about to read `url`; a prefetch for it is now the walk's own fetch (returned to await)."""
+        task = self._tasks.pop(url, None)
+        if task is not None:
+            self._keys.pop(url, None)
+            prefetch_stats["used"] += 1
+        return task
+
+    async def aclose(self) -> None:
+        """Cancel the prefetches the walk never read."""
+        tasks, self._tasks = self._tasks, {}
+        for url, task in tasks.items():
+            if task.done():
+                continue
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+            key = self._keys.pop(url, None)
+            if key is not None and _page_flights.abandon(key):
+                prefetch_stats["cancelled"] += 1
+        self._keys.clear()
+
+def looks_distressed(text: "str | CardAnalysis") -> bool:
+    return analyze(text).distressed
+
+def has_no_hoa(text: "str | CardAnalysis") -> bool:
+    # If card shows HOA $... we exclude. SSR sometimes prints 'HOA $...'
+    return not analyze(text).has_hoa
+
+class PageSnapshot:
+    """
+    One rendered search page, captured once. `page.content()` serializes the DOM out
+    of Chromium a single time; the card parse (with the next link) and the inline
+    state harvest each run at most once, in the parse executor, however many of the
+    browser path's strategies ask for them.
+    """
+
+    def __init__(self, url: str, html: str):
+        self.url = url
+        self.html = html
+        self._cards: Optional[tuple[list[tuple[dict, str]], Optional[str]]] = None
+        self._inline: Optional[list[dict]] = None
+
+    @classmethod
+    async def capture(cls, page, url: str) -> "PageSnapshot":
+        html = await page.content()
         if ESTATELY_DEBUG:
             try:
-                # Include url + length to avoid collisions across redirects/content changes
-                h = abs(hash(f"{url}|{len(text)}"))
-                fname = f"/tmp/estately_http_{h}.html"
+                h = abs(hash(f"{url}|{len(html)}"))
+                fname = f"/tmp/estately_dom_{h}.html"
                 with open(fname, "w", encoding="utf-8", errors="ignore") as f:
-                    f.write(text)
-                print(f"[estately] saved HTTP → {fname} :: {url}")
-            except Exception as _save_err:
-                print(f"[estately] debug save failed: {_save_err}")
+                    f.write(html)
+                print(f"[estately] saved DOM → {fname} :: {url}")
+            except Exception:
+                pass
+        return cls(url, html)
+
+    async def cards(self) -> list[tuple[dict, str]]:
+        """Resolved listing cards as (dict, card text)."""
+        if self._cards is None:
+            try:
+                self._cards = await run_parse(harvest_cards, self.html, get_engine().name) if self.html else ([], None)
+            except Exception as dom_err:
+                if ESTATELY_DEBUG:
+                    print(f"[estately] DOM parse failed: {dom_err}")
+                self._cards = ([], None)
+        return self._cards[0]
+
+    async def next_href(self) -> Optional[str]:
+        """rel=next / aria-label=Next href from the same parse, as written in the page."""
+        await self.cards()
+        return self._cards[1]
+
+    async def inline(self) -> list[dict]:
+        """Listings mined from the page's inline script state."""
+        if self._inline is None:
+            self._inline = (await run_parse(_mine_inline_scripts, self.html) or []) if self.html else []
+        return self._inline
+
+
+def _upsert_docs(mongo_docs: list[dict], label: str) -> None:
+    """Bulk-upsert normalized docs by fullAddress_ci (no-op without Mongo)."""
+    if (_properties_col is None) or not mongo_docs:
+        return
+    try:
+        ops = [
+            UpdateOne(
+                {"fullAddress_ci": d["fullAddress_ci"]},
+                {"$set": d},
+                upsert=True,
+            )
+            for d in mongo_docs
+            if d.get("fullAddress_ci")
+        ]
+        if ops:
+            res = _properties_col.bulk_write(ops, ordered=False)
+            log.info(
+                "DB UPSERT BULK | ops=%d upserted=%d modified=%d matched=%d",
+                len(ops),
+                getattr(res, "upserted_count", 0),
+                getattr(res, "modified_count", 0),
+                getattr(res, "matched_count", 0),
+            )
+    except Exception as e:
+        print(f"[estately] Mongo upsert failed ({label}): {e}")
+
 
-        return text
+_MAP_API_HEADERS = {
+    "Accept": "application/json, text/javascript, */*; q=0.01",
+    "X-Requested-With": "XMLHttpRequest",
+}
 
-def looks_distressed(text: str) -> bool:
-    t = (text or "").lower()
-    return any(k in t for k in DISTRESSED_KEYWORDS)
 
-def has_no_hoa(text: str) -> bool:
-    # If card shows HOA $... we exclude. SSR sometimes prints 'HOA $...'
-    return "hoa" not in (text or "").lower()
+async def _collect_map_api(url: str) -> list[dict] | None:
+    """
+    Every listing of a market straight from /map/properties (see map_api.py): the
+    search page's filters plus the market's bounds, split into quadrants while a
+    tile comes back full (MAP_API_TILE_CAP), within MAP_API_MAX_REQUESTS.
+    The bounds come from the market's search page the first time and from the
+    bounds cache after that. None when the bounds can't be found, a tile fails or
+    answers with an HTTP error, or a response fails the shape check; the caller
+    then scrapes the pages as before. Only failed shape checks count towards
+    turning the mode off for the run.
+    """
+    bounds_cache = get_bounds_cache()
+    base = url.split("?", 1)[0]
+    bounds = bounds_cache.get(base)
+    if bounds is None:
+        try:
+            html = await fetch_html(url)
+        except Exception as e:
+            print(f"[estately] map API: search page fetch failed: {e}")
+            return None
+        bounds = await run_parse(market_bounds, html)
+        if bounds is None:
+            map_api_state.failure("no map bounds on the search page")
+            return None
+        bounds_cache.put(base, bounds)
+    headers = dict(_MAP_API_HEADERS, Referer=url)
+    queue = [(bounds, 0)]
+    rows: list[dict] = []
+    seen: set = set()
+    sent = 0
+    answered = 0
+    while queue and sent < MAP_API_MAX_REQUESTS:
+        batch, queue = queue[:MAP_API_MAX_REQUESTS - sent], queue[MAP_API_MAX_REQUESTS - sent:]
+        urls = [map_query_url(url, b) for b, _ in batch]
+        responses = await asyncio.gather(*(fetch(u, headers=headers) for u in urls), return_exceptions=True)
+        sent += len(batch)
+        map_api_state.requests += len(batch)
+        for (b, depth), map_url, r in zip(batch, urls, responses):
+            if isinstance(r, Exception):
+                # A missing tile would leave a hole in the market; scrape its pages instead
+                map_api_state.fallback(f"tile failed ({type(r).__name__}: {r})")
+                return None
+            if r.status_code != 200:
+                map_api_state.fallback(f"tile answered HTTP {r.status_code}")
+                return None
+            count = looks_like_map_payload(r.text)
+            if count is None:
+                map_api_state.failure(f"HTTP 200, {r.headers.get('content-type', '?')}")
+                return None
+            answered += 1
+            before = len(rows)
+            for d in _extract_estately_map_properties(map_url, r.text):
+                if d.get("href"):
+                    d["href"] = urljoin("https://www.estately.com/", d["href"])
+                key = d.get("href") or (d.get("address"), d.get("zip"), d.get("price"))
+                if key in seen:
+                    continue
+                seen.add(key)
+                rows.append(d)
+            # A full tile is probably truncated; its quadrants fill in the rest. A full sub-tile that
+            # added nothing new means the bounds aren't narrowing the answer, so stop splitting there.
+            if count >= MAP_API_TILE_CAP and depth < MAP_API_MAX_DEPTH and (depth == 0 or len(rows) > before):
+                queue.extend((q, depth + 1) for q in split_bounds(b))
+    if not answered:
+        # No tile was sent (MAP_API_MAX_REQUESTS < 1); nothing to go on
+        return None
+    if queue:
+        print(f"[estately] map API: request budget ({MAP_API_MAX_REQUESTS}) spent with {len(queue)} tiles left")
+    map_api_state.success()
+    if ESTATELY_DEBUG:
+        print(f"[estately] map API: {len(rows)} listings from {sent} requests")
+    return rows
+
 
 async def collect_estately(
     market: str,
@@ -910,6 +1094,8 @@ async def collect_estately(
     results: List[PropertyCard] = []
     mongo_docs: list[dict] = []
     seen = set()
+    # Keep this market's HTTP fetches on one proxy exit while it stays healthy
+    current_market.set(market)
 
     url = build_search_url(
     market,
@@ -919,58 +1105,70 @@ async def collect_estately(
     no_hoa=require_no_hoa,
     distressed=require_distressed,
 )
+    # Fail the market fast while Estately (or every proxy exit) is down instead of waiting out timeouts
+    host = urlparse(url).hostname or ""
+    if retry_policy.breaker(host).is_open():
+        print(f"[estately] circuit open for {host}; skipping {market}")
+        return results
+    # Map-API mode: the whole market as JSON over plain HTTP, no browser and no page walk (max_pages
+    # doesn't apply). A failed shape check, no bounds or a tile HTTP error falls through to the scrapers below.
+    if map_api_state.enabled:
+        rows = await _collect_map_api(url)
+        if rows is not None:
+            _accept_inline_rows(rows, url, min_price, min_beds, min_sqft, results, mongo_docs)
+            _upsert_docs(mongo_docs, "map API")
+            if ESTATELY_DEBUG:
+                print(f"[estately] FINAL persist summary (map API): results={len(results)} mongo_docs={len(mongo_docs)}")
+            return results
     # If Playwright is unavailable, run a pure HTTP fallback for up to max_pages
     if not _PLAYWRIGHT_AVAILABLE or launch_browser is None or new_page is None:  # type: ignore
         print("[estately] Playwright not installed; running HTTP-only mode.")
-        for page_idx in range(max_pages):
-            page_results, page_docs, next_url = await _collect_http_only(
-                url,
-                min_price,
-                min_beds,
-                min_sqft,
-                require_distressed,
-                require_no_hoa,
-            )
-            results.extend(page_results)
-            mongo_docs.extend(page_docs)
-            if not next_url:
-                break
-            url = next_url
+        prefetcher = PagePrefetcher()
+        try:
+            for page_idx in range(max_pages):
+                prefetched = prefetcher.take(url)
+                remaining = max_pages - page_idx - 1
+                page_results, page_docs, next_url = await _collect_http_only(
+                    url,
+                    min_price,
+                    min_beds,
+                    min_sqft,
+                    require_distressed,
+                    require_no_hoa,
+                    on_next=lambda nxt, remaining=remaining: prefetcher.hint(nxt, remaining),
+                    prefetched=prefetched,
+                )
+                results.extend(page_results)
+                mongo_docs.extend(page_docs)
+                if not next_url:
+                    break
+                if retry_policy.breaker(host).is_open():
+                    print(f"[estately] circuit open for {host}; stopping {market} after page {page_idx + 1}")
+                    break
+                url = next_url
+        finally:
+            # Pages fetched ahead but never reached (last page, page cap, breaker, error) are cancelled
+            await prefetcher.aclose()
         # Persist if possible, then return
-        if (_properties_col is not None) and mongo_docs:
-            try:
-                ops = [
-                    UpdateOne(
-                        {"fullAddress_ci": d["fullAddress_ci"]},
-                        {"$set": d},
-                        upsert=True,
-                    )
-                    for d in mongo_docs
-                    if d.get("fullAddress_ci")
-                ]
-                if ops:
-                    res = _properties_col.bulk_write(ops, ordered=False)
-                    log.info(
-                        "DB UPSERT BULK | ops=%d upserted=%d modified=%d matched=%d",
-                        len(ops),
-                        getattr(res, "upserted_count", 0),
-                        getattr(res, "modified_count", 0),
-                        getattr(res, "matched_count", 0),
-                    )
-            except Exception as e:
-                print(f"[estately] Mongo upsert failed (HTTP-only): {e}")
+        _upsert_docs(mongo_docs, "HTTP-only")
         if ESTATELY_DEBUG:
             print(f"[estately] FINAL persist summary (HTTP-only): results={len(results)} mongo_docs={len(mongo_docs)}")
         return results
 
-    browser = await launch_browser()
-    try:
-        page = await new_page(browser)
+    # A fresh context on a warm pooled browser; closed on exit, the browser stays up for the next market
+    async with get_browser_pool().page() as page:
+        # Photos, map tiles, fonts, CSS and trackers never load; the data XHRs still do
+        await get_request_filter().install(page)
         net_bucket: list = []
         await _capture_json_responses(page, net_bucket)
         for page_idx in range(max_pages):
+            # Attached before goto so a data response that beats domcontentloaded still counts
+            ready = PageReadiness(page) if READY_MODE == "event" else None
             try:
-                await page.goto(url, wait_until="domcontentloaded")
+                # Navigations share the per-host limiter with the HTTP client
+                async with limiter.slot(url) as slot:
+                    resp = await page.goto(url, wait_until="domcontentloaded")
+                    slot.record(resp.status if resp is not None else None)
             except PWError as nav_err:
                 # Network/proxy issues (e.g., net::ERR_TUNNEL_CONNECTION_FAILED). Fallback to HTTP-only scrape.
                 print(f"[estately] page.goto failed; falling back to HTTP fetch: {nav_err}")
@@ -981,7 +1179,7 @@ async def collect_estately(
                     raise
 
                 # Mine inline JSON from SSR and attempt to harvest listings
-                inline_harvest = _mine_inline_scripts(dom_html)
+                inline_harvest = await run_parse(_mine_inline_scripts, dom_html)
                 if inline_harvest and ESTATELY_DEBUG:
                     print(f"[estately] harvested from INLINE (HTTP fallback): {len(inline_harvest)}")
 
@@ -1017,87 +1215,43 @@ async def collect_estately(
                     mongo_docs.append(doc)
 
                 # If fallback produced any docs, persist and return immediately.
-                if (_properties_col is not None) and mongo_docs:
-                    try:
-                        ops = [
-                            UpdateOne(
-                                {"fullAddress_ci": d["fullAddress_ci"]},
-                                {"$set": d},
-                                upsert=True,
-                            )
-                            for d in mongo_docs
-                            if d.get("fullAddress_ci")
-                        ]
-                        if ops:
-                            res = _properties_col.bulk_write(ops, ordered=False)
-                            log.info(
-                                "DB UPSERT BULK | ops=%d upserted=%d modified=%d matched=%d",
-                                len(ops),
-                                getattr(res, "upserted_count", 0),
-                                getattr(res, "modified_count", 0),
-                                getattr(res, "matched_count", 0),
-                            )
-                            if ESTATELY_DEBUG:
-                                print(f"[estately] upserted {len(ops)} docs into MongoDB (HTTP fallback)")
-                    except Exception as e:
-                        print(f"[estately] Mongo upsert failed (HTTP fallback): {e}")
+                _upsert_docs(mongo_docs, "HTTP fallback")
 
                 return results
-            await _dismiss_banners(page)
-            await _prime_results(page)
-            await page.wait_for_timeout(1000)
-            try:
-                await _wait_for_listings(page)
-            except Exception:
-                # keep going; we'll still snapshot HTML
-                pass
+            if ready is not None:
+                await _dismiss_banners(page, only_present=True)
+                await _prime_results(page, only_present=True)
+                # Snapshot as soon as the data response is in and the card count stops growing
+                await ready.wait()
+                ready.close()
+                if ESTATELY_DEBUG:
+                    print(f"[estately] page ready after {ready.waited_ms:.0f}ms: {ready.reason}")
+            else:
+                await _dismiss_banners(page)
+                await _prime_results(page)
+                await page.wait_for_timeout(1000)
+                try:
+                    await _wait_for_listings(page)
+                except Exception:
+                    # keep going; we'll still snapshot HTML
+                    pass
 
-            # small extra scroll to ensure cards are in DOM
-            await _progressive_scroll(page, steps=2, wait_ms=400)
+                # small extra scroll to ensure cards are in DOM
+                await _progressive_scroll(page, steps=2, wait_ms=400)
 
-            # Give the app a moment to fire network requests
-            await page.wait_for_timeout(800)
+                # Give the app a moment to fire network requests
+                await page.wait_for_timeout(800)
 
             if ESTATELY_DEBUG:
                 print(f"[estately] net blobs so far: {len(net_bucket)}")
 
-            # If DOM path fails, try network-captured JSON
-            dom_cards = []
+            # One snapshot of the rendered DOM feeds every strategy below; if it has no cards,
+            # try network-captured JSON, then inline state
             try:
-                dom_html = await page.content()
-                if ESTATELY_DEBUG:
-                    try:
-                        h = abs(hash(f"{url}|{len(dom_html)}"))
-                        fname = f"/tmp/estately_dom_{h}.html"
-                        with open(fname, "w", encoding="utf-8", errors="ignore") as f:
-                            f.write(dom_html)
-                        print(f"[estately] saved DOM → {fname} :: {url}")
-                    except Exception:
-                        pass
-                soup_dom = BeautifulSoup(dom_html, "lxml")
-                dom_cards = soup_dom.select(", ".join([
-                    ".js-map-listing-result",
-                    "div[data-testid*='MapResultsCard']",
-                    "div[class*='PropertyCard__wrapper']",
-                    "article[data-testid*='resultCard']",
-                    "a[href*='/home/']",
-                    "div[data-testid*='MapResults'] .js-map-listing-result",
-                    "div[id*='listings'] .js-map-listing-result",
-                    "[data-testid='listing-card']",
-                    "[data-qa='home-card']",
-                    "article.listingCard__wrapper",
-                    "article[class*='ListingCard']",
-                    "div[class*='PropertyCard']",
-                    "section[class*='HomeCard']",
-                    "li[class*='result'] article",
-                    "a[href*='/listings/']",
-                    "article",
-                ])) or [] or []
+                snapshot = await PageSnapshot.capture(page, url)
             except Exception:
-                dom_cards = []
-
-            soup = None
-            cards = dom_cards
+                snapshot = PageSnapshot(url, "")
+            cards = await snapshot.cards()
             if not cards and net_bucket:
                 harvested = []
                 for blob in net_bucket[-20:]:
@@ -1109,7 +1263,7 @@ async def collect_estately(
                         harvested.extend(h1)
                         continue
                     # Fallback: generic JSON walker
-                    harvested.extend(_extract_listings_from_json_blob(txt_b))
+                    harvested.extend(_extract_listings_from_json_blob(txt_b, _json_hint(url_b)))
                 if harvested and ESTATELY_DEBUG:
                     print(f"[estately] harvested from NET: {len(harvested)}")
                     
@@ -1159,19 +1313,16 @@ async def collect_estately(
                     # Continue loop without DOM parsing below
                     if results:
                         # try to find a next URL from DOM; otherwise break
-                        html = await page.content()
-                        soup = BeautifulSoup(html, "lxml")
-                        next_a = soup.select_one('a[rel="next"], a[aria-label="Next"]')
-                        if not next_a or not next_a.get('href'):
+                        next_href = await snapshot.next_href()
+                        if not next_href:
                             break
-                        next_href = next_a['href']
                         if next_href.startswith('/'): 
                             next_href = 'https://www.estately.com' + next_href
                         url = next_href
                         continue
 
             if not cards and not results:
-                inline_harvest = _mine_inline_scripts(dom_html)
+                inline_harvest = await snapshot.inline()
                 if inline_harvest and ESTATELY_DEBUG:
                     print(f"[estately] harvested from INLINE: {len(inline_harvest)}")
                 if inline_harvest:
@@ -1207,133 +1358,11 @@ async def collect_estately(
                         doc = _normalize_property_from_dict(d, d.get("href") or url)
                         mongo_docs.append(doc)
 
-                # Also try a DOM-based parse on the HTTP-fetched HTML
-                try:
-                    soup_http = BeautifulSoup(dom_html, "lxml")
-                    sel_list = [
-                        ".js-map-listing-result",
-                        "div[data-testid*='MapResultsCard']",
-                        "div[class*='PropertyCard__wrapper']",
-                        "article[data-testid*='resultCard']",
-                        "a[href*='/home/']",
-                        "div[data-testid*='MapResults'] .js-map-listing-result",
-                        "div[id*='listings'] .js-map-listing-result",
-                        "[data-testid='listing-card']",
-                        "[data-qa='home-card']",
-                        "article.listingCard__wrapper",
-                        "article[class*='ListingCard']",
-                        "div[class*='PropertyCard']",
-                        "section[class*='HomeCard']",
-                        "li[class*='result'] article",
-                        "a[href*='/listings/']",
-                        "article",
-                    ]
-                    cards_http = soup_http.select(", ".join(sel_list)) or []
-                    if ESTATELY_DEBUG:
-                        print(f"[estately] HTTP fallback DOM cards: {len(cards_http)}")
-                    seen_fallback = set()
-                    for c in cards_http:
-                        try:
-                            data = parse_card(c)
-                        except Exception:
-                            continue
-
-                        # --- Normalize/enrich before gating by address ---
-                        if data.get("href"):
-                            data["href"] = make_absolute(url, data["href"])
-                        if not _has_min_address(data) and data.get("href"):
-                            try:
-                                detail_data = await _harvest_from_detail(data["href"], min_price, min_beds, min_sqft)
-                                if detail_data:
-                                    data.update(detail_data)
-                            except Exception:
-                                if ESTATELY_DEBUG:
-                                    print("[estately] detail harvest failed")
-
-                        if (data.get("price") or 0) < min_price:
-                            continue
-                        if (data.get("beds") or 0) < min_beds:
-                            continue
-                        if (data.get("sqft") or 0) < min_sqft:
-                            continue
-
-                        card_text = c.get_text(" ", strip=True)
-                        if require_no_hoa and not has_no_hoa(card_text):
-                            continue
-                        if require_distressed and not looks_distressed(card_text):
-                            continue
-
-                        _st_txt, _is_active = _extract_status(data, card_text)
-                        if not _is_active:
-                            continue
-
-                        key = (data.get("address") or "", data.get("price") or 0)
-                        if key in seen_fallback:
-                            continue
-                        seen_fallback.add(key)
-
-                        # Attach card text for contact mining
-                        data["_card_text"] = card_text
-
-                        results.append(PropertyCard(
-                            address=data.get("address") or "",
-                            city=data.get("city"),
-                            state=data.get("state"),
-                            zip=data.get("zip"),
-                            listing_price=data.get("price"),
-                            beds=data.get("beds"),
-                            baths=data.get("baths"),
-                            sqft=data.get("sqft"),
-                            source_url=(data.get("href") or url),
-                        ))
-
-                        doc = _normalize_property_from_dict(data, data.get("href") or url)
-                        doc.setdefault("agentName", doc.get("agent")); doc.setdefault("agentPhone", doc.get("agent_phone"))
-                        mongo_docs.append(doc)
-                except Exception as dom_fb_err:
-                    if ESTATELY_DEBUG:
-                        print(f"[estately] HTTP fallback DOM parse failed: {dom_fb_err}")
-
-            if soup is None:
-                html = await page.content()
-                if ESTATELY_DEBUG:
-                    try:
-                        h = abs(hash(f"{url}|{len(html)}"))
-                        fname = f"/tmp/estately_dom_{h}.html"
-                        with open(fname, "w", encoding="utf-8", errors="ignore") as f:
-                            f.write(html)
-                        print(f"[estately] saved DOM → {fname} :: {url}")
-                    except Exception:
-                        pass
-                soup = BeautifulSoup(html, "lxml")
-                cards = soup.select(", ".join([
-                    ".js-map-listing-result",
-                    "div[data-testid*='MapResultsCard']",
-                    "div[class*='PropertyCard__wrapper']",
-                    "article[data-testid*='resultCard']",
-                    "a[href*='/home/']",
-                    "div[data-testid*='MapResults'] .js-map-listing-result",
-                    "div[id*='listings'] .js-map-listing-result",
-                    "[data-testid='listing-card']",
-                    "[data-qa='home-card']",
-                    "article.listingCard__wrapper",
-                    "article[class*='ListingCard']",
-                    "div[class*='PropertyCard']",
-                    "section[class*='HomeCard']",
-                    "li[class*='result'] article",
-                    "a[href*='/listings/']",
-                    "article",
-                ])) or []
-
-            for c in cards:
-                data = parse_card(c)
+            for data, card_text in cards:
+                card = CardAnalysis(card_text)
 
                 if ESTATELY_DEBUG:
-                    try:
-                        _ct = c.get_text(" ", strip=True)
-                        print("[estately] DOM card text:", _ct[:120])
-                    except Exception:
-                        pass
+                    print("[estately] DOM card text:", card.text[:120])
 
                 if (data.get("price") or 0) < min_price:
                     continue
@@ -1342,13 +1371,12 @@ async def collect_estately(
                 if (data.get("sqft") or 0) < min_sqft:
                     continue
 
-                card_text = c.get_text(" ", strip=True)
-                if require_no_hoa and not has_no_hoa(card_text):
+                if require_no_hoa and card.has_hoa:
                     continue
-                if require_distressed and not looks_distressed(card_text):
+                if require_distressed and not card.distressed:
                     continue
 
-                _st_txt, _is_active = _extract_status(data, card_text)
+                _st_txt, _is_active = _extract_status(data, card)
                 if not _is_active:
                     continue
 
@@ -1358,7 +1386,7 @@ async def collect_estately(
                 seen.add(key)
 
                 # Attach card text for contact mining
-                data["_card_text"] = card_text
+                data["_card_text"] = card.text
 
                 results.append(PropertyCard(
                     address=data.get("address") or "",
@@ -1373,7 +1401,7 @@ async def collect_estately(
                 ))
 
                 # Build Mongo doc
-                doc = _normalize_property_from_dict(data, data.get("href") or url)
+                doc = _normalize_property_from_dict(data, data.get("href") or url, card)
                 # duplicate common agent keys for Node schemas (non-breaking)
                 doc.setdefault("agentName", doc.get("agent")); doc.setdefault("agentPhone", doc.get("agent_phone"))
                 mongo_docs.append(doc)
@@ -1381,16 +1409,17 @@ async def collect_estately(
                 # continue to next card
                 continue
 
-            # Try to advance via rel=next in the rendered DOM; fall back to soup link
+            # Try to advance via rel=next in the rendered DOM; fall back to the parsed page's link
             next_href = None
             try:
-                next_href = await page.get_attribute('a[rel="next"], a[aria-label="Next"]', 'href')
+                # Read it only if present: get_attribute would wait out the default timeout on the last page
+                next_link = page.locator(NEXT_LINK_SELECTOR).first
+                if await next_link.count():
+                    next_href = await next_link.get_attribute("href")
             except Exception:
                 pass
             if not next_href:
-                next_a = soup.select_one('a[rel="next"], a[aria-label="Next"]')
-                if next_a and next_a.get("href"):
-                    next_href = next_a["href"]
+                next_href = await snapshot.next_href()
 
             if not next_href:
                 break
@@ -1408,7 +1437,7 @@ async def collect_estately(
                 if h1:
                     harvested.extend(h1)
                     continue
-                harvested.extend(_extract_listings_from_json_blob(txt_b))
+                harvested.extend(_extract_listings_from_json_blob(txt_b, _json_hint(url_b)))
             if harvested and ESTATELY_DEBUG:
                 print(f"[estately] FINAL fallback harvest from NET: {len(harvested)}")
             for d in harvested:
@@ -1442,39 +1471,8 @@ async def collect_estately(
                 mongo_docs.append(doc)
 
         # --- Persist to MongoDB (upsert by normalized address) ---
-        if (_properties_col is not None) and mongo_docs:
-            try:
-                ops = [
-                    UpdateOne(
-                        {"fullAddress_ci": d["fullAddress_ci"]},
-                        {"$set": d},
-                        upsert=True,
-                    )
-                    for d in mongo_docs
-                    if d.get("fullAddress_ci")
-                ]
-                if ops:
-                    res = _properties_col.bulk_write(ops, ordered=False)
-                    log.info(
-                        "DB UPSERT BULK | ops=%d upserted=%d modified=%d matched=%d",
-                        len(ops),
-                        getattr(res, "upserted_count", 0),
-                        getattr(res, "modified_count", 0),
-                        getattr(res, "matched_count", 0),
-                    )
-                    if ESTATELY_DEBUG:
-                        print(f"[estately] upserted {len(ops)} docs into MongoDB")
-            except Exception as e:
-                print(f"[estately] Mongo upsert failed: {e}")
+        _upsert_docs(mongo_docs, "browser")
 
         if ESTATELY_DEBUG:
             print(f"[estately] FINAL persist summary: results={len(results)} mongo_docs={len(mongo_docs)}")
-        return results
-    finally:
-        try:
-            await browser.close()
-        finally:
-            # Stop the Playwright driver if we created it via fallback
-            _p = getattr(browser, "_playwright", None)
-            if _p is not None:
-                await _p.stop()
\ No newline at end of file
+        return results
\ No newline at end of file
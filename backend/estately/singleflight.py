@@ -0,0 +1,138 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Finished results are shared with later callers for this long (seconds); 0 = only in-flight sharing.
+SINGLEFLIGHT_TTL = float(os.getenv("ESTATELY_SINGLEFLIGHT_TTL", "30"))
+# ...and the finished results kept are bounded by their size (page bodies are large), not their number.
+SINGLEFLIGHT_MAX_MB = float(os.getenv("ESTATELY_SINGLEFLIGHT_MAX_MB", "32"))
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_url(url: str) -> str:
+    """Coalescing key: lowercase scheme/host, no default port or fragment, sorted query."""
+    p = urlsplit(url.strip())
+    scheme = p.scheme.lower()
+    host = (p.hostname or "").lower()
+    if p.port and p.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{p.port}"
+    query = urlencode(sorted(parse_qsl(p.query, keep_blank_values=True)), doseq=True)
+    return urlunsplit((scheme, host, p.path or "/", query, ""))
+
+
+def approx_size(value: Any) -> int:
+    """Rough byte size of a result: str/bytes lengths, summed through tuples and lists."""
+    if isinstance(value, (str, bytes, bytearray)):
+        return len(value)
+    if isinstance(value, (tuple, list)):
+        return sum(approx_size(v) for v in value) + 8 * len(value)
+    return 64
+
+
+class SingleFlight:
+    """
+    Request coalescing: concurrent `do(key, fn)` calls with the same key share one
+    execution of `fn`. Successful results stay shareable for `ttl` seconds, in an
+    LRU bounded to `max_bytes` of results (as measured by `size`); failures are handed to the callers already waiting and then forgotten.
+    The shared work runs in its own task, so one caller being cancelled doesn't
+    cancel it for the others.
+    """
+
+    def __init__(
+        self,
+        ttl: float = SINGLEFLIGHT_TTL,
+        max_bytes: int = int(SINGLEFLIGHT_MAX_MB * 1024 * 1024),
+        size: Callable[[Any], int] = approx_size,
+    ):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.size = size
+        self._bytes = 0
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._waiters: dict[str, int] = {}
+        self._done: "OrderedDict[str, tuple[float, Any, int]]" = OrderedDict()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.leaders = self.joined = self.reused = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._inflight.clear()
+            self._waiters.clear()
+            self._loop = loop
+
+        hit = self._done.get(key)
+        if hit is not None:
+            if time.monotonic() - hit[0] < self.ttl:
+                self._done.move_to_end(key)
+                self.reused += 1
+                return hit[1]
+            self._forget(key)
+
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self.joined += 1
+        else:
+            self.leaders += 1
+            fut = asyncio.ensure_future(fn())
+            self._inflight[key] = fut
+            fut.add_done_callback(lambda f, k=key: self._finish(k, f))
+        self._waiters[key] = self._waiters.get(key, 0) + 1
+        try:
+            return await asyncio.shield(fut)
+        finally:
+            left = self._waiters.get(key, 1) - 1
+            if left > 0:
+                self._waiters[key] = left
+            else:
+                self._waiters.pop(key, None)
+
+    def has(self, key: str) -> bool:
+        """True if `key` is in flight or has a result that `do` would still reuse."""
+        if key in self._inflight:
+            return True
+        hit = self._done.get(key)
+        return hit is not None and time.monotonic() - hit[0] < self.ttl
+
+    def abandon(self, key: str) -> bool:
+        """Cancel the in-flight work for `key` if no caller is waiting on it any more (e.g. a dropped prefetch)."""
+        fut = self._inflight.get(key)
+        if fut is None or self._waiters.get(key) or fut.done():
+            return False
+        fut.cancel()
+        return True
+
+    def _finish(self, key: str, fut: asyncio.Future) -> None:
+        if self._inflight.get(key) is fut:
+            del self._inflight[key]
+        if fut.cancelled():
+            return
+        if fut.exception() is not None:
+            return
+        if self.ttl <= 0:
+            return
+        result = fut.result()
+        nbytes = self.size(result)
+        if nbytes > self.max_bytes:
+            return
+        self._forget(key)
+        self._done[key] = (time.monotonic(), result, nbytes)
+        self._bytes += nbytes
+        while self._bytes > self.max_bytes:
+            _key, (_at, _result, dropped) = self._done.popitem(last=False)
+            self._bytes -= dropped
+
+    def _forget(self, key: str) -> None:
+        hit = self._done.pop(key, None)
+        if hit is not None:
+            self._bytes -= hit[2]
+
+    def stats(self) -> dict:
+        return {
+            "fetched": self.leaders, "joined_in_flight": self.joined, "reused_recent": self.reused,
+            "kept_bytes": self._bytes,
+        }
@@ -0,0 +1,155 @@
+import asyncio
+import os
+from typing import Optional
+from urllib.parse import urlsplit
+
+from lxml import etree
+
+from backend.estately.client import stream
+from backend.estately.harvest import harvest_fragments
+from backend.estately.parse_pool import run_parse
+from backend.estately.retry import policy as retry_policy
+
+# Opt-in: parse search pages while they download instead of buffering the whole body.
+STREAM_PARSE = os.getenv("ESTATELY_STREAM_PARSE", "").lower() in {"1", "true", "yes"}
+
+# Class carried by every listing card on the primary Estately skin
+CARD_CLASS = "js-map-listing-result"
+
+
+def _is_card(el) -> bool:
+    cls = el.get("class") if isinstance(el.tag, str) else None
+    return bool(cls) and CARD_CLASS in cls.split()
+
+
+def _is_next_link(el) -> bool:
+    return (el.get("rel") or "").lower() == "next" or el.get("aria-label") == "Next"
+
+
+class StreamedPage:
+    """What the stream parser saw outside the cards: inline scripts, the next link, the fallback tree."""
+
+    def __init__(self):
+        # (type attribute, text) for every <script> outside a card, as `_mine_inline_script_texts` expects
+        self.scripts: list[tuple[str, str]] = []
+        self.next_href: Optional[str] = None
+        self.card_count = 0
+        self.root = None
+
+    def fallback_html(self) -> Optional[str]:
+        """
+        Serialized document when no primary-skin card was found. Until the first
+        card closes nothing is discarded, so older skins can still run through
+        the regular selector union.
+        """
+        if self.card_count or self.root is None:
+            return None
+        return etree.tostring(self.root, encoding="unicode", method="html")
+
+
+class CardStreamParser:
+    """
+    Incremental lxml parser fed with raw response chunks. Each `.js-map-listing-result`
+    element is handed back (as its outer HTML, for the engine's `fragment` and
+    `parse_card` in the parse executor) as soon as its closing tag arrives, and is
+    then released together with everything before it. Peak memory is one card plus
+    whatever is still being downloaded, not the full page and its tree.
+
+    `encoding` is the response charset; libxml2 would otherwise fall back to
+    Latin-1 for pages without a `<meta charset>`.
+    """
+
+    def __init__(self, page: Optional[StreamedPage] = None, encoding: str = "utf-8"):
+        self.page = page or StreamedPage()
+        self._parser = etree.HTMLPullParser(events=("start", "end"), encoding=encoding)
+        self._card_depth = 0
+
+    def feed(self, chunk: bytes) -> list:
+        self._parser.feed(chunk)
+        return self._drain()
+
+    def close(self) -> list:
+        root = self._parser.close()
+        cards = self._drain()
+        if self.page.root is None:
+            self.page.root = root
+        return cards
+
+    def _drain(self) -> list:
+        out: list = []
+        for event, el in self._parser.read_events():
+            if self.page.root is None:
+                self.page.root = el.getroottree().getroot()
+            if event == "start":
+                if _is_card(el):
+                    self._card_depth += 1
+                continue
+            if self._card_depth == 0:
+                if el.tag == "script":
+                    self.page.scripts.append(((el.get("type") or "").lower(), el.text or ""))
+                elif el.tag == "a" and self.page.next_href is None and el.get("href") and _is_next_link(el):
+                    self.page.next_href = el.get("href")
+            if _is_card(el):
+                self._card_depth -= 1
+                if self._card_depth == 0:
+                    out.append(etree.tostring(el, encoding="unicode", method="html", with_tail=False))
+                    self.page.card_count += 1
+                    _release(el)
+            elif self._card_depth == 0 and self.page.card_count:
+                # Primary skin confirmed: nothing outside the cards needs to stay in memory
+                _release(el)
+        return out
+
+
+def _release(el) -> None:
+    el.clear(keep_tail=True)
+    parent = el.getparent()
+    if parent is None:
+        return
+    while el.getprevious() is not None:
+        del parent[0]
+
+
+async def stream_page(url: str, engine_name: Optional[str] = None) -> tuple[StreamedPage, list[tuple[dict, str]]]:
+    """
+    Fetch `url` and parse its listing cards while the body is still arriving:
+    every chunk's finished cards go to the parse executor (`harvest_fragments`)
+    as one batch, so parsing overlaps the download and stays off the event loop.
+    Returns the page (scripts, next link, fallback tree) and every card as
+    (dict, card text).
+
+    The request runs under the retry policy and circuit breaker like `fetch()`.
+    Error statuses are handed back to the policy unparsed, and a retried attempt
+    starts over with a fresh parser, dropping the batches of the failed one.
+    """
+    done: dict = {}
+
+    async def attempt():
+        page = StreamedPage()
+        batches: list[asyncio.Future] = []
+
+        def submit(htmls: list[str]) -> None:
+            if htmls:
+                batches.append(asyncio.ensure_future(run_parse(harvest_fragments, htmls, engine_name)))
+
+        try:
+            async with stream(url) as r:
+                if r.status_code >= 400:
+                    return r
+                parser = CardStreamParser(page, encoding=r.charset_encoding or "utf-8")
+                async for chunk in r.aiter_bytes():
+                    submit(parser.feed(chunk))
+                submit(parser.close())
+        except BaseException:
+            for b in batches:
+                b.cancel()
+            raise
+        done["page"], done["batches"] = page, batches
+        return r
+
+    r = await retry_policy.call(urlsplit(url).hostname or "", attempt)
+    r.raise_for_status()
+    cards: list[tuple[dict, str]] = []
+    for batch in await asyncio.gather(*done["batches"]):
+        cards.extend(batch)
+    return done["page"], cards
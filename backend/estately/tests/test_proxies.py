@@ -0,0 +1,189 @@
+"""
+ProxyPool against local stand-in proxies: small asyncio servers that answer
+proxied GETs themselves (healthy, slow, or failing with 502), so requests go
+through the real client and limiter and feed the pool's EWMAs, ejections and
+sticky picks.
+"""
+import asyncio
+import itertools
+import random
+import time
+
+import pytest
+
+from backend.estately import proxies
+from backend.estately.client import close_clients, fetch
+from backend.estately.proxies import ACTIVE, EJECTED, PROBATION, ProxyPool, current_market, set_proxy_pool
+from backend.estately.retry import policy as retry_policy
+
+# Every request targets a fresh (never resolved) host, so per-host pacing and breakers stay out of the way
+_hosts = itertools.count()
+
+
+def _url() -> str:
+    return f"http://listings-{next(_hosts)}.test/az/phoenix"
+
+
+class StandInProxy:
+    """An HTTP forward proxy stand-in that answers every request itself."""
+
+    def __init__(self, status: int = 200, delay: float = 0.0):
+        self.status = status
+        self.delay = delay
+        self.requests: list[str] = []
+        self._server = None
+
+    async def start(self) -> "StandInProxy":
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.sockets[0].getsockname()[1]}"
+
+    def close(self) -> None:
+        self._server.close()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                self.requests.append(line.decode("latin-1").strip())
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+                body = b"ok" if self.status == 200 else b"proxy error"
+                writer.write(f"HTTP/1.1 {self.status} X\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+
+@pytest.fixture(autouse=True)
+def _one_attempt(monkeypatch):
+    # No retries: each fetch is exactly one sample for the pool
+    monkeypatch.setattr(retry_policy, "attempts", 1)
+    yield
+    set_proxy_pool(ProxyPool([]))
+
+
+def _run(scenario):
+    async def main():
+        try:
+            return await scenario()
+        finally:
+            await close_clients()
+    return asyncio.run(main())
+
+
+async def _via(ep) -> dict:
+    """One GET pinned to `ep` (bypassing `choose`); the outcome as `ProxyPool.report` arguments."""
+    started = time.monotonic()
+    r = await fetch(_url(), proxy=ep.url)
+    return {"ok": r.status_code not in (407, 502, 504), "latency": time.monotonic() - started}
+
+
+def test_ewma_scores_fast_reliable_exits_higher():
+    async def scenario():
+        fast, slow, bad = [await StandInProxy(**kw).start() for kw in ({}, {"delay": 0.15}, {"status": 502})]
+        try:
+            pools = []
+            for stand_in in (fast, slow, bad):
+                # A single exit is never ejected, so each one collects every sample
+                pool = ProxyPool([stand_in.url])
+                set_proxy_pool(pool)
+                for _ in range(3):
+                    await fetch(_url())
+                pools.append(pool)
+            return [p.endpoints[0] for p in pools], [fast, slow, bad]
+        finally:
+            for s in (fast, slow, bad):
+                s.close()
+
+    (fast_ep, slow_ep, bad_ep), stand_ins = _run(scenario)
+    assert [len(s.requests) for s in stand_ins] == [3, 3, 3]
+    a = proxies.PROXY_EWMA_ALPHA
+    assert fast_ep.error_ewma == slow_ep.error_ewma == 0.0
+    assert bad_ep.error_ewma == pytest.approx(1 - (1 - a) ** 3)
+    assert bad_ep.latency_ewma is None and bad_ep.failures == 3
+    assert slow_ep.latency_ewma > fast_ep.latency_ewma
+    assert fast_ep.score() > slow_ep.score() > bad_ep.score()
+
+
+def test_failing_exit_is_ejected_then_earns_its_way_back_on_probation():
+    async def scenario():
+        good, flaky = await StandInProxy().start(), await StandInProxy(status=502).start()
+        try:
+            pool = ProxyPool([good.url, flaky.url], rng=random.Random(7))
+            set_proxy_pool(pool)
+            flaky_ep = pool.endpoints[1]
+            for _ in range(proxies.PROXY_MIN_SAMPLES):
+                pool.report(flaky_ep, **await _via(flaky_ep))
+            assert flaky_ep.state == EJECTED and flaky_ep.ejections == 1
+            first_ban = flaky_ep.ejected_until - time.monotonic()
+            # While ejected it is never picked
+            for _ in range(10):
+                assert pool.choose() is pool.endpoints[0]
+
+            # Ban over: back on probation, with a fraction of the traffic weight
+            flaky_ep.ejected_until = 0.0
+            pool.choose()
+            assert flaky_ep.state == PROBATION
+            assert flaky_ep.score() < pool.endpoints[0].score()
+            # One failure on probation sends it straight back out, for twice as long
+            pool.report(flaky_ep, **await _via(flaky_ep))
+            assert flaky_ep.state == EJECTED and flaky_ep.ejections == 2
+            assert flaky_ep.ejected_until - time.monotonic() > first_ban * 1.5
+
+            # Healthy again: enough probation successes make it active
+            flaky.status = 200
+            flaky_ep.ejected_until = 0.0
+            pool.choose()
+            for _ in range(proxies.PROXY_PROBATION_SUCCESSES):
+                assert flaky_ep.state == PROBATION
+                pool.report(flaky_ep, **await _via(flaky_ep))
+            return flaky_ep
+        finally:
+            good.close()
+            flaky.close()
+
+    flaky_ep = _run(scenario)
+    assert flaky_ep.state == ACTIVE and flaky_ep.error_ewma == 0.0
+
+
+def test_market_sticks_to_one_exit_until_it_is_ejected():
+    async def scenario():
+        stand_ins = [await StandInProxy().start() for _ in range(3)]
+        try:
+            pool = ProxyPool([s.url for s in stand_ins], rng=random.Random(3))
+            set_proxy_pool(pool)
+            current_market.set("Phoenix, AZ")
+            for _ in range(5):
+                await fetch(_url())
+            first = [len(s.requests) for s in stand_ins]
+
+            # The sticky exit starts failing: it is ejected and the market moves to another exit
+            sticky = next(s for s in stand_ins if s.requests)
+            sticky.status = 502
+            for _ in range(proxies.PROXY_MIN_SAMPLES):
+                await fetch(_url())
+            before = [len(s.requests) for s in stand_ins]
+            for _ in range(5):
+                await fetch(_url())
+            after = [len(s.requests) for s in stand_ins]
+            return first, before, after, stand_ins.index(sticky), pool
+        finally:
+            for s in stand_ins:
+                s.close()
+
+    first, before, after, sticky_idx, pool = _run(scenario)
+    assert sorted(first) == [0, 0, 5]
+    assert pool.endpoints[sticky_idx].state == EJECTED
+    moved = [b - a for a, b in zip(before, after)]
+    assert moved[sticky_idx] == 0
+    assert sorted(moved) == [0, 0, 5]
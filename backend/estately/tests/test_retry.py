@@ -0,0 +1,48 @@
+"""RetryPolicy against scripted attempts: retries spend budget tokens one for one."""
+import asyncio
+
+import httpx
+import pytest
+
+from backend.estately.retry import RetryBudget, RetryPolicy
+
+
+def _policy(attempts: int, floor: float = 10) -> RetryPolicy:
+    policy = RetryPolicy(attempts=attempts, budget=RetryBudget(ratio=0.2, floor=floor))
+    policy._backoff = lambda state: 0
+    return policy
+
+
+def _answers(*statuses: int):
+    calls = []
+
+    async def attempt():
+        calls.append(len(calls))
+        return httpx.Response(statuses[min(len(calls) - 1, len(statuses) - 1)])
+
+    return attempt, calls
+
+
+def test_exhausted_attempts_spend_one_token_per_retry():
+    policy = _policy(attempts=3)
+    attempt, calls = _answers(503)
+    r = asyncio.run(policy.call("listings.test", attempt))
+    assert r.status_code == 503 and len(calls) == 3
+    assert policy.budget.spent == 2 and policy.budget.tokens == pytest.approx(8)
+    assert policy.budget.denied == 0
+
+
+def test_success_after_a_retry_earns_its_token_back_in_part():
+    policy = _policy(attempts=3)
+    attempt, calls = _answers(503, 200)
+    r = asyncio.run(policy.call("listings.test", attempt))
+    assert r.status_code == 200 and len(calls) == 2
+    assert policy.budget.spent == 1 and policy.budget.tokens == pytest.approx(9.2)
+
+
+def test_empty_budget_stops_retrying():
+    policy = _policy(attempts=3, floor=1)
+    attempt, calls = _answers(503)
+    asyncio.run(policy.call("listings.test", attempt))
+    assert len(calls) == 2
+    assert policy.budget.spent == 1 and policy.budget.denied == 1
@@ -0,0 +1,70 @@
+"""
+stream_page against a local HTTP server: cards come back parsed while the body
+arrives, decoded with the response charset rather than libxml2's Latin-1 default.
+"""
+import asyncio
+
+import pytest
+
+from backend.estately.client import close_clients
+from backend.estately.parse_pool import configure_parse_executor, get_parse_executor
+from backend.estately.streaming import stream_page
+
+CARD = (
+    '<div class="js-map-listing-result result-item" data-listing-id="1">'
+    '<div class="result-address"><a href="/listing/1">12 Café Way, Phoenix, AZ 85001</a></div>'
+    '<div class="result-price"><strong>$420,000</strong></div>'
+    '<p class="result-remarks">Café — walk to the park.</p></div>'
+)
+# No <meta charset>: the only hint is the Content-Type header (or nothing at all)
+PAGE = (
+    "<!doctype html><html><head><title>Phoenix homes</title>"
+    '<script>window.__INITIAL_STATE__ = {"city": "Peñasco"};</script></head>'
+    f'<body><div id="listings">{CARD}</div>'
+    '<nav><a rel="next" href="/AZ/Phoenix?page=2">Next</a></nav></body></html>'
+).encode("utf-8")
+
+
+async def _serve(content_type: str):
+    async def handle(reader, writer):
+        while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        head = f"HTTP/1.1 200 OK\r\nContent-Type: {content_type}\r\nContent-Length: {len(PAGE)}\r\n\r\n"
+        writer.write(head.encode())
+        # Split mid-character so decoding has to span chunks
+        cut = PAGE.index("é".encode()) + 1
+        writer.write(PAGE[:cut])
+        await writer.drain()
+        writer.write(PAGE[cut:])
+        await writer.drain()
+        writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+@pytest.fixture(autouse=True)
+def _inline_parse():
+    executor = get_parse_executor()
+    mode, workers = executor.mode, executor.workers
+    configure_parse_executor("inline")
+    yield
+    configure_parse_executor(mode, workers)
+
+
+@pytest.mark.parametrize("content_type", ["text/html", "text/html; charset=utf-8"])
+def test_non_ascii_page_without_meta_charset(content_type):
+    async def main():
+        server = await _serve(content_type)
+        try:
+            port = server.sockets[0].getsockname()[1]
+            return await stream_page(f"http://127.0.0.1:{port}/AZ/Phoenix")
+        finally:
+            server.close()
+            await close_clients()
+
+    page, cards = asyncio.run(main())
+    assert page.card_count == 1 and page.next_href == "/AZ/Phoenix?page=2"
+    assert any("Peñasco" in text for _, text in page.scripts)
+    (card, text), = cards
+    assert "Café — walk to the park." in text
+    assert "Café" in card["address"]